@@ -6,8 +6,11 @@ Fail-open if Redis is not configured. Provides JSON helpers with TTL.
 
 import os
 import json
+import time
 import typing as t
 
+from .metrics import CACHE_LOOKUPS, REDIS_SECONDS
+
 try:
     import redis  # type: ignore
 except Exception:  # pragma: no cover - optional dep
@@ -20,16 +23,43 @@ if REDIS_URL and redis:
     _client = redis.Redis.from_url(REDIS_URL)
 
 
+def _get(key: str) -> t.Optional[bytes]:
+    start = time.perf_counter()
+    value = _client.get(key)
+    REDIS_SECONDS.labels(op="get").observe(time.perf_counter() - start)
+    CACHE_LOOKUPS.labels(cache="redis", result="hit" if value else "miss").inc()
+    return value
+
+
+def _setex(key: str, ttl: int, value: t.Any) -> None:
+    start = time.perf_counter()
+    _client.setex(key, ttl, value)
+    REDIS_SECONDS.labels(op="setex").observe(time.perf_counter() - start)
+
+
 def cache_get(key: str) -> t.Any:
     if not _client:
         return None
-    value = _client.get(key)
+    value = _get(key)
     return json.loads(value) if value else None
 
 
 def cache_set(key: str, data: t.Any, ttl: int = 60) -> None:
     if not _client:
         return
-    _client.setex(key, ttl, json.dumps(data))
+    _setex(key, ttl, json.dumps(data))
+
 
 
+
+def cache_get_raw(key: str) -> t.Optional[bytes]:
+    """Return the stored bytes for `key` without decoding them."""
+    if not _client:
+        return None
+    return _get(key) or None
+
+
+def cache_set_raw(key: str, body: bytes, ttl: int = 60) -> None:
+    if not _client:
+        return
+    _setex(key, ttl, body)
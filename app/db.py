@@ -3,9 +3,20 @@ Database engine factory for Legend AI API.
 
 Provides a minimal SQLAlchemy engine using `DATABASE_URL`. This is used by
 readiness probes and other modules that only need a lightweight connection.
+
+`async_engine` is the non-blocking counterpart used by `async def` read
+endpoints. It maps the configured URL onto an async driver (asyncpg for
+Postgres, aiosqlite for SQLite) and is `None` when no driver is installed, in
+which case callers fall back to the sync engine on the threadpool.
 """
 
+import logging
+from typing import Any, Dict, Optional, Tuple
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
 from .config import get_database_url
 
 
@@ -13,3 +24,47 @@ from .config import get_database_url
 engine = create_engine(get_database_url(), pool_pre_ping=True, future=True)
 
 
+_ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Translate a sync database URL into its async-driver form.
+
+    Returns (url, connect_args); url is None when the scheme has no async driver.
+    asyncpg rejects libpq's `sslmode` query parameter, so it is moved into
+    `connect_args["ssl"]`.
+    """
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return None, {}
+
+    connect_args: Dict[str, Any] = {}
+    query = dict(parsed.query)
+    if driver.endswith("asyncpg") and "sslmode" in query:
+        sslmode = query.pop("sslmode")
+        if isinstance(sslmode, tuple):
+            sslmode = sslmode[-1]
+        if sslmode != "disable":
+            connect_args["ssl"] = sslmode
+    async_url = parsed.set(drivername=driver, query=query)
+    return async_url.render_as_string(hide_password=False), connect_args
+
+
+def _create_async_engine() -> Optional[AsyncEngine]:
+    url, connect_args = async_database_url(get_database_url())
+    if url is None:
+        return None
+    try:
+        return create_async_engine(url, pool_pre_ping=True, connect_args=connect_args)
+    except ImportError as exc:
+        logging.warning("async db driver unavailable (%s); using threadpool fallback", exc)
+        return None
+
+
+async_engine = _create_async_engine()
@@ -3,6 +3,8 @@ Database query layer for Legend AI API v1 endpoints.
 
 Provides cursor-based pagination over the Timescale-backed `patterns` table and
 API status aggregation queries. Designed to be pure functions with type hints.
+Each query has a sync variant and an `_async` variant for `AsyncEngine` callers;
+both share the same SQL and row mapping.
 """
 
 from __future__ import annotations
@@ -13,7 +15,9 @@ from datetime import datetime
 from typing import List, Optional, Tuple, Dict
 
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, RowMapping
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql.elements import TextClause
 
 
 def _encode_cursor(as_of_iso: str, ticker: str) -> str:
@@ -34,12 +38,8 @@ def _decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, str]]:
         return None
 
 
-def fetch_patterns(engine: Engine, limit: int, cursor: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
-    """Fetch paginated patterns ordered by (as_of DESC, ticker ASC).
-
-    Returns a tuple (items, next_cursor).
-    Each item is a dict containing a subset of pattern columns for API use.
-    """
+def _patterns_query(limit: int, cursor: Optional[str]) -> Tuple[TextClause, Dict[str, object]]:
+    """Build the keyset-paginated patterns SELECT and its bind parameters."""
     after = _decode_cursor(cursor)
 
     where_clause = ""
@@ -60,53 +60,85 @@ def fetch_patterns(engine: Engine, limit: int, cursor: Optional[str]) -> Tuple[L
         LIMIT :limit
         """
     )
-
-    rows: List[Dict] = []
-    with engine.connect() as conn:
-        result = conn.execute(sql, params)
-        for r in result.mappings():
-            # Handle as_of - can be datetime (PostgreSQL) or string (SQLite)
-            as_of_val = r["as_of"]
-            if as_of_val is not None:
-                as_of_str = as_of_val.isoformat() if hasattr(as_of_val, 'isoformat') else str(as_of_val)
-            else:
-                as_of_str = None
-            
-            # Handle meta - can be dict (PostgreSQL JSONB) or string (SQLite TEXT)
-            # This ensures compatibility with both database types
-            meta_val = r.get("meta")
-            if meta_val is not None:
-                if isinstance(meta_val, str):
-                    # SQLite returns JSON as TEXT string - parse it
-                    try:
-                        meta_dict = json.loads(meta_val) if meta_val else {}
-                    except (json.JSONDecodeError, TypeError):
-                        meta_dict = {}
-                else:
-                    # PostgreSQL returns JSONB as dict directly
-                    meta_dict = meta_val
-            else:
+    return sql, params
+
+
+def _pattern_row(r: RowMapping) -> Dict:
+    """Convert a raw patterns row into the API item dict."""
+    # Handle as_of - can be datetime (PostgreSQL) or string (SQLite)
+    as_of_val = r["as_of"]
+    if as_of_val is not None:
+        as_of_str = as_of_val.isoformat() if hasattr(as_of_val, 'isoformat') else str(as_of_val)
+    else:
+        as_of_str = None
+
+    # Handle meta - can be dict (PostgreSQL JSONB) or string (SQLite TEXT)
+    # This ensures compatibility with both database types
+    meta_val = r.get("meta")
+    if meta_val is not None:
+        if isinstance(meta_val, str):
+            # SQLite returns JSON as TEXT string - parse it
+            try:
+                meta_dict = json.loads(meta_val) if meta_val else {}
+            except (json.JSONDecodeError, TypeError):
                 meta_dict = {}
-            
-            rows.append(
-                {
-                    "ticker": r["ticker"],
-                    "pattern": r["pattern"],
-                    "as_of": as_of_str,
-                    "confidence": float(r["confidence"]) if r["confidence"] is not None else None,
-                    "rs": float(r["rs"]) if r.get("rs") is not None else None,
-                    "price": float(r["price"]) if r.get("price") is not None else None,
-                    "meta": meta_dict,
-                }
-            )
-
-    next_cursor: Optional[str] = None
+        else:
+            # PostgreSQL returns JSONB as dict directly
+            meta_dict = meta_val
+    else:
+        meta_dict = {}
+
+    return {
+        "ticker": r["ticker"],
+        "pattern": r["pattern"],
+        "as_of": as_of_str,
+        "confidence": float(r["confidence"]) if r["confidence"] is not None else None,
+        "rs": float(r["rs"]) if r.get("rs") is not None else None,
+        "price": float(r["price"]) if r.get("price") is not None else None,
+        "meta": meta_dict,
+    }
+
+
+def _next_cursor(rows: List[Dict]) -> Optional[str]:
     if rows:
         last = rows[-1]
         if last.get("as_of") and last.get("ticker"):
-            next_cursor = _encode_cursor(str(last["as_of"]), str(last["ticker"]))
+            return _encode_cursor(str(last["as_of"]), str(last["ticker"]))
+    return None
+
+
+def fetch_patterns(engine: Engine, limit: int, cursor: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+    """Fetch paginated patterns ordered by (as_of DESC, ticker ASC).
+
+    Returns a tuple (items, next_cursor).
+    Each item is a dict containing a subset of pattern columns for API use.
+    """
+    sql, params = _patterns_query(limit, cursor)
+    with engine.connect() as conn:
+        result = conn.execute(sql, params)
+        rows = [_pattern_row(r) for r in result.mappings()]
+    return rows, _next_cursor(rows)
 
-    return rows, next_cursor
+
+async def fetch_patterns_async(
+    engine: AsyncEngine, limit: int, cursor: Optional[str]
+) -> Tuple[List[Dict], Optional[str]]:
+    """Async variant of `fetch_patterns` for use from `async def` handlers."""
+    sql, params = _patterns_query(limit, cursor)
+    async with engine.connect() as conn:
+        result = await conn.execute(sql, params)
+        rows = [_pattern_row(r) for r in result.mappings()]
+    return rows, _next_cursor(rows)
+
+
+_STATUS_SQL = text(
+    """
+    SELECT MAX(as_of) AS last_as_of,
+           MIN(as_of) AS first_as_of,
+           COUNT(*)   AS total
+    FROM patterns
+    """
+)
 
 
 def get_status(engine: Engine) -> Dict[str, object]:
@@ -118,17 +150,19 @@ def get_status(engine: Engine) -> Dict[str, object]:
     - version: API version string
     """
     with engine.connect() as conn:
-        row = conn.execute(
-            text(
-                """
-                SELECT MAX(as_of) AS last_as_of,
-                       MIN(as_of) AS first_as_of,
-                       COUNT(*)   AS total
-                FROM patterns
-                """
-            )
-        ).mappings().first()
+        row = conn.execute(_STATUS_SQL).mappings().first()
+    return _status_from_row(row)
+
+
+async def get_status_async(engine: AsyncEngine) -> Dict[str, object]:
+    """Async variant of `get_status`."""
+    async with engine.connect() as conn:
+        result = await conn.execute(_STATUS_SQL)
+        row = result.mappings().first()
+    return _status_from_row(row)
+
 
+def _status_from_row(row: Optional[RowMapping]) -> Dict[str, object]:
     last_as_of = row["last_as_of"] if row else None
     first_as_of = row["first_as_of"] if row else None
     total = int(row["total"]) if row and row["total"] is not None else 0
@@ -9,37 +9,43 @@ Keeping this wrapper allows Render to run `uvicorn app.legend_ai_backend:app`
 without duplicating business logic.
 """
 
-import json
 import os
-import uuid
+import json
 import math
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Literal, Tuple, Union, TYPE_CHECKING
 
 import logging
 
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, APIRouter, Query, Response, HTTPException, Request
+from fastapi import FastAPI, APIRouter, Query, Response, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from starlette.middleware.base import BaseHTTPMiddleware
-import pandas as pd
-
-try:  # pragma: no cover - optional dependency for live enrichment
-    import yfinance as yf
-except Exception:  # pragma: no cover
-    yf = None
 
 from pathlib import Path
 
 from .config import allowed_origins, mock_enabled
 from .flags import get_flags
-from .cache import cache_get, cache_set
-from .db_queries import fetch_patterns, get_status
-from .data_fetcher import fetch_stock_data
+from .cache import cache_get_raw, cache_set_raw
+from .db_queries import fetch_patterns, fetch_patterns_async, get_status, get_status_async
 from .observability import setup_json_logging, setup_sentry
-from vcp_ultimate_algorithm import VCPDetector
+from .responses import JSONBytesResponse, dumps
+from .compression import CompressionMiddleware
+from .metrics import CACHE_LOOKUPS, CONTENT_TYPE, MetricsMiddleware, timed_fetch, track_pool
+from .metrics import render as render_metrics
+from .middleware import RequestIdMiddleware, SecureHeadersMiddleware
+from .scan_jobs import QueueFull, ScanJobManager
+from .timing import ServerTimingMiddleware, phase
+
+# pandas, yfinance, the VCP detector and the local dataset are imported on
+# first use (or by the startup warm-up below) so the process can bind its port
+# and answer /healthz without paying for the data stack.
+if TYPE_CHECKING:
+    import pandas as pd
+    from .local_dataset import LocalDataset
 
 
 # Import the existing FastAPI application defined at repository root
@@ -56,23 +62,7 @@ app = setup_sentry(base_app)
 
 LIVE_ENRICHMENT = os.getenv("LEGEND_LIVE_ENRICHMENT", "0") == "1"
 LOCAL_DATA_PATH = Path(__file__).parent.parent / "legend_ai_data.json"
-_LOCAL_DATA: Dict[str, Any] | None = None
-
-
-def _load_local_data() -> Dict[str, Any]:
-    global _LOCAL_DATA
-    if _LOCAL_DATA is not None:
-        return _LOCAL_DATA
-    if LOCAL_DATA_PATH.exists():
-        try:
-            with LOCAL_DATA_PATH.open("r") as fh:
-                _LOCAL_DATA = json.load(fh)
-        except Exception as exc:  # pragma: no cover
-            logging.warning("failed to load local dataset: %s", exc)
-            _LOCAL_DATA = {}
-    else:
-        _LOCAL_DATA = {}
-    return _LOCAL_DATA
+_LOCAL_DATASET: "LocalDataset | None" = None
 
 
 # CORS middleware with env-driven allowlist
@@ -86,9 +76,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/br for large JSON bodies; streaming responses pass through
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
 
 @app.get("/healthz")
-def healthz():
+async def healthz():
     return {"ok": True, "version": "0.1.0"}
 
 
@@ -97,6 +90,8 @@ try:
     from .db import engine  # type: ignore
     from sqlalchemy import text
 
+    track_pool(engine)
+
     @app.get("/readyz")
     def readyz():
         with engine.connect() as conn:
@@ -117,31 +112,30 @@ class Error(BaseModel):
     message: str
 
 
-class RequestIdMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):  # type: ignore[override]
-        rid = request.headers.get("x-request-id") or str(uuid.uuid4())
-        response = await call_next(request)
-        response.headers["x-request-id"] = rid
-        return response
-
-
 try:
     app.add_middleware(RequestIdMiddleware)
+    # Security headers from the optional `secure` package (no-op if it is missing)
+    app.add_middleware(SecureHeadersMiddleware)
 except Exception:
     pass
 
+app.add_middleware(ServerTimingMiddleware)
+
+# Outermost, so latency and size cover the whole stack (compressed size as sent)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=render_metrics(), headers={"Content-Type": CONTENT_TYPE})
+
 
 v1 = APIRouter(prefix="/v1", tags=["v1"])
 
-_DETECTOR = VCPDetector(
-    min_price=30.0,
-    min_volume=1_000_000,
-    min_contractions=2,
-    max_contractions=6,
-    check_trend_template=True,
-)
+_DETECTOR = None
+_LAZY_LOCK = threading.Lock()
 
-_PRICE_CACHE: Dict[str, pd.DataFrame] = {}
+_PRICE_CACHE: Dict[str, "pd.DataFrame"] = {}
 _SIGNAL_CACHE: Dict[str, Any] = {}
 _PROFILE_CACHE: Dict[str, Dict[str, Any]] = {}
 _BENCHMARK_CACHE: Dict[str, Tuple[float, datetime]] = {}
@@ -158,13 +152,87 @@ _SECTOR_BUCKETS = [
 ]
 
 
-def _get_local_market_entry(ticker: str) -> Dict[str, Any] | None:
-    data = _load_local_data()
-    market = data.get("market_data", {})
-    return market.get(ticker.upper())
+def _get_detector():
+    global _DETECTOR
+    if _DETECTOR is None:
+        with _LAZY_LOCK:
+            if _DETECTOR is None:
+                from vcp_ultimate_algorithm import VCPDetector
+
+                _DETECTOR = VCPDetector(
+                    min_price=30.0,
+                    min_volume=1_000_000,
+                    min_contractions=2,
+                    max_contractions=6,
+                    check_trend_template=True,
+                )
+    return _DETECTOR
+
+
+def _get_local_dataset() -> "LocalDataset":
+    global _LOCAL_DATASET
+    if _LOCAL_DATASET is None:
+        with _LAZY_LOCK:
+            if _LOCAL_DATASET is None:
+                from .local_dataset import LocalDataset
+
+                _LOCAL_DATASET = LocalDataset(LOCAL_DATA_PATH)
+    return _LOCAL_DATASET
+
+
+def _yfinance():
+    try:  # pragma: no cover - optional dependency for live enrichment
+        import yfinance as yf
+    except Exception:  # pragma: no cover
+        return None
+    return yf
+
+
+def _get_local_frame(ticker: str) -> "pd.DataFrame | None":
+    try:
+        return _get_local_dataset().frame(ticker)
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logging.warning("failed to load local dataset: %s", exc)
+        return None
+
+
+def _get_local_info(ticker: str) -> Dict[str, Any] | None:
+    try:
+        return _get_local_dataset().info(ticker)
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logging.warning("failed to load local dataset: %s", exc)
+        return None
+
+
+def _warm_data_stack() -> None:
+    """Pay the deferred import/initialisation costs off the request path."""
+    started = datetime.utcnow()
+    try:
+        import pandas  # noqa: F401
+
+        try:
+            from legend_ai_backend import init_db  # type: ignore
+
+            init_db()
+        except Exception as exc:  # pragma: no cover - DB may be unreachable at boot
+            logging.warning("warm-up: init_db failed: %s", exc)
+        _get_detector()
+        _get_local_dataset().symbols()
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logging.warning("warm-up failed: %s", exc)
+        return
+    logging.info("warm-up finished in %.2fs", (datetime.utcnow() - started).total_seconds())
+
 
+@app.on_event("startup")
+def _start_warm_up() -> None:
+    if os.getenv("LEGEND_WARM_START", "1") == "1":
+        threading.Thread(target=_warm_data_stack, name="legend-warm-up", daemon=True).start()
+
+
+def _generate_mock_series(ticker: str, days: int = 365) -> "pd.DataFrame":
+    import pandas as pd
 
-def _generate_mock_series(ticker: str, days: int = 365) -> pd.DataFrame:
     rng = pd.date_range(end=datetime.utcnow(), periods=days, freq="D")
     base = abs(hash(ticker)) % 500 + 50
     series = []
@@ -184,23 +252,23 @@ def _generate_mock_series(ticker: str, days: int = 365) -> pd.DataFrame:
     return pd.DataFrame(series)
 
 
-def _fetch_price_history(ticker: str, days: int = 365) -> pd.DataFrame | None:
+def _fetch_price_history(ticker: str, days: int = 365) -> "pd.DataFrame | None":
     if ticker in _PRICE_CACHE:
+        CACHE_LOOKUPS.labels(cache="price", result="hit").inc()
         return _PRICE_CACHE[ticker]
+    CACHE_LOOKUPS.labels(cache="price", result="miss").inc()
 
-    local_entry = _get_local_market_entry(ticker)
-    if not LIVE_ENRICHMENT and local_entry:
-        df = pd.DataFrame(local_entry.get("data", []))
-        if not df.empty and "Date" in df.columns:
-            df["Date"] = pd.to_datetime(df["Date"])
-            df = df.sort_values("Date").reset_index(drop=True)
-            df = df.tail(days)
-            _PRICE_CACHE[ticker] = df
-            return df
+    local_df = _get_local_frame(ticker)
+    if not LIVE_ENRICHMENT and local_df is not None:
+        df = local_df.tail(days)
+        _PRICE_CACHE[ticker] = df
+        return df
 
     if LIVE_ENRICHMENT:
         try:
-            df = fetch_stock_data(ticker, days=days)
+            from .data_fetcher import fetch_stock_data
+
+            df = timed_fetch("live", fetch_stock_data, ticker, days=days)
             if df is not None and not df.empty:
                 if "Date" in df.columns:
                     df = df.sort_values("Date").reset_index(drop=True)
@@ -209,14 +277,10 @@ def _fetch_price_history(ticker: str, days: int = 365) -> pd.DataFrame | None:
         except Exception as exc:  # pragma: no cover - defensive guard
             logging.warning("price history fetch failed for %s: %s", ticker, exc)
 
-    if local_entry:
-        df = pd.DataFrame(local_entry.get("data", []))
-        if not df.empty and "Date" in df.columns:
-            df["Date"] = pd.to_datetime(df["Date"])
-            df = df.sort_values("Date").reset_index(drop=True)
-            df = df.tail(days)
-            _PRICE_CACHE[ticker] = df
-            return df
+    if local_df is not None:
+        df = local_df.tail(days)
+        _PRICE_CACHE[ticker] = df
+        return df
 
     df = _generate_mock_series(ticker, days=days)
     _PRICE_CACHE[ticker] = df
@@ -225,7 +289,9 @@ def _fetch_price_history(ticker: str, days: int = 365) -> pd.DataFrame | None:
 
 def _compute_vcp_signal(ticker: str) -> Any:
     if ticker in _SIGNAL_CACHE:
+        CACHE_LOOKUPS.labels(cache="signal", result="hit").inc()
         return _SIGNAL_CACHE[ticker]
+    CACHE_LOOKUPS.labels(cache="signal", result="miss").inc()
 
     df = _fetch_price_history(ticker, days=365)
     if df is None or len(df) < 80:
@@ -234,7 +300,7 @@ def _compute_vcp_signal(ticker: str) -> Any:
 
     try:
         detector_df = df.set_index("Date")[['Open', 'High', 'Low', 'Close', 'Volume']]
-        signal = _DETECTOR.detect_vcp(detector_df, symbol=ticker)
+        signal = _get_detector().detect_vcp(detector_df, symbol=ticker)
         _SIGNAL_CACHE[ticker] = signal
         return signal
     except Exception as exc:
@@ -302,16 +368,16 @@ def _get_stock_profile(ticker: str) -> Dict[str, Any]:
         "volume_multiple": None,
     }
 
-    local_entry = _get_local_market_entry(ticker)
-    if local_entry:
-        info = local_entry.get("info", {})
+    info = _get_local_info(ticker)
+    if info:
         profile["name"] = info.get("name") or profile["name"]
         profile["sector"] = info.get("sector") or profile["sector"]
         profile["industry"] = info.get("industry") or profile["industry"]
         profile["market_cap"] = info.get("market_cap") or profile["market_cap"]
         profile["market_cap_human"] = info.get("market_cap_human") or profile["market_cap_human"]
 
-    if LIVE_ENRICHMENT and yf is not None:
+    yf = _yfinance() if LIVE_ENRICHMENT else None
+    if yf is not None:
         try:
             ticker_obj = yf.Ticker(ticker)
             info = ticker_obj.get_info()
@@ -347,10 +413,6 @@ def _get_stock_profile(ticker: str) -> Dict[str, Any]:
             latest_vol = float(df['Volume'].iloc[-1])
             if avg_vol > 0:
                 profile["volume_multiple"] = latest_vol / avg_vol
-    elif local_entry and local_entry.get("data"):
-        rows = local_entry["data"]
-        if rows:
-            profile["current_price"] = rows[-1].get("Close")
 
     if profile["market_cap"] and not profile["market_cap_human"]:
         profile["market_cap_human"] = _format_market_cap(profile["market_cap"])
@@ -511,36 +573,62 @@ class PaginatedPatterns(BaseModel):
     next: str | None
 
 
+async def _fetch_patterns_page(limit: int, cursor: str | None) -> Tuple[List[Dict], str | None]:
+    """Read one patterns page without blocking the event loop.
+
+    Uses the async engine when an async driver is installed, otherwise runs the
+    sync query on the threadpool.
+    """
+    from .db import async_engine, engine  # type: ignore
+
+    if async_engine is not None:
+        return await fetch_patterns_async(async_engine, limit=limit, cursor=cursor)
+    return await run_in_threadpool(fetch_patterns, engine, limit=limit, cursor=cursor)
+
+
+def _enrich_pattern_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [_enrich_pattern_row(row) for row in rows]
+
+
+async def _load_patterns_page(limit: int, cursor: str | None) -> Dict[str, Any]:
+    """Fetch, enrich and validate one page; the only place PatternItem is checked."""
+    try:
+        with phase("db"):
+            items, next_cursor = await _fetch_patterns_page(limit, cursor)
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=500, detail={"code": "db_error", "message": str(exc)})
+
+    # Enrichment reads price files and may call yfinance; keep it off the loop.
+    with phase("enrich"):
+        enriched_items = await run_in_threadpool(_enrich_pattern_rows, items)
+    with phase("serialize"):
+        return PaginatedPatterns(items=enriched_items, next=next_cursor).dict()
+
+
 @v1.get("/patterns/all", response_model=PaginatedPatterns)
-def patterns_all_v1(
-    response: Response,
+async def patterns_all_v1(
     limit: int = Query(100, ge=1, le=500),
     cursor: str | None = None,
 ):
     """Return latest patterns with cursor pagination.
 
     Ordered by (as_of DESC, ticker ASC). Cursor encodes last (as_of, ticker).
+    The page is encoded once and cached as bytes; hits skip model validation.
     """
-    response.headers["Cache-Control"] = "public, max-age=30"
-
     flags = get_flags()
     cache_key = f"v1:patterns:all:{limit}:{cursor or ''}"
+    body = None
     if "cache" in flags:
-        cached = cache_get(cache_key)
-        if cached:
-            return cached
-
-    try:
-        from .db import engine  # type: ignore
-        items, next_cursor = fetch_patterns(engine, limit=limit, cursor=cursor)
-    except Exception as exc:  # pragma: no cover
-        raise HTTPException(status_code=500, detail={"code": "db_error", "message": str(exc)})
-
-    enriched_items = [_enrich_pattern_row(row) for row in items]
-    payload = {"items": enriched_items, "next": next_cursor}
-    if "cache" in flags:
-        cache_set(cache_key, payload, ttl=60)
-    return payload
+        with phase("cache"):
+            body = await run_in_threadpool(cache_get_raw, cache_key)
+    if body is None:
+        page = await _load_patterns_page(limit, cursor)
+        with phase("serialize"):
+            body = dumps(page)
+        if "cache" in flags:
+            with phase("cache"):
+                await run_in_threadpool(cache_set_raw, cache_key, body, 60)
+    return JSONBytesResponse(body, headers={"Cache-Control": "public, max-age=30"})
 
 
 class StatusModel(BaseModel):
@@ -569,29 +657,52 @@ class MarketOverviewModel(BaseModel):
     updated_at: str
 
 
+class MarketIndexCompactModel(BaseModel):
+    symbol: str
+    name: str
+    last_price: float | None
+    change_percent: float | None
+    previous_close: float | None
+    times: List[str]
+    closes: List[float]
+
+
+class MarketOverviewCompactModel(BaseModel):
+    indices: List[MarketIndexCompactModel]
+    updated_at: str
+
+
+_INDICES_CATALOG = [
+    ("SPY", "S&P 500"),
+    ("QQQ", "Nasdaq 100"),
+    ("IWM", "Russell 2000"),
+    ("DIA", "Dow Jones Industrial"),
+    ("VIX", "CBOE Volatility"),
+]
+# format -> (minute bucket, encoded body); rebuilt at most once per minute
+_INDICES_CACHE: Dict[str, Tuple[str, bytes]] = {}
+
+
 @v1.get("/meta/status", response_model=StatusModel)
-def meta_status_v1() -> StatusModel:
+async def meta_status_v1() -> StatusModel:
     try:
-        from .db import engine  # type: ignore
-        status = get_status(engine)
+        from .db import async_engine, engine  # type: ignore
+
+        if async_engine is not None:
+            status = await get_status_async(async_engine)
+        else:
+            status = await run_in_threadpool(get_status, engine)
     except Exception:
         # graceful when DB unavailable
         status = {"last_scan_time": None, "rows_total": 0, "patterns_daily_span_days": None, "version": "0.1.0"}
     return StatusModel(**status)
 
 
-@app.get("/api/market/indices", response_model=MarketOverviewModel)
-def market_indices_overview():
-    indices_catalog = [
-        ("SPY", "S&P 500"),
-        ("QQQ", "Nasdaq 100"),
-        ("IWM", "Russell 2000"),
-        ("DIA", "Dow Jones Industrial"),
-        ("VIX", "CBOE Volatility"),
-    ]
+def _build_market_overview(compact: bool) -> Dict[str, Any] | None:
+    import pandas as pd
 
     indices: List[Dict[str, Any]] = []
-    for symbol, display_name in indices_catalog:
+    for symbol, display_name in _INDICES_CATALOG:
         df = _fetch_price_history(symbol, days=120)
         if df is None or df.empty:
             continue
@@ -601,34 +712,56 @@ def market_indices_overview():
             continue
 
         try:
-            if not pd.api.types.is_datetime64_any_dtype(recent['Date']):
-                recent['Date'] = pd.to_datetime(recent['Date'])
-            last_close = float(recent['Close'].iloc[-1])
-            previous_close = float(recent['Close'].iloc[-2]) if len(recent) > 1 else None
+            dates = recent['Date']
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates)
+            times = dates.dt.strftime('%Y-%m-%d').tolist()
+            closes = recent['Close'].to_numpy(dtype=float).tolist()
+            last_close = closes[-1]
+            previous_close = closes[-2] if len(closes) > 1 else None
             change_percent = ((last_close - previous_close) / previous_close) if previous_close else 0.0
-            sparkline = [
-                MarketSparkPoint(time=row['Date'].strftime('%Y-%m-%d'), close=float(row['Close']))
-                for _, row in recent.iterrows()
-            ]
         except Exception as exc:  # pragma: no cover
             logging.warning("sparkline generation failed for %s: %s", symbol, exc)
             continue
 
-        indices.append(
-            {
-                "symbol": symbol,
-                "name": display_name,
-                "last_price": last_close,
-                "change_percent": change_percent,
-                "previous_close": previous_close,
-                "sparkline": sparkline,
-            }
-        )
+        entry: Dict[str, Any] = {
+            "symbol": symbol,
+            "name": display_name,
+            "last_price": last_close,
+            "change_percent": change_percent,
+            "previous_close": previous_close,
+        }
+        if compact:
+            entry["times"] = times
+            entry["closes"] = closes
+        else:
+            entry["sparkline"] = [{"time": t, "close": c} for t, c in zip(times, closes)]
+        indices.append(entry)
 
     if not indices:
-        raise HTTPException(status_code=503, detail="Market overview unavailable")
+        return None
+    return {"indices": indices, "updated_at": datetime.utcnow().isoformat()}
+
+
+@app.get(
+    "/api/market/indices",
+    response_model=Union[MarketOverviewModel, MarketOverviewCompactModel],
+)
+def market_indices_overview(format: Literal["points", "compact"] = Query(default="points")):
+    """Index cards with 60-day sparklines.
 
-    return MarketOverviewModel(indices=indices, updated_at=datetime.utcnow().isoformat())
+    `format=compact` returns parallel `times[]`/`closes[]` arrays instead of
+    `{time, close}` points. The encoded body is cached per UTC minute.
+    """
+    minute = datetime.utcnow().strftime("%Y-%m-%dT%H:%M")
+    cached = _INDICES_CACHE.get(format)
+    if cached is None or cached[0] != minute:
+        overview = _build_market_overview(compact=format == "compact")
+        if overview is None:
+            raise HTTPException(status_code=503, detail="Market overview unavailable")
+        cached = (minute, json.dumps(overview, separators=(",", ":")).encode())
+        _INDICES_CACHE[format] = cached
+    return Response(content=cached[1], media_type="application/json")
 
 
 app.include_router(v1)
@@ -651,17 +784,10 @@ def serve_test_dashboard():
 
 # Legacy API endpoint (redirect to v1 for backward compatibility)
 # Returns data in the format the dashboard expects
-@app.get("/api/patterns/all")
-def get_all_patterns_legacy(response: Response, limit: int = Query(default=500, ge=1, le=1000)):
-    """Legacy endpoint for backward compatibility. Returns dashboard-compatible format.
-    
-    Calls the v1 endpoint internally and transforms the data to the format the dashboard expects.
-    """
-    # Call the v1 endpoint
-    v1_response = patterns_all_v1(response, limit=min(limit, 500), cursor=None)
-    
-    # v1 returns {"items": [...], "next": ...}, extract items
-    v1_items = v1_response.get("items", []) if isinstance(v1_response, dict) else []
+async def _legacy_patterns(limit: int) -> List[Dict[str, Any]]:
+    """Load the first v1 page and transform it to the format the dashboard expects."""
+    v1_response = await _load_patterns_page(min(limit, 500), None)
+    v1_items = v1_response.get("items", [])
     
     # Transform to dashboard format
     dashboard_format = []
@@ -708,6 +834,25 @@ def get_all_patterns_legacy(response: Response, limit: int = Query(default=500,
     return dashboard_format
 
 
+@app.get("/api/patterns/all")
+async def get_all_patterns_legacy(limit: int = Query(default=500, ge=1, le=1000)):
+    """Legacy endpoint for backward compatibility. Returns dashboard-compatible format."""
+    flags = get_flags()
+    cache_key = f"legacy:patterns:all:{limit}"
+    body = None
+    if "cache" in flags:
+        with phase("cache"):
+            body = await run_in_threadpool(cache_get_raw, cache_key)
+    if body is None:
+        rows = await _legacy_patterns(limit)
+        with phase("serialize"):
+            body = dumps(rows)
+        if "cache" in flags:
+            with phase("cache"):
+                await run_in_threadpool(cache_set_raw, cache_key, body, 60)
+    return JSONBytesResponse(body, headers={"Cache-Control": "public, max-age=30"})
+
+
 # Market environment endpoint (used by dashboard)
 @app.get("/api/market/environment")
 def get_market_environment():
@@ -736,9 +881,9 @@ def get_portfolio_positions():
 
 # Debug endpoint to show exactly what data the frontend should use
 @app.get("/admin/frontend-data-sample")
-def frontend_data_sample():
+async def frontend_data_sample():
     """Return a sample of exactly what the frontend should fetch and how to display it."""
-    v1_response = patterns_all_v1(Response(), limit=3, cursor=None)
+    v1_response = await _load_patterns_page(3, None)
     
     return {
         "instructions": "The frontend should call /v1/patterns/all and transform like this:",
@@ -795,14 +940,14 @@ def list_all_routes():
 
 # Debug endpoint to test data transformation
 @app.get("/admin/test-legacy-transform")
-def test_legacy_transform():
+async def test_legacy_transform():
     """Debug endpoint to test the legacy data transformation and diagnose issues."""
     import traceback as tb
     try:
         from .db import engine  # type: ignore
         from .db_queries import fetch_patterns  # type: ignore
         
-        items, _ = fetch_patterns(engine, limit=3, cursor=None)
+        items, _ = await run_in_threadpool(fetch_patterns, engine, limit=3, cursor=None)
         
         result = {
             "raw_count": len(items),
@@ -829,9 +974,8 @@ def test_legacy_transform():
         
         # Now actually CALL the legacy endpoint to see what happens
         try:
-            from fastapi.responses import Response
             from fastapi import Query
-            legacy_response = get_all_patterns_legacy(Response(), limit=3)
+            legacy_response = await _legacy_patterns(3)
             result["legacy_call_result"] = legacy_response
         except Exception as legacy_err:
             result["legacy_call_error"] = {
@@ -963,103 +1107,115 @@ def test_data_fetch(ticker: str = Query(default="AAPL")):
         return {"error": str(e)}
 
 
-@app.post("/admin/run-scan")
-def run_scan_endpoint(limit: int = Query(default=7, ge=1, le=20)):
-    """Trigger a scan for VCP patterns on a limited set of tickers."""
-    try:
-        import sys
-        from pathlib import Path
-        from datetime import datetime
-        
-        # Add parent to path
-        sys.path.insert(0, str(Path(__file__).parent.parent))
-        
+def _ensure_repo_on_path() -> None:
+    import sys
+
+    root = str(Path(__file__).parent.parent)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+
+
+_ADMIN_DETECTOR = None
+
+
+def _admin_scan_one(ticker: str, as_of: datetime) -> Tuple[str, Dict[str, Any] | None]:
+    """Fetch and detect one ticker for a scan job: (result line, pattern record or None)."""
+    global _ADMIN_DETECTOR
+    if _ADMIN_DETECTOR is None:
+        _ensure_repo_on_path()
         from vcp_ultimate_algorithm import VCPDetector  # type: ignore
-        from .db import engine  # type: ignore
-        from .data_fetcher import fetch_stock_data  # type: ignore
-        from sqlalchemy import text
-        
-        # Load universe
-        universe_path = Path(__file__).parent.parent / "data" / "universe.csv"
-        if universe_path.exists():
-            with open(universe_path) as f:
-                tickers = [line.strip() for line in f if line.strip()][:limit]
-        else:
-            tickers = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"][:limit]
-        
-        detector = VCPDetector(min_price=30.0, min_volume=1_000_000, min_contractions=2, check_trend_template=True)
-        
-        results = []
-        for ticker in tickers:
-            try:
-                # Fetch data using multi-source fetcher
-                df = fetch_stock_data(ticker, days=365)
-                if df is None or len(df) < 60:
-                    results.append(f"⊘ {ticker}: insufficient data")
-                    continue
-                
-                # Detect
-                signal = detector.detect_vcp(df, ticker)
-                
-                if signal.detected:
-                    # Upsert to database
-                    record = {
-                        "ticker": ticker,
-                        "pattern": "VCP",
-                        "as_of": datetime.now(),
-                        "confidence": float(signal.confidence_score),
-                        "rs": None,
-                        "price": float(signal.pivot_price) if signal.pivot_price else None,
-                        "meta": text(f"""'{{"contractions": {len(signal.contractions)}}}'::jsonb""")
-                    }
-                    
-                    with engine.begin() as conn:
-                        conn.execute(
-                            text("""
-                                INSERT INTO patterns (ticker, pattern, as_of, confidence, rs, price, meta)
-                                VALUES (:ticker, :pattern, :as_of, :confidence, :rs, :price, :meta)
-                                ON CONFLICT (ticker, pattern, as_of) DO UPDATE
-                                SET confidence=EXCLUDED.confidence, price=EXCLUDED.price, meta=EXCLUDED.meta
-                            """),
-                            {
-                                "ticker": ticker,
-                                "pattern": "VCP",
-                                "as_of": datetime.now(),
-                                "confidence": float(signal.confidence_score),
-                                "rs": None,
-                                "price": float(signal.pivot_price) if signal.pivot_price else None,
-                                "meta": f'{{"contractions": {len(signal.contractions)}}}'
-                            }
-                        )
-                    
-                    results.append(f"✓ {ticker}: VCP (conf={signal.confidence_score:.1f}%)")
-                else:
-                    results.append(f"✗ {ticker}: no VCP")
-                    
-            except Exception as e:
-                results.append(f"⚠ {ticker}: {str(e)[:50]}")
-        
-        return {"ok": True, "scanned": len(tickers), "results": results}
-        
-    except Exception as e:
-        logging.error(f"Scan failed: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Scan failed: {str(e)}")
 
+        _ADMIN_DETECTOR = VCPDetector(
+            min_price=30.0, min_volume=1_000_000, min_contractions=2, check_trend_template=True
+        )
+    from .data_fetcher import fetch_stock_data  # type: ignore
+
+    df = timed_fetch("live", fetch_stock_data, ticker, days=365)
+    if df is None or len(df) < 60:
+        return f"⊘ {ticker}: insufficient data", None
+    signal = _ADMIN_DETECTOR.detect_vcp(df, ticker)
+    if not signal.detected:
+        return f"✗ {ticker}: no VCP", None
+    record = {
+        "ticker": ticker,
+        "pattern": "VCP",
+        "as_of": as_of,
+        "confidence": float(signal.confidence_score),
+        "rs": None,
+        "price": float(signal.pivot_price) if signal.pivot_price else None,
+        "meta": json.dumps({"contractions": len(signal.contractions)}),
+    }
+    return f"✓ {ticker}: VCP (conf={signal.confidence_score:.1f}%)", record
 
-# Security headers (optional, no-op if lib missing)
-try:
-    from secure import Secure  # type: ignore
 
-    secure = Secure()
+def _admin_persist(records: List[Dict[str, Any]]) -> None:
+    from sqlalchemy import text
 
-    @app.middleware("http")
-    async def set_secure_headers(request, call_next):
-        resp = await call_next(request)
-        # FastAPI integration helper
-        secure.framework.fastapi(resp)  # type: ignore[attr-defined]
-        return resp
-except Exception:
-    pass
+    from .db import engine  # type: ignore
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO patterns (ticker, pattern, as_of, confidence, rs, price, meta)
+                VALUES (:ticker, :pattern, :as_of, :confidence, :rs, :price, :meta)
+                ON CONFLICT (ticker, pattern, as_of) DO UPDATE
+                SET confidence=EXCLUDED.confidence, price=EXCLUDED.price, meta=EXCLUDED.meta
+            """),
+            records,
+        )
+
+
+scan_jobs = ScanJobManager(_admin_scan_one, _admin_persist)
+
+
+@app.post("/admin/run-scan", status_code=202)
+def run_scan_endpoint(limit: int = Query(default=7, ge=1, le=10000)):
+    """Queue a VCP scan of the first `limit` universe tickers and return its job id.
+
+    The scan runs in the background; poll `/admin/scan-jobs/{id}` (or follow it
+    with `?follow=true`) for progress and partial results.
+    """
+    _ensure_repo_on_path()
+    from universe import load_symbols
+
+    universe_path = Path(__file__).parent.parent / "data" / "universe.csv"
+    tickers = (load_symbols(universe_path) or ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"])[:limit]
+    try:
+        job = scan_jobs.submit(tickers)
+    except QueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
+    return {
+        "ok": True,
+        "job_id": job.id,
+        "status": job.status,
+        "total": len(tickers),
+        "status_url": f"/admin/scan-jobs/{job.id}",
+    }
+
+
+@app.get("/admin/scan-jobs")
+def list_scan_jobs():
+    jobs = [job.snapshot(results_from=len(job.results)) for job in scan_jobs.jobs()]
+    for job in jobs:
+        del job["results"], job["patterns"]
+    return {"jobs": jobs}
+
+
+@app.get("/admin/scan-jobs/{job_id}")
+def scan_job_status(job_id: str, follow: bool = Query(default=False)):
+    """Progress and partial results of a scan job; `follow=true` streams NDJSON until it ends."""
+    job = scan_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"unknown scan job {job_id}")
+    if follow:
+        events = (dumps(event) + b"\n" for event in scan_jobs.follow(job))
+        return StreamingResponse(events, media_type="application/x-ndjson")
+    return job.snapshot()
+
+
+@app.on_event("shutdown")
+def _stop_scan_jobs() -> None:
+    scan_jobs.shutdown()
 
 
 # Boot log
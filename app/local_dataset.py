@@ -0,0 +1,181 @@
+"""
+Indexed, memory-mapped access to the bundled `legend_ai_data.json` dataset.
+
+At build time (`python -m app.local_dataset build`) the `market_data` section is
+converted into one `.npy` file per OHLCV column plus an `index.json` holding each
+symbol's row offset, row count and info dict. At runtime only the small index is
+parsed; column files are memory-mapped on first use and a lookup slices one
+symbol's rows, so startup and first-request cost do not grow with the dataset.
+
+If the index is missing or older than the JSON source, the reader falls back to
+parsing the JSON into the same columnar arrays in memory.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+INDEX_VERSION = 1
+COLUMNS = ("Date", "Open", "High", "Low", "Close", "Volume")
+_DTYPES = {
+    "Date": "datetime64[D]",
+    "Open": "float64",
+    "High": "float64",
+    "Low": "float64",
+    "Close": "float64",
+    "Volume": "int64",
+}
+
+
+def default_index_dir(source: Path) -> Path:
+    return source.parent / "data" / "local_dataset"
+
+
+def _source_stamp(source: Path) -> dict[str, int]:
+    st = source.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _columnar(source: Path) -> tuple[dict[str, np.ndarray], dict[str, dict[str, Any]]]:
+    """Parse the JSON source into concatenated column arrays and a symbol index."""
+    with source.open("r") as fh:
+        market = json.load(fh).get("market_data", {})
+
+    parts: dict[str, list] = {c: [] for c in COLUMNS}
+    symbols: dict[str, dict[str, Any]] = {}
+    offset = 0
+    for symbol in sorted(market):
+        entry = market[symbol] or {}
+        rows = sorted(
+            (r for r in entry.get("data", []) if r.get("Date")), key=lambda r: r["Date"]
+        )
+        for col in COLUMNS:
+            parts[col].append(
+                np.array([r.get(col) or 0 for r in rows], dtype=_DTYPES[col])
+            )
+        symbols[symbol.upper()] = {
+            "offset": offset,
+            "length": len(rows),
+            "info": entry.get("info", {}),
+        }
+        offset += len(rows)
+
+    columns = {
+        col: (np.concatenate(parts[col]) if parts[col] else np.array([], dtype=_DTYPES[col]))
+        for col in COLUMNS
+    }
+    return columns, symbols
+
+
+def build_index(source: Path, index_dir: Path | None = None) -> Path:
+    """Write the columnar arrays and index for `source`; returns the index directory."""
+    index_dir = index_dir or default_index_dir(source)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    columns, symbols = _columnar(source)
+    for col, values in columns.items():
+        np.save(index_dir / f"{col.lower()}.npy", values)
+    index = {
+        "version": INDEX_VERSION,
+        "source": _source_stamp(source),
+        "rows": int(len(columns["Date"])),
+        "symbols": symbols,
+    }
+    # Written last so a partially built directory is never considered fresh
+    (index_dir / "index.json").write_text(json.dumps(index))
+    return index_dir
+
+
+class LocalDataset:
+    """Lazy per-symbol reader over the bundled market dataset."""
+
+    def __init__(self, source: Path, index_dir: Path | None = None):
+        self.source = source
+        self.index_dir = index_dir or default_index_dir(source)
+        self._symbols: dict[str, dict[str, Any]] | None = None
+        self._columns: dict[str, np.ndarray] | None = None
+        self._mapped = False
+        self._lock = threading.Lock()
+
+    def _load_index(self) -> dict[str, dict[str, Any]]:
+        if self._symbols is not None:
+            return self._symbols
+        with self._lock:
+            if self._symbols is not None:
+                return self._symbols
+            symbols: dict[str, dict[str, Any]] = {}
+            if not self.source.exists():
+                self._columns = {}
+            else:
+                try:
+                    symbols = self._read_fresh_index()
+                    self._mapped = True
+                except (OSError, ValueError, KeyError) as exc:
+                    logging.info("local dataset index unavailable (%s); parsing JSON", exc)
+                    self._columns, symbols = _columnar(self.source)
+            self._symbols = symbols
+            return symbols
+
+    def _read_fresh_index(self) -> dict[str, dict[str, Any]]:
+        index = json.loads((self.index_dir / "index.json").read_text())
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError("index version mismatch")
+        if index.get("source") != _source_stamp(self.source):
+            raise ValueError("index is stale")
+        return index["symbols"]
+
+    def _column(self, col: str) -> np.ndarray:
+        if self._columns is None:
+            self._columns = {}
+        values = self._columns.get(col)
+        if values is None and self._mapped:
+            values = np.load(self.index_dir / f"{col.lower()}.npy", mmap_mode="r")
+            self._columns[col] = values
+        if values is None:
+            raise KeyError(col)
+        return values
+
+    @property
+    def memory_mapped(self) -> bool:
+        self._load_index()
+        return self._mapped
+
+    def symbols(self) -> list[str]:
+        return list(self._load_index())
+
+    def info(self, ticker: str) -> dict[str, Any] | None:
+        entry = self._load_index().get(ticker.upper())
+        return entry["info"] if entry else None
+
+    def frame(self, ticker: str) -> pd.DataFrame | None:
+        """OHLCV rows for `ticker` sorted by Date, or None if the symbol is absent."""
+        entry = self._load_index().get(ticker.upper())
+        if not entry or not entry["length"]:
+            return None
+        start, stop = entry["offset"], entry["offset"] + entry["length"]
+        data = {col: np.array(self._column(col)[start:stop]) for col in COLUMNS}
+        data["Date"] = data["Date"].astype("datetime64[ns]")
+        return pd.DataFrame(data)
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) < 1 or argv[0] != "build":
+        print("usage: python -m app.local_dataset build [SOURCE_JSON] [INDEX_DIR]")
+        return 2
+    root = Path(__file__).parent.parent
+    source = Path(argv[1]) if len(argv) > 1 else root / "legend_ai_data.json"
+    index_dir = Path(argv[2]) if len(argv) > 2 else None
+    out = build_index(source, index_dir)
+    print(f"built local dataset index in {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,216 @@
+"""
+Prometheus metrics for Legend AI API and scan workers.
+
+Metrics live in one `prometheus_client` registry. The API serves it at
+`/metrics`; `MetricsMiddleware` records request count, latency and response
+size labelled by route template. Batch processes (daily scan, scan_batch)
+have nothing to scrape, so they call `write_textfile()` when they finish, for
+node_exporter's textfile collector (`LEGEND_METRICS_TEXTFILE`).
+"""
+
+import math
+import os
+import time
+import typing as t
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    disable_created_metrics,
+    generate_latest,
+    write_to_textfile,
+)
+
+Scope = t.MutableMapping[str, t.Any]
+Message = t.MutableMapping[str, t.Any]
+Receive = t.Callable[[], t.Awaitable[Message]]
+Send = t.Callable[[Message], t.Awaitable[None]]
+ASGIApp = t.Callable[[Scope, Receive, Send], t.Awaitable[None]]
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+REDIS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+# Counters export only `_total`, not a `_created` series per label set
+disable_created_metrics()
+REGISTRY = CollectorRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: t.Sequence[str] = ()) -> Counter:
+    return Counter(name, documentation, labelnames, registry=REGISTRY)
+
+
+def gauge(name: str, documentation: str, labelnames: t.Sequence[str] = ()) -> Gauge:
+    return Gauge(name, documentation, labelnames, registry=REGISTRY)
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: t.Sequence[str] = (),
+    buckets: t.Sequence[float] = LATENCY_BUCKETS,
+) -> Histogram:
+    return Histogram(name, documentation, labelnames, buckets=buckets, registry=REGISTRY)
+
+
+# API
+HTTP_REQUESTS = counter(
+    "legend_http_requests_total", "HTTP requests by route template and status.",
+    ("method", "route", "status"),
+)
+HTTP_DURATION = histogram(
+    "legend_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route"),
+)
+HTTP_RESPONSE_SIZE = histogram(
+    "legend_http_response_size_bytes", "HTTP response body size (as sent) by route template.",
+    ("method", "route"), SIZE_BUCKETS,
+)
+CACHE_LOOKUPS = counter(
+    "legend_cache_lookups_total", "In-process and Redis cache lookups by result.",
+    ("cache", "result"),
+)
+REDIS_SECONDS = histogram(
+    "legend_redis_roundtrip_seconds", "Redis round-trip time by operation.", ("op",),
+    REDIS_BUCKETS,
+)
+DB_POOL = gauge("legend_db_pool_connections", "SQLAlchemy pool connections by state.", ("state",))
+
+# Data providers and scans
+PROVIDER_FETCH_SECONDS = histogram(
+    "legend_provider_fetch_seconds", "Market data provider fetch latency.",
+    ("provider", "outcome"), FETCH_BUCKETS,
+)
+RATE_LIMIT_WAIT_SECONDS = counter(
+    "legend_rate_limit_wait_seconds_total", "Time spent sleeping to respect provider limits.",
+    ("provider",),
+)
+SCAN_SYMBOLS = counter(
+    "legend_scan_symbols_total", "Symbols processed by scans by outcome.", ("scanner", "outcome"),
+)
+SCAN_THROUGHPUT = gauge(
+    "legend_scan_symbols_per_second", "Throughput of the last completed scan.", ("scanner",),
+)
+SCAN_LAST_SUCCESS = gauge(
+    "legend_scan_last_success_timestamp_seconds", "Unix time the last scan finished.",
+    ("scanner",),
+)
+
+
+def _sampler(sample: t.Callable[[], t.Any]) -> t.Callable[[], float]:
+    def read() -> float:
+        try:
+            return float(sample())
+        except Exception:  # never fail a scrape
+            return math.nan
+
+    return read
+
+
+def track_pool(engine: t.Any) -> None:
+    """Sample `engine`'s connection pool into DB_POOL at every scrape."""
+    pool = engine.pool
+    for state in ("checkedout", "checkedin", "overflow", "size"):
+        sample = getattr(pool, state, None)
+        if callable(sample):
+            DB_POOL.labels(state=state).set_function(_sampler(sample))
+
+
+def timed_fetch(
+    provider: str, fetch: t.Callable[..., t.Any], *args: t.Any, **kwargs: t.Any
+) -> t.Any:
+    """Call a provider fetch, observing its latency with an ok/error outcome."""
+    start = time.perf_counter()
+    try:
+        result = fetch(*args, **kwargs)
+    except Exception:
+        PROVIDER_FETCH_SECONDS.labels(provider=provider, outcome="error").observe(
+            time.perf_counter() - start
+        )
+        raise
+    PROVIDER_FETCH_SECONDS.labels(provider=provider, outcome="ok").observe(
+        time.perf_counter() - start
+    )
+    return result
+
+
+def record_scan(scanner: str, symbols: int, seconds: float) -> None:
+    SCAN_THROUGHPUT.labels(scanner=scanner).set(symbols / seconds if seconds > 0 else 0.0)
+    SCAN_LAST_SUCCESS.labels(scanner=scanner).set(time.time())
+
+
+def render() -> str:
+    return generate_latest(REGISTRY).decode("utf-8")
+
+
+def write_textfile(path: t.Optional[str] = None) -> t.Optional[str]:
+    """Atomically write the registry for node_exporter's textfile collector.
+
+    Defaults to `LEGEND_METRICS_TEXTFILE`; does nothing when neither is set.
+    """
+    path = path or os.getenv("LEGEND_METRICS_TEXTFILE")
+    if not path:
+        return None
+    write_to_textfile(path, REGISTRY)
+    return path
+
+
+class MetricsMiddleware:
+    """Pure-ASGI request metrics labelled by the matched route template.
+
+    The route is resolved after the app ran, from the `endpoint` Starlette's
+    router leaves in the scope, so path parameters never become label values;
+    unmatched paths are reported as "unmatched".
+    """
+
+    def __init__(
+        self, app: ASGIApp, routes_app: t.Any = None, skip: t.Sequence[str] = ("/metrics",)
+    ) -> None:
+        self.app = app
+        self.routes_app = routes_app
+        self.skip = set(skip)
+        self._templates: t.Optional[t.Dict[t.Any, str]] = None
+
+    def _route_template(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._templates is None:
+            routes = getattr(self.routes_app or scope.get("app"), "routes", [])
+            self._templates = {}
+            for route in routes:
+                target = getattr(route, "endpoint", None) or getattr(route, "app", None)
+                if target is not None:
+                    self._templates.setdefault(target, getattr(route, "path", "unknown"))
+        return self._templates.get(endpoint, "unknown")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("path") in self.skip:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            method = scope.get("method", "GET")
+            route = self._route_template(scope)
+            HTTP_REQUESTS.labels(method=method, route=route, status=str(status)).inc()
+            HTTP_DURATION.labels(method=method, route=route).observe(time.perf_counter() - start)
+            HTTP_RESPONSE_SIZE.labels(method=method, route=route).observe(size)
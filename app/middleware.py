@@ -0,0 +1,88 @@
+"""
+Pure-ASGI request-id and security-header middleware for Legend AI API.
+
+Both only touch the `http.response.start` message, so they add no tasks or
+body streams per request, unlike `BaseHTTPMiddleware`. Streaming responses
+pass through unchanged.
+
+`RequestIdMiddleware` echoes the client's `x-request-id` (or a fresh UUID4)
+on the response and exposes it to handlers as `request.state.request_id`.
+
+`SecureHeadersMiddleware` adds a fixed set of headers, encoded once at
+startup, to every response that does not already set them. An endpoint's
+own `Cache-Control` therefore wins over the `no-store` default.
+
+See scripts/bench_middleware.py for per-request overhead.
+"""
+
+import typing as t
+import uuid
+
+Scope = t.MutableMapping[str, t.Any]
+Message = t.MutableMapping[str, t.Any]
+Receive = t.Callable[[], t.Awaitable[Message]]
+Send = t.Callable[[Message], t.Awaitable[None]]
+ASGIApp = t.Callable[[Scope, Receive, Send], t.Awaitable[None]]
+
+_REQUEST_ID = b"x-request-id"
+
+
+class RequestIdMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = b""
+        for name, value in scope.get("headers", ()):
+            if name == _REQUEST_ID:
+                rid = value
+                break
+        rid = rid or str(uuid.uuid4()).encode("latin-1")
+        scope.setdefault("state", {})["request_id"] = rid.decode("latin-1")
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [h for h in message.get("headers", ()) if h[0] != _REQUEST_ID]
+                headers.append((_REQUEST_ID, rid))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def default_security_headers() -> t.Dict[str, str]:
+    """Headers from the optional `secure` package's defaults; empty if it is missing."""
+    try:
+        from secure import Secure  # type: ignore
+    except Exception:  # pragma: no cover - optional dependency
+        return {}
+    return dict(Secure().headers())
+
+
+class SecureHeadersMiddleware:
+    def __init__(self, app: ASGIApp, headers: t.Optional[t.Mapping[str, str]] = None) -> None:
+        self.app = app
+        headers = default_security_headers() if headers is None else headers
+        self.headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers.items()
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.headers:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                present = {name.lower() for name, _ in headers}
+                headers.extend(h for h in self.headers if h[0] not in present)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,17 +1,20 @@
 """
 Observability helpers for Legend AI API.
 
-Provides JSON logging setup and optional Sentry integration. Import and call
+Provides JSON logging setup and optional Sentry integration. Records encode
+with orjson when it is installed; a dict passed as `extra={"fields": ...}` is
+merged into the record as structured fields. Import and call
 `setup_json_logging()` early in process startup, and wrap FastAPI app with
 `setup_sentry(app)` to enable Sentry when SENTRY_DSN is provided.
 """
 
+import logging
 import os
 import time
-import json
-import logging
 from typing import Any, Dict
 
+from .responses import dumps
+
 
 def setup_json_logging() -> None:
     """Configure root logger to emit JSON-formatted logs to stdout."""
@@ -24,9 +27,12 @@ def setup_json_logging() -> None:
                 "logger": record.name,
                 "msg": record.getMessage(),
             }
+            fields = getattr(record, "fields", None)
+            if fields:
+                payload.update(fields)
             if record.exc_info:
                 payload["exc_info"] = self.formatException(record.exc_info)
-            return json.dumps(payload)
+            return dumps(payload).decode("utf-8")
 
     handler = logging.StreamHandler()
     handler.setFormatter(JsonFormatter())
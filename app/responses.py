@@ -0,0 +1,85 @@
+"""
+Fast JSON responses for hot read endpoints.
+
+`dumps` encodes with orjson when it is installed and falls back to the
+standard library otherwise; both write NaN and Infinity as `null`.
+`JSONBytesResponse` sends an already-encoded body untouched, which is how
+cached payloads are served.
+
+Endpoints that return these directly bypass FastAPI's `response_model`
+re-validation and `jsonable_encoder` pass. The model still documents the shape;
+payloads are validated once, when they are built and written to the cache.
+"""
+
+import json
+import math
+import typing as t
+
+from starlette.responses import Response
+
+try:  # pragma: no cover - optional speedup
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+def _default(obj: t.Any) -> t.Any:
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    if hasattr(obj, "item"):  # numpy scalars
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj: t.Any) -> t.Any:
+    """Replace NaN/Infinity with None, as orjson does."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def _stdlib_dumps(content: t.Any, default: t.Callable[[t.Any], t.Any]) -> str:
+    return json.dumps(
+        content, default=default, ensure_ascii=False, separators=(",", ":"), allow_nan=False
+    )
+
+
+def dumps(content: t.Any) -> bytes:
+    """Encode `content` as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    try:
+        encoded = _stdlib_dumps(content, _default)
+    except ValueError:
+        # Non-finite floats are rare; only then pay for the cleaning pass
+        encoded = _stdlib_dumps(_finite(content), lambda obj: _finite(_default(obj)))
+    return encoded.encode("utf-8")
+
+
+class JSONBytesResponse(Response):
+    """Response for a body that is already encoded JSON."""
+
+    media_type = "application/json"
+
+
+Rows = t.List[t.Dict[str, t.Any]]
+
+
+def project_rows(rows: Rows, fields: t.Sequence[str]) -> Rows:
+    """Keep only `fields` (in that order) from each row."""
+    return [{f: row.get(f) for f in fields} for row in rows]
+
+
+def to_columns(rows: Rows, fields: t.Sequence[str]) -> t.Dict[str, t.Any]:
+    """Struct-of-arrays form: one list per field, keys sent once instead of per row."""
+    return {
+        "fields": list(fields),
+        "count": len(rows),
+        "columns": {f: [row.get(f) for row in rows] for f in fields},
+    }
@@ -0,0 +1,168 @@
+"""
+Background scan jobs for the admin API.
+
+`POST /admin/run-scan` creates a `ScanJob` and returns its id immediately.
+Jobs run one at a time on a single background thread, and at most
+`MAX_QUEUED` more may wait behind it. The request thread is never held
+by a scan, so universe-wide scans do not hit request timeouts.
+
+A job records its progress as it goes: counters, one result line per ticker,
+and the patterns found so far. `GET /admin/scan-jobs/{id}` returns a
+snapshot. With `follow=true` it streams NDJSON progress events until the job
+finishes.
+
+Detections are upserted in batches of `PERSIST_EVERY`, in one transaction
+per batch and with one `as_of` per job. The previous code used one
+transaction per detection.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+MAX_QUEUED = 5
+KEEP_JOBS = 50
+PERSIST_EVERY = 25
+
+Record = Dict[str, Any]
+# (ticker, as_of) -> (result line, pattern record or None); raises on failure
+ScanOne = Callable[[str, datetime], Tuple[str, Optional[Record]]]
+Persist = Callable[[List[Record]], None]
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class ScanJob:
+    def __init__(self, tickers: List[str]) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.tickers = tickers
+        self.status = "queued"
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.processed = 0
+        self.failed = 0
+        self.results: List[str] = []
+        self.patterns: List[Record] = []
+        self.error: Optional[str] = None
+        self.version = 0  # bumped on every change, for followers
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def snapshot(self, results_from: int = 0) -> Dict[str, Any]:
+        """Progress, plus result lines from index `results_from` on."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": len(self.tickers),
+            "processed": self.processed,
+            "detected": len(self.patterns),
+            "failed": self.failed,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "results": self.results[results_from:],
+            "patterns": list(self.patterns),
+        }
+
+
+class ScanJobManager:
+    """Runs `ScanJob`s on one background thread and keeps the last KEEP_JOBS."""
+
+    def __init__(self, scan_one: ScanOne, persist: Persist, persist_every: int = PERSIST_EVERY):
+        self._scan_one = scan_one
+        self._persist = persist
+        self._persist_every = persist_every
+        self._jobs: OrderedDict[str, ScanJob] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, tickers: List[str]) -> ScanJob:
+        with self._lock:
+            waiting = sum(1 for job in self._jobs.values() if job.status == "queued")
+            if waiting >= MAX_QUEUED:
+                raise QueueFull(f"{waiting} scan jobs already queued")
+            job = ScanJob(tickers)
+            self._jobs[job.id] = job
+            while len(self._jobs) > KEEP_JOBS:
+                oldest = next(iter(self._jobs.values()))
+                if not oldest.finished:
+                    break
+                self._jobs.popitem(last=False)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-job")
+            self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[ScanJob]:
+        return list(self._jobs.values())
+
+    def _run(self, job: ScanJob) -> None:
+        job.status, job.started_at = "running", datetime.utcnow()
+        job.version += 1
+        as_of = job.started_at.replace(microsecond=0)
+        pending: List[Record] = []
+        status, error = "done", None
+        try:
+            for ticker in job.tickers:
+                try:
+                    line, record = self._scan_one(ticker, as_of)
+                except Exception as exc:
+                    line, record = f"⚠ {ticker}: {str(exc)[:50]}", None
+                    job.failed += 1
+                if record is not None:
+                    pending.append(record)
+                    job.patterns.append(
+                        {k: record.get(k) for k in ("ticker", "confidence", "price")}
+                    )
+                if len(pending) >= self._persist_every:
+                    self._persist(pending)
+                    pending = []
+                job.results.append(line)
+                job.processed += 1
+                job.version += 1
+            if pending:
+                self._persist(pending)
+        except Exception as exc:
+            status, error = "failed", str(exc)[:500]
+        job.finished_at, job.error = datetime.utcnow(), error
+        # Status last: followers treat a finished status as the final event
+        job.status = status
+        job.version += 1
+
+    def follow(self, job: ScanJob, poll: float = 0.5) -> Iterator[Dict[str, Any]]:
+        """Progress events until `job` finishes; each carries only new result lines.
+
+        The last event (status done or failed) also lists every pattern found.
+        """
+        seen, sent = -1, 0
+        while True:
+            version = job.version
+            if version != seen:
+                seen = version
+                event = job.snapshot(results_from=sent)
+                sent += len(event["results"])
+                last = job.finished and job.version == version
+                if not last:
+                    event.pop("patterns")
+                yield event
+                if last:
+                    return
+            time.sleep(poll)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,119 @@
+"""
+Per-request phase timing for Legend AI API.
+
+`ServerTimingMiddleware` (pure ASGI) opens a phase table for each request.
+Handlers wrap their work in `phase("db")`, `phase("cache")`,
+`phase("enrich")` or `phase("serialize")`. When the response starts, the table
+is sent as a `Server-Timing` header (`db;dur=3.1, ..., total;dur=5.2`, all in
+milliseconds), so browser devtools and curl show where a request spent its
+time.
+
+A sample of requests (LEGEND_TIMING_SAMPLE_RATE, default 0.01) and every
+request slower than LEGEND_TIMING_SLOW_MS (default 1000) are also logged to
+the `legend.timing` logger with the phases as structured fields. That is
+enough to see which phase dominates p99 without logging every request.
+
+The table lives in a context variable. It is shared with the threadpool, so
+`phase()` works in sync helpers run through `run_in_threadpool`. Outside a
+request it does nothing.
+"""
+
+import contextvars
+import logging
+import os
+import random
+import time
+import typing as t
+from contextlib import contextmanager
+
+Scope = t.MutableMapping[str, t.Any]
+Message = t.MutableMapping[str, t.Any]
+Receive = t.Callable[[], t.Awaitable[Message]]
+Send = t.Callable[[Message], t.Awaitable[None]]
+ASGIApp = t.Callable[[Scope, Receive, Send], t.Awaitable[None]]
+
+PHASES = ("db", "cache", "enrich", "serialize")
+
+logger = logging.getLogger("legend.timing")
+
+_phases: "contextvars.ContextVar[t.Optional[t.Dict[str, float]]]" = contextvars.ContextVar(
+    "legend_phases", default=None
+)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add `seconds` to phase `name` of the current request, if any."""
+    table = _phases.get()
+    if table is not None:
+        table[name] = table.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str) -> t.Iterator[None]:
+    """Time the enclosed block as phase `name`; repeated blocks accumulate."""
+    if _phases.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start)
+
+
+def server_timing(phases: t.Dict[str, float], total: float) -> str:
+    """Format phases (seconds) as a Server-Timing header value in milliseconds."""
+    order = sorted(phases, key=lambda n: PHASES.index(n) if n in PHASES else len(PHASES))
+    parts = [f"{name};dur={phases[name] * 1000:.1f}" for name in order]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: t.Optional[float] = None,
+        slow_ms: t.Optional[float] = None,
+    ) -> None:
+        self.app = app
+        self.sample_rate = (
+            float(os.getenv("LEGEND_TIMING_SAMPLE_RATE", "0.01"))
+            if sample_rate is None else sample_rate
+        )
+        self.slow_ms = (
+            float(os.getenv("LEGEND_TIMING_SLOW_MS", "1000")) if slow_ms is None else slow_ms
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        table: t.Dict[str, float] = {}
+        token = _phases.set(table)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                value = server_timing(table, time.perf_counter() - start).encode("latin-1")
+                message["headers"] = [*message.get("headers", []), (b"server-timing", value)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _phases.reset(token)
+            elapsed = time.perf_counter() - start
+            if elapsed * 1000 >= self.slow_ms or random.random() < self.sample_rate:
+                fields: t.Dict[str, t.Any] = {
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "status": status,
+                    "total_ms": round(elapsed * 1000, 2),
+                }
+                fields.update({f"{k}_ms": round(v * 1000, 2) for k, v in table.items()})
+                logger.info("request timing", extra={"fields": fields})
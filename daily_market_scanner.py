@@ -3,16 +3,26 @@ import time
 import math
 import json
 import traceback
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 import requests
 import pandas as pd
 from dotenv import load_dotenv
 import yfinance as yf
 
-from legend_ai_backend import SessionLocal, Stock, Pattern, ScanRun, ScanFailure, Base
-from vcp_ultimate_algorithm import scan_for_vcp, VCPSignal
+from app.metrics import (
+    RATE_LIMIT_WAIT_SECONDS, SCAN_SYMBOLS, record_scan, timed_fetch, write_textfile,
+)
+from legend_ai_backend import SessionLocal, Stock, Pattern, ScanRun, ScanFailure, Base, sync_patterns
+from scan_checkpoint import (
+    FAILED, RESUME_ATTEMPTS, load_progress, plan_resume, prune_progress, record_progress,
+    retry_with_backoff,
+)
+from scan_priority import near_miss_score, order_by_priority, write_near_misses
+from universe import get_universe, update_metadata
+from vcp_ultimate_algorithm import scan_for_vcp, StageStats, VCPDetector, VCPSignal
 
 
 load_dotenv()
@@ -21,6 +31,8 @@ load_dotenv()
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
 PROVIDER = (os.getenv("VCP_PROVIDER") or "yfinance").lower()
 DATA_DIR = os.path.join("data", "price_history")
+# Optional: write per-stage detector latencies and rejection reasons here after each scan
+STAGE_STATS_PATH = os.getenv("LEGEND_STAGE_STATS_PATH")
 
 
 def ensure_dirs():
@@ -32,53 +44,8 @@ def unix_ts(dt: datetime) -> int:
 
 
 def get_tickers() -> List[str]:
-    """Fetch S&P 500 and Nasdaq-100 tickers with multiple fallbacks."""
-    tickers: List[str] = []
-
-    # Primary: Wikipedia S&P 500
-    try:
-        sp500_tables = pd.read_html("https://en.wikipedia.org/wiki/List_of_S%26P_500_companies")
-        sp500 = sp500_tables[0]
-        if 'Symbol' in sp500.columns:
-            sp_symbols = sp500['Symbol'].astype(str).str.replace('.', '-', regex=False).tolist()
-            tickers.extend(sp_symbols)
-    except Exception as e:
-        print(f"SP500 fetch failed (Wikipedia): {e}")
-
-    # Primary: Wikipedia Nasdaq-100
-    try:
-        ndx_tables = pd.read_html("https://en.wikipedia.org/wiki/Nasdaq-100")
-        ndx = None
-        for t in ndx_tables:
-            cols = [str(c).lower() for c in t.columns]
-            if any('ticker' in c for c in cols) or any('symbol' in c for c in cols):
-                ndx = t
-                break
-        if ndx is not None:
-            col = 'Ticker' if 'Ticker' in ndx.columns else ('Symbol' if 'Symbol' in ndx.columns else ndx.columns[0])
-            ndx_symbols = ndx[col].astype(str).str.replace('.', '-', regex=False).tolist()
-            tickers.extend(ndx_symbols)
-    except Exception as e:
-        print(f"NDX fetch failed (Wikipedia): {e}")
-
-    # Fallback: DataHub S&P 500 constituents
-    if not tickers:
-        try:
-            sp_alt = pd.read_csv("https://datahub.io/core/s-and-p-500-companies/r/constituents.csv")
-            tickers.extend(sp_alt['Symbol'].astype(str).str.replace('.', '-', regex=False).tolist())
-        except Exception as e:
-            print(f"SP500 fetch failed (DataHub): {e}")
-
-    # Final fallback: curated major tickers
-    if not tickers:
-        tickers = [
-            'AAPL','MSFT','NVDA','AMZN','GOOGL','META','AVGO','TSLA','AMD','NFLX',
-            'SMCI','COST','PEP','ADBE','CSCO','CRM','LIN','TXN','QCOM','INTC',
-            'JPM','WMT','PG','XOM','UNH','V','MA','HD','MRK','ABBV'
-        ]
-
-    uniq = sorted({t.strip().upper() for t in tickers if t and t.strip()})
-    return uniq
+    """Symbols to scan, read from the local universe snapshot (refreshed weekly, see universe.py)."""
+    return get_universe()
 
 
 def _fetch_candles_finnhub(symbol: str, start: datetime, end: datetime) -> List[Dict]:
@@ -140,12 +107,41 @@ def _fetch_candles_yf(symbol: str, start: datetime, end: datetime) -> List[Dict]
 def fetch_candles(symbol: str, start: datetime, end: datetime) -> List[Dict]:
     if PROVIDER == 'finnhub':
         try:
-            return _fetch_candles_finnhub(symbol, start, end)
+            return timed_fetch("finnhub", _fetch_candles_finnhub, symbol, start, end)
         except Exception as e:
             print(f"Finnhub failed for {symbol} ({e}); falling back to yfinance")
-            return _fetch_candles_yf(symbol, start, end)
+            return timed_fetch("yfinance", _fetch_candles_yf, symbol, start, end)
     # default yfinance
-    return _fetch_candles_yf(symbol, start, end)
+    return timed_fetch("yfinance", _fetch_candles_yf, symbol, start, end)
+
+
+def load_history(symbol: str) -> List[Dict]:
+    path = os.path.join(DATA_DIR, f"{symbol}.json")
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r') as f:
+            return json.load(f) or []
+    except (OSError, ValueError):
+        return []
+
+
+def merge_history(existing: List[Dict], new: List[Dict], keep_from: datetime) -> List[Dict]:
+    """Merge candles by date (new rows win) and drop anything before `keep_from`."""
+    by_date = {c['date']: c for c in existing}
+    by_date.update({c['date']: c for c in new})
+    cutoff = keep_from.strftime('%Y-%m-%d')
+    return [by_date[d] for d in sorted(by_date) if d >= cutoff]
+
+
+ADV_WINDOW = 20
+
+
+def average_dollar_volume(candles: List[Dict], window: int = ADV_WINDOW) -> float:
+    recent = candles[-window:]
+    if not recent:
+        return 0.0
+    return sum(c['close'] * c['volume'] for c in recent) / len(recent)
 
 
 def save_history(symbol: str, candles: List[Dict]):
@@ -173,33 +169,175 @@ def data_fetcher(symbol: str) -> pd.DataFrame | None:
     return df[['Open', 'High', 'Low', 'Close', 'Volume']].sort_index()
 
 
-def upsert_stock(session, symbol: str, last_close: float):
-    symbol = symbol.upper()
-    stock = session.query(Stock).filter(Stock.symbol == symbol).first()
+STOCK_BATCH_SIZE = 500
+
+
+def _chunks(items: List[str], size: int = STOCK_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def load_stock_map(session, symbols: List[str]) -> Dict[str, Stock]:
+    """Load the Stock rows for `symbols` with one IN query per batch."""
+    stock_map: Dict[str, Stock] = {}
+    for batch in _chunks(sorted({s.upper() for s in symbols})):
+        for stock in session.query(Stock).filter(Stock.symbol.in_(batch)):
+            stock_map[stock.symbol] = stock
+    return stock_map
+
+
+def upsert_stocks(session, last_closes: Dict[str, float]) -> None:
+    """Bulk upsert latest closes: one lookup per batch, then bulk insert/update mappings."""
+    if not last_closes:
+        return
+    closes = {symbol.upper(): close for symbol, close in last_closes.items()}
     now = datetime.utcnow()
-    if not stock:
-        stock = Stock(symbol=symbol, name=symbol, sector='Unknown', industry='Unknown', current_price=last_close,
-                      market_cap='', rs_rating=0, created_at=now, updated_at=now)
-        session.add(stock)
-    else:
-        stock.current_price = last_close
-        stock.updated_at = now
+    for batch in _chunks(sorted(closes)):
+        existing = {
+            row.symbol for row in session.query(Stock.symbol).filter(Stock.symbol.in_(batch))
+        }
+        updates = [
+            {"symbol": symbol, "current_price": closes[symbol], "updated_at": now}
+            for symbol in batch if symbol in existing
+        ]
+        inserts = [
+            {"symbol": symbol, "name": symbol, "sector": 'Unknown', "industry": 'Unknown',
+             "current_price": closes[symbol], "market_cap": '', "rs_rating": 0,
+             "created_at": now, "updated_at": now}
+            for symbol in batch if symbol not in existing
+        ]
+        if updates:
+            session.bulk_update_mappings(Stock, updates)
+        if inserts:
+            session.bulk_insert_mappings(Stock, inserts)
 
 
-def run_scan():
+def upsert_stock(session, symbol: str, last_close: float):
+    upsert_stocks(session, {symbol: last_close})
+
+
+def pattern_row(sig: VCPSignal, stock: Stock) -> Dict:
+    """Build the `sync_patterns` row for a detected signal."""
+    confidence = (sig.confidence_score or 0.0) / 100.0
+    pivot = sig.pivot_price or (stock.current_price or 0.0) * 1.05
+    stop = None
+    days = 0
+    if sig.contractions:
+        last_c = sig.contractions[-1]
+        stop = last_c.low_price
+        first_date = sig.contractions[0].start_date
+        last_date = last_c.end_date or sig.signal_date
+        if first_date and last_date:
+            days = max(0, (last_date - first_date).days)
+    if stop is None and stock.current_price:
+        stop = stock.current_price * 0.92
+    return {
+        "symbol": sig.symbol,
+        "confidence": confidence,
+        "pivot_price": float(pivot),
+        "stop_loss": float(stop or 0.0),
+        "days_in_pattern": int(days),
+        "pattern_data": {
+            "symbol": sig.symbol,
+            "confidence_score": sig.confidence_score,
+            "pivot_price": sig.pivot_price,
+        },
+        "status": "active",
+    }
+
+
+DAILY_SCAN_NOTES = "daily scan"
+STREAM_BATCH = 25  # symbols fetched between pattern syncs
+
+# Production-quality VCP filters
+VCP_SCAN_PARAMS = dict(
+    min_contractions=2,
+    max_contractions=6,
+    max_base_depth=0.35,
+    final_contraction_max=0.10,
+    min_price=30.0,
+    min_volume=1_000_000,
+    check_trend_template=True,
+)
+
+
+def detect_symbols(
+    session, symbols: List[str], detector: VCPDetector
+) -> Tuple[List[Dict], Dict[str, float]]:
+    """Run the detector on stored histories: `sync_patterns` rows plus near-miss scores."""
+    signals: List[VCPSignal] = []
+    scores: Dict[str, float] = {}
+    for symbol in symbols:
+        try:
+            df = data_fetcher(symbol)
+            if df is None:
+                continue
+            sig = detector.detect_vcp(df, symbol=symbol)
+        except Exception as e:
+            print(f"Error scanning {symbol}: {e}")
+            continue
+        scores[symbol] = near_miss_score(sig.detected, sig.trend_strength)
+        if sig.detected:
+            signals.append(sig)
+    stock_map = load_stock_map(session, [sig.symbol for sig in signals])
+    rows = [pattern_row(sig, stock_map[sig.symbol]) for sig in signals if sig.symbol in stock_map]
+    return rows, scores
+
+
+def resumable_run(session) -> ScanRun | None:
+    """The latest daily scan if it never finished cleanly (crashed, killed or failed)."""
+    run = (
+        session.query(ScanRun)
+        .filter(ScanRun.notes.like(f"{DAILY_SCAN_NOTES}%"))
+        .order_by(ScanRun.id.desc())
+        .first()
+    )
+    if run is None or (run.finished_at is not None and run.notes == DAILY_SCAN_NOTES):
+        return None
+    return run
+
+
+def run_scan(resume: bool = False):
+    """Fetch histories for the universe, detect VCPs and sync patterns.
+
+    Symbols are scanned in priority order (scan_priority.py) in batches of
+    STREAM_BATCH; each batch's patterns are synced and committed as soon as
+    it is fetched, so the strongest candidates are visible early in the run.
+
+    Each symbol's fetch is checkpointed in `scan_progress`. With `resume=True`
+    the latest unfinished daily scan is continued: symbols it already fetched
+    are skipped and symbols that failed are retried with backoff.
+    """
     if PROVIDER == 'finnhub' and not FINNHUB_API_KEY:
         raise RuntimeError("FINNHUB_API_KEY not set in environment")
 
     session = SessionLocal()
-    run = ScanRun(started_at=datetime.utcnow(), total_tickers=0, success_count=0, failed_count=0, notes="daily scan")
-    session.add(run)
+    run = resumable_run(session) if resume else None
+    recorded: Dict[str, str] = {}
+    if run is not None:
+        recorded = load_progress(session, f"daily:{run.id}")
+        run.finished_at = None
+        run.notes = DAILY_SCAN_NOTES
+        print(f"Resuming daily scan {run.id}: {len(recorded)} symbols already recorded")
+    else:
+        if resume:
+            print("No interrupted daily scan to resume; starting a new one")
+        prune_progress(session)
+        run = ScanRun(started_at=datetime.utcnow(), total_tickers=0, success_count=0, failed_count=0, notes=DAILY_SCAN_NOTES)
+        session.add(run)
     session.commit()
     session.refresh(run)
+    run_key = f"daily:{run.id}"
 
+    started = time.perf_counter()
     try:
         tickers = get_tickers()
         run.total_tickers = len(tickers)
         session.commit()
+        done, retry, _ = plan_resume(tickers, recorded)
+        done = set(done)
+        if recorded:
+            print(f"Skipping {len(done)} completed symbols, retrying {len(retry)} failed")
 
         start = datetime.utcnow() - timedelta(days=180)
         end = datetime.utcnow()
@@ -209,97 +347,126 @@ def run_scan():
 
         failures = 0
         successes = 0
-
-        for idx, symbol in enumerate(tickers, start=1):
-            try:
-                # Rate limiting: keep under 60/min
-                now_ts = time.time()
-                if now_ts - minute_window_start >= 60:
-                    minute_window_start = now_ts
-                    requests_this_minute = 0
-                if requests_this_minute >= 58:
-                    sleep_for = 60 - (now_ts - minute_window_start)
-                    if sleep_for > 0:
-                        time.sleep(sleep_for)
-                    minute_window_start = time.time()
-                    requests_this_minute = 0
-
-                candles = fetch_candles(symbol, start, end)
-                requests_this_minute += 1
-
-                if not candles:
-                    raise RuntimeError("No candles returned")
-                save_history(symbol, candles)
-                upsert_stock(session, symbol, candles[-1]['close'])
-                successes += 1
-            except Exception as exc:
-                failures += 1
-                session.add(ScanFailure(run_id=run.id, symbol=symbol, error_message=str(exc)))
-            finally:
-                # Gentle spacing between requests
-                time.sleep(0.6)
-
-        # Run VCP detection using stored histories with production-quality filters
-        symbols = [s.symbol for s in session.query(Stock.symbol).all()]
-        signals: List[VCPSignal] = scan_for_vcp(
-            symbols, data_fetcher=data_fetcher,
-            min_contractions=2,
-            max_contractions=6,
-            max_base_depth=0.35,
-            final_contraction_max=0.10,
-            min_price=30.0,
-            min_volume=1_000_000,
-            check_trend_template=True,
-        )
-
-        # Clear and write patterns
-        session.query(Pattern).filter(Pattern.pattern_type == "VCP").delete()
-        for sig in signals:
-            stock = session.query(Stock).filter(Stock.symbol == sig.symbol).first()
-            if not stock:
-                continue
-            confidence = (sig.confidence_score or 0.0) / 100.0
-            pivot = sig.pivot_price or (stock.current_price or 0.0) * 1.05
-            stop = None
-            days = 0
-            if sig.contractions:
-                last_c = sig.contractions[-1]
-                stop = last_c.low_price
-                first_date = sig.contractions[0].start_date
-                last_date = last_c.end_date or sig.signal_date
-                if first_date and last_date:
-                    days = max(0, (last_date - first_date).days)
-            if stop is None and stock.current_price:
-                stop = stock.current_price * 0.92
-            session.add(Pattern(
-                symbol=sig.symbol,
-                pattern_type="VCP",
-                confidence=confidence,
-                pivot_price=float(pivot),
-                stop_loss=float(stop or 0.0),
-                days_in_pattern=int(days),
-                pattern_data={
-                    "symbol": sig.symbol,
-                    "confidence_score": sig.confidence_score,
-                    "pivot_price": sig.pivot_price,
-                },
-                detected_at=datetime.utcnow(),
-                status="active",
-            ))
+        backfills = 0
+        last_closes: Dict[str, float] = {}
+        adv: Dict[str, Dict[str, str]] = {}
+        today = end.strftime('%Y-%m-%d')
+
+        active = {
+            row.symbol for row in session.query(Pattern.symbol).filter(Pattern.pattern_type == "VCP")
+        }
+        ordered = order_by_priority(tickers, load_history, active=active)
+        stage_stats = StageStats() if STAGE_STATS_PATH else None
+        detector = VCPDetector(**VCP_SCAN_PARAMS, stage_sink=stage_stats)
+        changes: Counter = Counter()
+        all_rows: List[Dict] = []
+        near_misses: Dict[str, float] = {}
+
+        def publish(symbols: List[str]) -> None:
+            """Upsert closes, detect and sync patterns for `symbols`, then commit."""
+            upsert_stocks(session, {s: last_closes[s] for s in symbols if s in last_closes})
+            rows, scores = detect_symbols(session, symbols, detector)
+            all_rows.extend(rows)
+            near_misses.update(scores)
+            changes.update(sync_patterns(session, rows, pattern_type="VCP", scope=symbols))
+            run.success_count = successes
+            run.failed_count = failures
+            session.commit()
+
+        for batch in _chunks(ordered, STREAM_BATCH):
+            for symbol in batch:
+                # Symbols with stored history only fetch the bars since their last
+                # stored date; only new listings pay for the full backfill.
+                existing = load_history(symbol)
+                if symbol in done or (existing and existing[-1]['date'] >= today):
+                    if existing:
+                        last_closes[symbol] = existing[-1]['close']
+                    if symbol not in done:
+                        record_progress(session, run_key, symbol, ok=True)
+                        session.commit()
+                    successes += 1
+                    SCAN_SYMBOLS.labels(scanner="daily", outcome="skipped").inc()
+                    continue
+                fetch_start = start
+                if existing:
+                    fetch_start = max(start, datetime.strptime(existing[-1]['date'], '%Y-%m-%d'))
+                else:
+                    backfills += 1
+                try:
+                    # Rate limiting: keep under 60/min
+                    now_ts = time.time()
+                    if now_ts - minute_window_start >= 60:
+                        minute_window_start = now_ts
+                        requests_this_minute = 0
+                    if requests_this_minute >= 58:
+                        sleep_for = 60 - (now_ts - minute_window_start)
+                        if sleep_for > 0:
+                            RATE_LIMIT_WAIT_SECONDS.labels(provider=PROVIDER).inc(sleep_for)
+                            time.sleep(sleep_for)
+                        minute_window_start = time.time()
+                        requests_this_minute = 0
+
+                    attempts = RESUME_ATTEMPTS if recorded.get(symbol) == FAILED else 1
+                    candles = retry_with_backoff(
+                        fetch_candles, symbol, fetch_start, end, attempts=attempts
+                    )
+                    requests_this_minute += 1
+
+                    if not candles:
+                        raise RuntimeError("No candles returned")
+                    candles = merge_history(existing, candles, start)
+                    save_history(symbol, candles)
+                    last_closes[symbol] = candles[-1]['close']
+                    adv[symbol] = {"adv": f"{average_dollar_volume(candles):.0f}"}
+                    successes += 1
+                    SCAN_SYMBOLS.labels(scanner="daily", outcome="ok").inc()
+                    record_progress(session, run_key, symbol, ok=True)
+                except Exception as exc:
+                    failures += 1
+                    SCAN_SYMBOLS.labels(scanner="daily", outcome="failed").inc()
+                    session.add(ScanFailure(run_id=run.id, symbol=symbol, error_message=str(exc)))
+                    record_progress(session, run_key, symbol, ok=False, error=str(exc))
+                finally:
+                    # Checkpoint every symbol so an interrupted run can resume here
+                    session.commit()
+                    # Gentle spacing between requests
+                    RATE_LIMIT_WAIT_SECONDS.labels(provider=PROVIDER).inc(0.6)
+                    time.sleep(0.6)
+
+            publish(batch)
+
+        update_metadata(adv)
+        print(f"History: {backfills} full backfills, {len(tickers) - backfills} incremental")
+
+        # Stocks that left the universe are still re-evaluated from stored history
+        scanned = set(tickers)
+        leftover = [s.symbol for s in session.query(Stock.symbol) if s.symbol not in scanned]
+        for batch in _chunks(leftover, STREAM_BATCH):
+            publish(batch)
+        write_near_misses(near_misses)
+        if stage_stats is not None:
+            stage_stats.write_json(STAGE_STATS_PATH)
+            print(stage_stats.summary())
+
+        # Final pass over the full set retires patterns no batch covered
+        changes.update(sync_patterns(session, all_rows, pattern_type="VCP"))
 
         run.success_count = successes
         run.failed_count = failures
         run.finished_at = datetime.utcnow()
         session.commit()
-        print(f"Scan completed: {successes} succeeded, {failures} failed, patterns: {len(signals)}")
+        record_scan("daily", len(tickers), time.perf_counter() - started)
+        print(f"Scan completed: {successes} succeeded, {failures} failed, patterns: {len(all_rows)} {dict(changes)}")
     except Exception as exc:
+        session.rollback()
         run.finished_at = datetime.utcnow()
-        run.notes = f"failed: {exc}"
+        run.notes = f"{DAILY_SCAN_NOTES} failed: {exc}"[:500]
         session.commit()
         traceback.print_exc()
         raise
     finally:
         session.close()
+        write_textfile()
 
 
 def test_finnhub_connection(sample: List[str] | None = None):
@@ -328,47 +495,38 @@ def run_scan_for_symbols(symbols: List[str]):
         end = datetime.utcnow()
         successes = 0
         failures = 0
+        last_closes: Dict[str, float] = {}
         for symbol in symbols:
             try:
                 candles = fetch_candles(symbol, start, end)
                 save_history(symbol, candles)
-                upsert_stock(session, symbol, candles[-1]['close'])
+                last_closes[symbol] = candles[-1]['close']
                 successes += 1
                 time.sleep(0.6)
             except Exception as e:
                 failures += 1
                 session.add(ScanFailure(run_id=run.id, symbol=symbol, error_message=str(e)))
-        sigs: List[VCPSignal] = scan_for_vcp(
-            symbols,
-            data_fetcher=data_fetcher,
-            min_contractions=2,
-            max_contractions=6,
-            max_base_depth=0.35,
-            final_contraction_max=0.10,
-            min_price=30.0,
-            min_volume=1_000_000,
-            check_trend_template=True,
-        )
-        session.query(Pattern).filter(Pattern.pattern_type == "VCP").delete()
+        upsert_stocks(session, last_closes)
+        sigs: List[VCPSignal] = scan_for_vcp(symbols, data_fetcher=data_fetcher, **VCP_SCAN_PARAMS)
+        stock_map = load_stock_map(session, [sig.symbol for sig in sigs])
+        rows = []
         for sig in sigs:
-            stock = session.query(Stock).filter(Stock.symbol == sig.symbol).first()
+            stock = stock_map.get(sig.symbol)
             if not stock:
                 continue
-            confidence = (sig.confidence_score or 0.0) / 100.0
-            pivot = sig.pivot_price or (stock.current_price or 0.0) * 1.05
-            stop = (sig.contractions[-1].low_price if sig.contractions else (stock.current_price or 0.0) * 0.92)
-            session.add(Pattern(symbol=sig.symbol, pattern_type="VCP", confidence=confidence, pivot_price=float(pivot),
-                                stop_loss=float(stop or 0.0), days_in_pattern=0, pattern_data={"symbol": sig.symbol},
-                                detected_at=datetime.utcnow(), status="active"))
+            rows.append(pattern_row(sig, stock))
+        changes = sync_patterns(session, rows, pattern_type="VCP", scope=symbols)
         run.success_count = successes
         run.failed_count = failures
         run.finished_at = datetime.utcnow()
         session.commit()
-        print(f"Subset scan completed: {successes} succeeded, {failures} failed, patterns: {len(sigs)}")
+        print(f"Subset scan completed: {successes} succeeded, {failures} failed, patterns: {len(sigs)} {changes}")
     finally:
         session.close()
 
 
 if __name__ == "__main__":
-    run_scan()
+    import sys
+
+    run_scan(resume="--resume" in sys.argv[1:])
 
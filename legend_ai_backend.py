@@ -1,20 +1,31 @@
 # Legend AI Backend - FastAPI Implementation
 
-from fastapi import FastAPI, WebSocket, HTTPException, Depends
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Depends, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy import (
+    create_engine, Column, Integer, String, Float, DateTime, JSON, Index, and_, func, or_,
+    literal_column, text,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional, TYPE_CHECKING
 import os
 import asyncio
+import contextlib
+import logging
+import threading
 import json
-import redis
+import base64
 from datetime import datetime, timedelta
-import pandas as pd
-import numpy as np
-from vcp_ultimate_algorithm import scan_for_vcp, VCPSignal
+from market_hub import MarketDataHub, create_feed
+from app.responses import project_rows, to_columns
+
+# pandas, numpy, redis and the detector are imported on first use so that
+# importing this module (and serving /healthz) stays cheap on cold start.
+if TYPE_CHECKING:
+    import pandas as pd
+    from vcp_ultimate_algorithm import VCPSignal
 
 # Initialize FastAPI app
 app = FastAPI(title="Legend AI Backend", version="1.0.0")
@@ -44,7 +55,7 @@ engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_SessionFactory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 class InMemoryCache:
@@ -72,6 +83,8 @@ class InMemoryCache:
 
 
 def create_cache_client():
+    import redis
+
     redis_url = os.getenv("REDIS_URL")
     redis_host = os.getenv("REDIS_HOST", "localhost")
     redis_port = int(os.getenv("REDIS_PORT", "6379"))
@@ -89,8 +102,27 @@ def create_cache_client():
         return InMemoryCache()
 
 
+class LazyCacheClient:
+    '''Defers connecting (and pinging) Redis until the cache is first used.'''
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _resolve(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+
 # Redis setup for caching
-redis_client = create_cache_client()
+redis_client = LazyCacheClient(create_cache_client)
 
 # Database Models
 class Stock(Base):
@@ -98,7 +130,7 @@ class Stock(Base):
 
     symbol = Column(String(10), primary_key=True)
     name = Column(String(255))
-    sector = Column(String(100))
+    sector = Column(String(100), index=True)
     industry = Column(String(100))
     market_cap = Column(String(20))
     current_price = Column(Float)
@@ -120,6 +152,12 @@ class Pattern(Base):
     detected_at = Column(DateTime, default=datetime.utcnow)
     status = Column(String(20), default="active")
 
+    # Serves /api/scans/results: WHERE status = 'active'
+    # ORDER BY coalesce(confidence, 0) DESC, id -- the query must use the same expression
+    __table_args__ = (
+        Index("ix_patterns_status_rank", "status", text("coalesce(confidence, 0) DESC"), "id"),
+    )
+
 class Portfolio(Base):
     __tablename__ = "portfolio"
 
@@ -154,8 +192,33 @@ class ScanFailure(Base):
     error_message = Column(String(500))
     occurred_at = Column(DateTime, default=datetime.utcnow)
 
-# Auto-create tables
-Base.metadata.create_all(bind=engine)
+class ScanProgress(Base):
+    '''Per-symbol checkpoint of a scan run, for resuming interrupted scans (scan_checkpoint.py).'''
+    __tablename__ = "scan_progress"
+
+    run_key = Column(String(64), primary_key=True)
+    symbol = Column(String(16), primary_key=True)
+    status = Column(String(16), nullable=False)  # done | failed
+    attempts = Column(Integer, default=0)
+    error = Column(String(500), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+# Auto-create tables once per process, on first session rather than at import
+_db_initialized = False
+_db_init_lock = threading.Lock()
+
+def init_db():
+    global _db_initialized
+    if _db_initialized:
+        return
+    with _db_init_lock:
+        if not _db_initialized:
+            Base.metadata.create_all(bind=engine)
+            _db_initialized = True
+
+def SessionLocal() -> Session:
+    init_db()
+    return _SessionFactory()
 
 # Pydantic Models
 class PatternResponse(BaseModel):
@@ -196,6 +259,79 @@ def get_db():
     finally:
         db.close()
 
+# Pattern persistence
+
+_SYNCED_PATTERN_FIELDS = (
+    "confidence", "pivot_price", "stop_loss", "days_in_pattern", "pattern_data", "status",
+)
+
+def sync_patterns(
+    db: Session,
+    rows: List[dict],
+    pattern_type: str = "VCP",
+    retire_missing: bool = True,
+    scope: Optional[List[str]] = None,
+) -> dict:
+    '''Diff freshly detected pattern rows against the table and apply the changes in bulk.
+
+    Rows are keyed by symbol. New symbols are inserted, changed rows are updated
+    in place (keeping their original detected_at) and, when retire_missing is
+    set, symbols that were not detected this time are deleted. `scope` limits
+    retirement to the symbols that were actually scanned. Nothing is
+    committed here: the caller owns the transaction, so readers see either the
+    previous set or the new one, never an empty table.
+    '''
+    incoming = {row["symbol"]: row for row in rows}
+
+    current = {}
+    stale_ids = []
+    columns = [getattr(Pattern, f) for f in _SYNCED_PATTERN_FIELDS]
+    existing = (
+        db.query(Pattern.id, Pattern.symbol, *columns)
+        .filter(Pattern.pattern_type == pattern_type)
+        .order_by(Pattern.id.desc())
+    )
+    for row in existing:
+        if row.symbol in current:
+            # Older duplicates left behind by the previous delete/insert refresh
+            stale_ids.append(row.id)
+        else:
+            current[row.symbol] = row
+
+    now = datetime.utcnow()
+    inserts = []
+    updates = []
+    for symbol, row in incoming.items():
+        values = {f: row.get(f) for f in _SYNCED_PATTERN_FIELDS}
+        values["status"] = row.get("status") or "active"
+        previous = current.get(symbol)
+        if previous is None:
+            inserts.append({
+                "symbol": symbol,
+                "pattern_type": pattern_type,
+                "detected_at": row.get("detected_at") or now,
+                **values,
+            })
+        elif any(getattr(previous, f) != values[f] for f in _SYNCED_PATTERN_FIELDS):
+            updates.append({"id": previous.id, **values})
+
+    if retire_missing:
+        in_scope = set(scope) if scope is not None else None
+        stale_ids.extend(
+            row.id
+            for symbol, row in current.items()
+            if symbol not in incoming and (in_scope is None or symbol in in_scope)
+        )
+
+    if inserts:
+        db.bulk_insert_mappings(Pattern, inserts)
+    if updates:
+        db.bulk_update_mappings(Pattern, updates)
+    if stale_ids:
+        db.query(Pattern).filter(Pattern.id.in_(stale_ids)).delete(synchronize_session=False)
+
+    return {"inserted": len(inserts), "updated": len(updates), "retired": len(stale_ids)}
+
 # Pattern Detection Algorithms
 class PatternDetector:
 
@@ -275,6 +411,11 @@ class PatternDetector:
         return None
 
 # API Endpoints
+#
+# Handlers that use the synchronous SQLAlchemy Session (or the sync Redis
+# client) are declared with plain `def` so FastAPI runs them on its threadpool
+# instead of blocking the event loop. Only handlers that do no blocking I/O
+# stay `async def`.
 
 def _patterns_from_db(db: Session) -> List[PatternResponse]:
     patterns = db.query(Pattern).filter(Pattern.status == "active").all()
@@ -318,23 +459,48 @@ def _patterns_from_db(db: Session) -> List[PatternResponse]:
         ))
     return results
 
+PATTERN_FIELDS = tuple(PatternResponse.__fields__)
+
+def _parse_pattern_fields(fields: Optional[str]) -> tuple:
+    if not fields:
+        return PATTERN_FIELDS
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in PATTERN_FIELDS]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=422,
+            detail=f"unknown fields {unknown}; allowed: {', '.join(PATTERN_FIELDS)}",
+        )
+    return requested
+
 @app.get("/api/patterns/all", response_model=List[PatternResponse])
-async def get_all_patterns(db: Session = Depends(get_db)):
-    '''Return latest cached VCP detections from the database.'''
+def get_all_patterns(
+    fields: Optional[str] = Query(default=None, description="Comma-separated keys to return"),
+    format: Literal["rows", "columns"] = Query(default="rows"),
+    db: Session = Depends(get_db),
+):
+    '''Return latest cached VCP detections from the database.
+
+    Rows are validated into PatternResponse once, when the cache is written;
+    cache hits return the stored JSON bytes as-is. `fields=symbol,confidence,...`
+    trims each row to the listed keys and `format=columns` returns one array per
+    field instead of one object per row.
+    '''
+    selected = _parse_pattern_fields(fields)
     cached = redis_client.get("patterns:all") if redis_client else None
-    if cached:
-        if isinstance(cached, bytes):
-            cached = cached.decode("utf-8")
-        cached_list = json.loads(cached)
-        return [PatternResponse(**item) for item in cached_list]
-
-    pattern_responses = _patterns_from_db(db)
-    if redis_client:
-        redis_client.setex("patterns:all", 300, json.dumps([p.dict() for p in pattern_responses]))
-    return pattern_responses
+    if not cached:
+        pattern_responses = _patterns_from_db(db)
+        cached = json.dumps([p.dict() for p in pattern_responses], separators=(",", ":"))
+        if redis_client:
+            redis_client.setex("patterns:all", 300, cached)
+    if fields is None and format == "rows":
+        return Response(content=cached, media_type="application/json")
+    rows = json.loads(cached)
+    body = to_columns(rows, selected) if format == "columns" else project_rows(rows, selected)
+    return Response(content=json.dumps(body, separators=(",", ":")), media_type="application/json")
 
 @app.get("/api/patterns/vcp", response_model=List[PatternResponse])
-async def get_vcp_patterns(db: Session = Depends(get_db)):
+def get_vcp_patterns(db: Session = Depends(get_db)):
     '''Return latest cached VCP detections from the database.'''
     return _patterns_from_db(db)
 
@@ -357,7 +523,7 @@ async def get_market_environment():
     )
 
 @app.get("/api/stocks/{symbol}/analysis")
-async def get_stock_analysis(symbol: str, db: Session = Depends(get_db)):
+def get_stock_analysis(symbol: str, db: Session = Depends(get_db)):
     '''Get detailed analysis for a specific stock'''
 
     # Get stock data
@@ -382,7 +548,7 @@ async def get_stock_analysis(symbol: str, db: Session = Depends(get_db)):
     }
 
 @app.get("/api/portfolio/positions", response_model=List[PortfolioPosition])
-async def get_portfolio_positions(db: Session = Depends(get_db)):
+def get_portfolio_positions(db: Session = Depends(get_db)):
     '''Get all active portfolio positions'''
 
     positions = db.query(Portfolio).filter(Portfolio.status == "open").all()
@@ -412,26 +578,60 @@ async def get_portfolio_positions(db: Session = Depends(get_db)):
 
     return position_responses
 
+market_hub = MarketDataHub(create_feed())
+
 @app.websocket("/ws/market-data")
 async def market_data_websocket(websocket: WebSocket):
-    '''WebSocket endpoint for real-time market data'''
+    '''WebSocket endpoint for real-time market data.
+
+    Clients share one hub producer. Optional `?symbols=AAPL,MSFT` narrows the
+    stream; clients may later send {"subscribe": [...]} to change it. Messages
+    only carry symbols whose quote changed since the previous tick.
+    '''
     await websocket.accept()
+    raw_symbols = websocket.query_params.get("symbols", "").split(",")
+    requested = [s.strip() for s in raw_symbols if s.strip()]
+    sub = market_hub.subscribe(requested or None)
 
-    try:
+    async def pump():
+        await websocket.send_text(market_hub.snapshot(sub.symbols))
         while True:
-            # Simulate real-time price updates
-            market_update = {
-                "timestamp": datetime.now().isoformat(),
-                "updates": generate_price_updates()
-            }
-
-            await websocket.send_json(market_update)
-            await asyncio.sleep(1)  # Update every second
+            message = await sub.next_message()
+            if message is None:
+                # Dropped as a slow consumer
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(message)
+
+    async def listen():
+        while True:
+            command = await websocket.receive_json()
+            if isinstance(command, dict) and "subscribe" in command:
+                symbols = command["subscribe"]
+                valid = symbols is None or (
+                    isinstance(symbols, list) and all(isinstance(s, str) for s in symbols)
+                )
+                if not valid:
+                    await websocket.send_json({"error": "subscribe must be a list of symbols"})
+                    continue
+                market_hub.set_symbols(sub, symbols or None)
+                await websocket.send_text(market_hub.snapshot(sub.symbols))
 
-    except Exception as e:
-        print(f"WebSocket error: {e}")
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(listen())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            # A client disconnect is a normal close; anything else is a real failure
+            error = None if task.cancelled() else task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                logging.error("market data websocket failed", exc_info=error)
+                with contextlib.suppress(Exception):
+                    await websocket.close(code=1011)
     finally:
-        await websocket.close()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        market_hub.unsubscribe(sub)
 
 # Helper Functions
 def calculate_trend_template_score(symbol: str) -> int:
@@ -466,25 +666,10 @@ def get_technical_indicators(symbol: str) -> dict:
         "macd": 0.85
     }
 
-def generate_price_updates() -> List[dict]:
-    '''Generate simulated real-time price updates'''
-    symbols = ["AAPL", "NVDA", "TSLA", "MSFT", "GOOGL"]
-    updates = []
-
-    for symbol in symbols:
-        # Simulate price movement
-        price_change = np.random.normal(0, 0.5)  # Mean=0, StdDev=0.5%
-
-        updates.append({
-            "symbol": symbol,
-            "price_change": price_change,
-            "volume_surge": np.random.choice([True, False], p=[0.1, 0.9])
-        })
-
-    return updates
-
-def fetch_price_data_for_vcp(symbol: str) -> Optional[pd.DataFrame]:
+def fetch_price_data_for_vcp(symbol: str) -> Optional["pd.DataFrame"]:
     '''Convert stored price history into the DataFrame format expected by the VCP detector.'''
+    import pandas as pd
+
     price_records = get_stock_price_data(symbol)
     if not price_records:
         return None
@@ -515,7 +700,7 @@ def fetch_price_data_for_vcp(symbol: str) -> Optional[pd.DataFrame]:
 
     return df[required_columns].sort_index()
 
-def convert_vcp_signal_to_pattern_response(signal: VCPSignal, stock: Stock) -> PatternResponse:
+def convert_vcp_signal_to_pattern_response(signal: "VCPSignal", stock: Stock) -> PatternResponse:
     '''Translate a VCPSignal into the PatternResponse schema expected by the frontend.'''
     confidence = (signal.confidence_score or 0.0) / 100.0
 
@@ -560,6 +745,8 @@ def detect_vcp_patterns_from_stocks(stocks: List[Stock]) -> List[PatternResponse
     if not stocks:
         return []
 
+    from vcp_ultimate_algorithm import scan_for_vcp
+
     symbol_to_stock = {stock.symbol: stock for stock in stocks if stock.symbol}
     symbols = list(symbol_to_stock.keys())
     if not symbols:
@@ -588,8 +775,14 @@ def detect_vcp_patterns_from_stocks(stocks: List[Stock]) -> List[PatternResponse
 # New scan endpoints
 
 @app.get("/api/scans/latest")
-async def get_latest_scan(db: Session = Depends(get_db)):
-    run = db.query(ScanRun).order_by(ScanRun.started_at.desc()).first()
+def get_latest_scan(db: Session = Depends(get_db)):
+    # Detection passes log their own runs every few minutes; report scans only
+    run = (
+        db.query(ScanRun)
+        .filter(or_(ScanRun.notes.is_(None), ~ScanRun.notes.startswith(DETECTION_RUN_NOTES)))
+        .order_by(ScanRun.started_at.desc())
+        .first()
+    )
     if not run:
         return {
             "last_scan_started_at": None,
@@ -606,61 +799,347 @@ async def get_latest_scan(db: Session = Depends(get_db)):
         "failed_count": run.failed_count or 0,
     }
 
+SCAN_CACHE_TTL_SECONDS = 300
+
+def _scan_cache_version(db: Session) -> str:
+    '''Identify the data generation: id and finish time of the latest scan run.
+
+    Patterns are rewritten when a run finishes, so a key built from this never
+    serves rows from before the latest completed sync. Running scans publish
+    patterns batch by batch along with their progress counters, so those are
+    part of the key until the run finishes.
+    '''
+    row = (
+        db.query(ScanRun.id, ScanRun.finished_at, ScanRun.success_count, ScanRun.failed_count)
+        .order_by(ScanRun.id.desc())
+        .first()
+    )
+    if row is None:
+        return "none"
+    if row.finished_at is None:
+        return f"{row.id}:running:{row.success_count or 0}:{row.failed_count or 0}"
+    return f"{row.id}:{row.finished_at.isoformat()}"
+
+def _encode_scan_cursor(confidence: float, pattern_id: int) -> str:
+    payload = json.dumps({"c": confidence, "id": pattern_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("utf-8")
+
+def _decode_scan_cursor(cursor: str) -> tuple:
+    try:
+        obj = json.loads(base64.urlsafe_b64decode(cursor.encode("utf-8")))
+        return float(obj["c"]), int(obj["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+def _scan_results_page(db: Session, limit: Optional[int], offset: int, cursor: Optional[str]):
+    '''One page of active patterns ordered by (confidence DESC, id ASC) in SQL.
+
+    NULL confidence sorts as 0, the same on SQLite and Postgres, so keyset
+    cursors never skip those rows. The sort key matches ix_patterns_status_rank,
+    so pages are read off the index without sorting every active row.
+    '''
+    confidence_key = func.coalesce(Pattern.confidence, literal_column("0"))
+    query = (
+        db.query(
+            Pattern.id, Pattern.symbol, Pattern.pattern_type, Pattern.confidence,
+            Pattern.pivot_price, Pattern.stop_loss, Pattern.days_in_pattern,
+            Stock.name, Stock.sector, Stock.current_price, Stock.rs_rating,
+        )
+        .outerjoin(Stock, Stock.symbol == Pattern.symbol)
+        .filter(Pattern.status == "active")
+    )
+    if cursor:
+        confidence, pattern_id = _decode_scan_cursor(cursor)
+        query = query.filter(or_(
+            confidence_key < confidence,
+            and_(confidence_key == confidence, Pattern.id > pattern_id),
+        ))
+    query = query.order_by(confidence_key.desc(), Pattern.id.asc())
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        # One extra row tells us whether there is a next page
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_scan_cursor(float(last.confidence or 0.0), last.id)
+
+    items = [PatternResponse(
+        symbol=r.symbol,
+        name=r.name or r.symbol,
+        sector=r.sector or "Unknown",
+        pattern_type=r.pattern_type or "VCP",
+        confidence=float(r.confidence or 0.0),
+        pivot_price=float(r.pivot_price or (r.current_price or 0.0)),
+        stop_loss=float(r.stop_loss or ((r.current_price or 0.0) * 0.92)),
+        current_price=float(r.current_price or 0.0),
+        days_in_pattern=int(r.days_in_pattern or 0),
+        rs_rating=int(r.rs_rating or 0),
+    ) for r in rows]
+    return items, next_cursor
+
 @app.get("/api/scans/results", response_model=List[PatternResponse])
-async def get_scan_results(db: Session = Depends(get_db)):
-    patterns = _patterns_from_db(db)
-    # Sort by confidence desc
-    return sorted(patterns, key=lambda p: p.confidence, reverse=True)
+def get_scan_results(
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    '''Active patterns, highest confidence first.
+
+    Page with `limit` plus either `offset` or the keyset `cursor` returned in
+    the X-Next-Cursor header. Without `limit` every active pattern is returned.
+    '''
+    cache_key = f"scans:results:{_scan_cache_version(db)}:{limit}:{offset}:{cursor or ''}"
+    cached = redis_client.get(cache_key) if redis_client else None
+    if cached:
+        if isinstance(cached, bytes):
+            cached = cached.decode("utf-8")
+        # Stored as "<next cursor>\n<json body>"; cursors are base64 so never contain \n
+        next_cursor, _, body = cached.partition("\n")
+    else:
+        items, next_cursor = _scan_results_page(db, limit, offset, cursor)
+        next_cursor = next_cursor or ""
+        body = json.dumps([p.dict() for p in items], separators=(",", ":"))
+        if redis_client:
+            redis_client.setex(cache_key, SCAN_CACHE_TTL_SECONDS, f"{next_cursor}\n{body}")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.get("/api/scans/stats")
-async def get_scan_stats(db: Session = Depends(get_db)):
-    patterns = _patterns_from_db(db)
-    total = len(patterns)
-    by_sector = {}
-    for p in patterns:
-        by_sector[p.sector] = by_sector.get(p.sector, 0) + 1
-    return {"total": total, "by_sector": by_sector}
+def get_scan_stats(db: Session = Depends(get_db)):
+    '''Active pattern counts per sector, aggregated with GROUP BY.'''
+    cache_key = f"scans:stats:{_scan_cache_version(db)}"
+    cached = redis_client.get(cache_key) if redis_client else None
+    if cached:
+        return json.loads(cached)
+
+    sector = func.coalesce(Stock.sector, "Unknown")
+    rows = (
+        db.query(sector, func.count(Pattern.id))
+        .select_from(Pattern)
+        .outerjoin(Stock, Stock.symbol == Pattern.symbol)
+        .filter(Pattern.status == "active")
+        .group_by(sector)
+        .all()
+    )
+    by_sector = dict(rows)
+    stats = {"total": sum(by_sector.values()), "by_sector": by_sector}
+    if redis_client:
+        redis_client.setex(cache_key, SCAN_CACHE_TTL_SECONDS, json.dumps(stats))
+    return stats
 
 # Background Tasks
-async def pattern_detection_task():
-    '''Background task to continuously detect new patterns'''
-    while True:
+DETECTION_INTERVAL_SECONDS = int(os.getenv("LEGEND_DETECTION_INTERVAL", "300"))
+DETECTION_CHUNK_SIZE = 50
+DETECTION_RUN_NOTES = "pattern detection"
+
+def run_pattern_detection(chunk_size: int = DETECTION_CHUNK_SIZE) -> dict:
+    '''Run one full detection pass over the stock universe and persist the results.
+
+    Blocking: call it from a worker process (see worker/pattern_detection.py or
+    PatternDetectionRunner), never directly from the event loop. Progress is
+    committed to a ScanRun row (notes "pattern detection") after every chunk;
+    /api/scans/latest skips those rows and reports scans only.
+    '''
+    db = SessionLocal()
+    run = ScanRun(started_at=datetime.utcnow(), total_tickers=0, success_count=0,
+                  failed_count=0, notes=DETECTION_RUN_NOTES)
+    try:
+        db.add(run)
+        stocks = db.query(Stock).all()
+        run.total_tickers = len(stocks)
+        db.commit()
+
+        vcp_patterns: List[PatternResponse] = []
+        for i in range(0, len(stocks), chunk_size):
+            chunk = stocks[i:i + chunk_size]
+            vcp_patterns.extend(detect_vcp_patterns_from_stocks(chunk))
+            run.success_count = min(len(stocks), i + len(chunk))
+            db.commit()
+
+        changes = sync_patterns(db, [
+            {
+                "symbol": pattern.symbol,
+                "confidence": pattern.confidence,
+                "pivot_price": pattern.pivot_price,
+                "stop_loss": pattern.stop_loss,
+                "days_in_pattern": pattern.days_in_pattern,
+                "pattern_data": pattern.dict(),
+            }
+            for pattern in vcp_patterns
+        ])
+        run.finished_at = datetime.utcnow()
+        db.commit()
+        return {
+            "run_id": run.id, "scanned": run.total_tickers, "patterns": len(vcp_patterns),
+            **changes,
+        }
+    except Exception as exc:
+        db.rollback()
+        run.finished_at = datetime.utcnow()
+        run.notes = f"{DETECTION_RUN_NOTES} failed: {exc}"[:500]
+        db.add(run)
+        db.commit()
+        raise
+    finally:
+        db.close()
+
+def _detection_worker_init():
+    '''Drop pooled connections inherited from the parent process after fork.'''
+    engine.dispose(close=False)
+
+class PatternDetectionRunner:
+    '''Runs detection passes in a single child process with a one-slot queue.
+
+    At most one pass runs at a time. A trigger that arrives while a pass is
+    running is queued (once); further triggers are dropped until the queue
+    drains, so slow passes apply backpressure instead of piling up.
+
+    If the child dies (OOM kill, failed initializer) the process pool is broken
+    for good, so it is thrown away and the next pass starts a fresh one.
+    '''
+
+    def __init__(self, on_complete=None, target=None, executor_factory=None):
+        self._executor = None
+        self._future = None
+        self._pending = False
+        # Re-entrant: a future that is already done runs _done inline from _start
+        self._lock = threading.RLock()
+        self._on_complete = on_complete
+        self._target = target or run_pattern_detection
+        self._executor_factory = executor_factory or self._process_pool
+        self.started_at: Optional[datetime] = None
+        self.last_result: Optional[dict] = None
+        self.last_error: Optional[str] = None
+        self.dropped = 0
+
+    @staticmethod
+    def _process_pool():
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=1, initializer=_detection_worker_init)
+
+    def _executor_or_create(self):
+        if self._executor is None:
+            self._executor = self._executor_factory()
+        return self._executor
+
+    def _reset_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def submit(self) -> str:
+        '''Request a detection pass. Returns "started", "queued", "dropped" or "failed".'''
+        with self._lock:
+            if self.running:
+                if self._pending:
+                    self.dropped += 1
+                    return "dropped"
+                self._pending = True
+                return "queued"
+            return "started" if self._start() else "failed"
+
+    def _start(self) -> bool:
+        self._pending = False
+        self.started_at = datetime.utcnow()
         try:
-            db = SessionLocal()
-
-            stocks = db.query(Stock).all()
-            vcp_patterns = detect_vcp_patterns_from_stocks(stocks)
-
-            db.query(Pattern).filter(Pattern.pattern_type == "VCP").delete()
-            for pattern in vcp_patterns:
-                db.add(
-                    Pattern(
-                        symbol=pattern.symbol,
-                        pattern_type="VCP",
-                        confidence=pattern.confidence,
-                        pivot_price=pattern.pivot_price,
-                        stop_loss=pattern.stop_loss,
-                        days_in_pattern=pattern.days_in_pattern,
-                        pattern_data=pattern.dict()
-                    )
-                )
+            self._future = self._submit()
+        except Exception as exc:
+            self._future = None
+            self.last_error = f"could not start detection pass: {exc}"
+            return False
+        self._future.add_done_callback(self._done)
+        return True
+
+    def _submit(self):
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            return self._executor_or_create().submit(self._target)
+        except BrokenProcessPool:
+            self._reset_executor()
+            return self._executor_or_create().submit(self._target)
 
-            db.commit()
+    def _done(self, future):
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            self.last_result = future.result()
+            self.last_error = None
+        except BrokenProcessPool as exc:
+            self.last_error = f"detection process died: {exc}"
+            with self._lock:
+                if self._future is future:
+                    self._reset_executor()
+        except Exception as exc:
+            self.last_error = str(exc)
+        if self._on_complete:
+            self._on_complete()
+        with self._lock:
+            if self._pending:
+                self._start()
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._pending,
+            "dropped": self.dropped,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
 
-            # Clear cache so next request pulls fresh detections
-            if redis_client:
-                redis_client.delete("patterns:all")
+    def shutdown(self):
+        with self._lock:
+            self._reset_executor()
 
-        except Exception as e:
-            print(f"Pattern detection error: {e}")
-        finally:
-            db.close()
+def _clear_patterns_cache():
+    # Clear cache so next request pulls fresh detections
+    if redis_client:
+        redis_client.delete("patterns:all")
 
-        # Run every 5 minutes
-        await asyncio.sleep(300)
+detection_runner = PatternDetectionRunner(on_complete=_clear_patterns_cache)
+
+async def pattern_detection_task():
+    '''Trigger a detection pass every DETECTION_INTERVAL_SECONDS.
+
+    The pass itself runs in the runner's child process, so this coroutine only
+    schedules work and never blocks the event loop.
+    '''
+    while True:
+        outcome = detection_runner.submit()
+        if outcome == "failed":
+            logging.error(f"Pattern detection could not start: {detection_runner.last_error}")
+        elif outcome != "started":
+            logging.warning(f"Pattern detection still running; trigger {outcome}")
+        await asyncio.sleep(DETECTION_INTERVAL_SECONDS)
+
+@app.get("/api/scans/detection")
+def get_detection_status():
+    return detection_runner.status()
+
+@app.on_event("startup")
+async def start_pattern_detection():
+    # Opt-in: production runs detection in the dedicated worker instead
+    if os.getenv("LEGEND_INPROCESS_DETECTION", "0") == "1":
+        asyncio.get_running_loop().create_task(pattern_detection_task())
+
+@app.on_event("shutdown")
+async def stop_pattern_detection():
+    detection_runner.shutdown()
 
 def get_stock_price_data(symbol: str) -> List[dict]:
     '''Fetch stock price data from seeded files if available, else generate mock data.'''
+    import numpy as np
+    import pandas as pd
+
     # Try reading seeded data
     try:
         import os, json as _json
@@ -699,13 +1178,15 @@ def get_stock_price_data(symbol: str) -> List[dict]:
 
 def get_stock_volume_data(symbol: str) -> List[int]:
     '''Fetch stock volume data (mock implementation)'''
+    import numpy as np
+
     return [np.random.randint(500000, 5000000) for _ in range(252)]
 
 if __name__ == "__main__":
     import uvicorn
 
-    # Start background tasks
-    asyncio.create_task(pattern_detection_task())
+    # Start background tasks (detection runs in a child process)
+    os.environ.setdefault("LEGEND_INPROCESS_DETECTION", "1")
 
     # Run the application
     uvicorn.run(app, host="0.0.0.0", port=8000)
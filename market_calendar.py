@@ -0,0 +1,125 @@
+"""
+Local NYSE trading calendar, so scheduled scans skip days with no new bars.
+
+Holidays follow the exchange's rules and need no network or extra package.
+The rules cover New Year's Day, MLK Day, Presidents' Day, Good Friday,
+Memorial Day, Juneteenth (from 2022), Independence Day, Labor Day,
+Thanksgiving and Christmas. A holiday that falls on a Saturday is observed on
+the Friday before, and one on a Sunday on the Monday after. A Saturday New
+Year's Day is not observed. Unscheduled closures, such as national days of
+mourning, are listed in SPECIAL_CLOSURES.
+
+The exchange closes early at 13:00 ET on July 3, the day after Thanksgiving
+and Christmas Eve, when those are trading days.
+
+All times are America/New_York.
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional, Set, Tuple
+
+from zoneinfo import ZoneInfo
+
+ET = ZoneInfo("America/New_York")
+OPEN = time(9, 30)
+CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+SPECIAL_CLOSURES = {
+    date(2018, 12, 5),  # George H. W. Bush
+    date(2025, 1, 9),  # Jimmy Carter
+}
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    # Anonymous Gregorian algorithm
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    ll = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * ll) // 451
+    month = (h + ll - 7 * m + 114) // 31
+    day = (h + ll - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _observed(day: date) -> date:
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def holidays(year: int) -> Set[date]:
+    """Full-day NYSE closures in `year`."""
+    days = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Presidents' Day
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _last_weekday(year, 5, 0),  # Memorial Day
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))
+    days.update(d for d in SPECIAL_CLOSURES if d.year == year)
+    return days
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def session(day: date) -> Optional[Tuple[datetime, datetime]]:
+    """(open, close) for `day` as aware ET datetimes; None when the market is closed."""
+    if not is_trading_day(day):
+        return None
+    thanksgiving = _nth_weekday(day.year, 11, 3, 4)
+    early = day in (date(day.year, 7, 3), thanksgiving + timedelta(days=1), date(day.year, 12, 24))
+    close = EARLY_CLOSE if early else CLOSE
+    return datetime.combine(day, OPEN, ET), datetime.combine(day, close, ET)
+
+
+def now_et() -> datetime:
+    return datetime.now(ET)
+
+
+def is_market_open(at: Optional[datetime] = None) -> bool:
+    at = (at or now_et()).astimezone(ET)
+    hours = session(at.date())
+    return hours is not None and hours[0] <= at < hours[1]
+
+
+def previous_trading_day(day: date) -> date:
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def next_trading_day(day: date) -> date:
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
@@ -0,0 +1,221 @@
+"""
+Market data fan-out hub for the /ws/market-data websocket.
+
+A single producer task polls a pluggable feed and broadcasts diff messages
+(only symbols whose quote changed) to every subscriber. Each message is encoded
+once per distinct symbol filter, not once per client, so N websocket clients
+cost one producer loop plus N queue puts.
+
+Subscribers get a bounded queue; a client that falls `queue_size` messages
+behind is dropped instead of stalling the producer or buffering without limit.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Protocol
+
+DEFAULT_SYMBOLS = ["AAPL", "NVDA", "TSLA", "MSFT", "GOOGL"]
+
+# symbol -> {"price": float, "volume": int}
+Quotes = Dict[str, Dict[str, float]]
+
+
+class MarketFeed(Protocol):
+    async def next_tick(self) -> Quotes:
+        ...
+
+
+class SimulatedFeed:
+    '''Random-walk quotes for local development and demos.'''
+
+    def __init__(self, symbols: Optional[List[str]] = None, seed: Optional[int] = None):
+        self._rng = random.Random(seed)
+        self._prices = {s: self._rng.uniform(50, 500) for s in (symbols or DEFAULT_SYMBOLS)}
+
+    async def next_tick(self) -> Quotes:
+        quotes: Quotes = {}
+        for symbol, price in self._prices.items():
+            # Mean=0, StdDev=0.5%; most symbols don't trade every tick
+            if self._rng.random() < 0.3:
+                continue
+            price = round(price * (1 + self._rng.gauss(0, 0.005)), 2)
+            self._prices[symbol] = price
+            volume = self._rng.randint(1_000, 50_000)
+            if self._rng.random() < 0.1:
+                volume *= 5
+            quotes[symbol] = {"price": price, "volume": volume}
+        return quotes
+
+
+class ReplayFeed:
+    '''Replays daily closes from data/price_history, one bar per tick, looping.'''
+
+    def __init__(
+        self,
+        symbols: Optional[List[str]] = None,
+        data_dir: str = os.path.join("data", "price_history"),
+    ):
+        self._bars: Dict[str, List[Dict[str, float]]] = {}
+        for symbol in symbols or DEFAULT_SYMBOLS:
+            path = os.path.join(data_dir, f"{symbol}.json")
+            if not os.path.exists(path):
+                continue
+            with open(path) as f:
+                rows = json.load(f)
+            bars = [
+                {"price": float(r["close"]), "volume": int(r.get("volume") or 0)}
+                for r in rows
+                if r.get("close")
+            ]
+            if bars:
+                self._bars[symbol] = bars
+        self._index = 0
+
+    async def next_tick(self) -> Quotes:
+        quotes = {symbol: bars[self._index % len(bars)] for symbol, bars in self._bars.items()}
+        self._index += 1
+        return quotes
+
+
+def create_feed() -> MarketFeed:
+    kind = os.getenv("LEGEND_MARKET_FEED", "simulated").lower()
+    raw = os.getenv("LEGEND_MARKET_SYMBOLS", "")
+    symbols = [s.strip().upper() for s in raw.split(",") if s.strip()]
+    if kind == "replay":
+        return ReplayFeed(symbols or None)
+    return SimulatedFeed(symbols or None)
+
+
+@dataclass(eq=False)
+class Subscriber:
+    queue: asyncio.Queue
+    symbols: Optional[FrozenSet[str]] = None
+    dropped: bool = False
+
+    async def next_message(self) -> Optional[str]:
+        '''Next encoded message, or None once the hub has dropped this subscriber.'''
+        return await self.queue.get()
+
+
+@dataclass
+class _Quote:
+    price: float
+    volume: float
+    volume_avg: float = field(default=0.0)
+
+
+class MarketDataHub:
+    '''Single-producer, multi-subscriber broadcaster for market quotes.'''
+
+    def __init__(self, feed: MarketFeed, interval: float = 1.0, queue_size: int = 32):
+        self.feed = feed
+        self.interval = interval
+        self.queue_size = queue_size
+        self._subscribers: List[Subscriber] = []
+        self._quotes: Dict[str, _Quote] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, symbols: Optional[List[str]] = None) -> Subscriber:
+        sub = Subscriber(queue=asyncio.Queue(maxsize=self.queue_size))
+        self.set_symbols(sub, symbols)
+        self._subscribers.append(sub)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def set_symbols(self, sub: Subscriber, symbols: Optional[List[str]]) -> None:
+        cleaned = frozenset(s.strip().upper() for s in symbols or () if s.strip())
+        sub.symbols = cleaned or None
+
+    def snapshot(self, symbols: Optional[FrozenSet[str]] = None) -> str:
+        '''Full current state for a new or re-filtered subscriber.'''
+        names = [s for s in self._quotes if symbols is None or s in symbols]
+        return self._encode(names, {})
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                quotes = await self.feed.next_tick()
+                self.publish(quotes)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception("Market feed error")
+            await asyncio.sleep(self.interval)
+
+    def publish(self, quotes: Quotes) -> None:
+        '''Apply a tick and fan the changed symbols out to subscribers.'''
+        previous: Dict[str, float] = {}
+        changed: List[str] = []
+        for symbol, quote in quotes.items():
+            current = self._quotes.get(symbol)
+            price = float(quote["price"])
+            volume = float(quote.get("volume") or 0)
+            if current is None:
+                self._quotes[symbol] = _Quote(price=price, volume=volume, volume_avg=volume)
+                changed.append(symbol)
+                continue
+            if price == current.price and volume == current.volume:
+                continue
+            previous[symbol] = current.price
+            current.volume_avg = current.volume_avg * 0.9 + volume * 0.1
+            current.price = price
+            current.volume = volume
+            changed.append(symbol)
+
+        if not changed:
+            return
+
+        encoded: Dict[Optional[FrozenSet[str]], Optional[str]] = {}
+        for sub in list(self._subscribers):
+            if sub.symbols not in encoded:
+                names = changed if sub.symbols is None else [s for s in changed if s in sub.symbols]
+                encoded[sub.symbols] = self._encode(names, previous) if names else None
+            message = encoded[sub.symbols]
+            if message is None:
+                continue
+            try:
+                sub.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def _drop(self, sub: Subscriber) -> None:
+        sub.dropped = True
+        self.dropped += 1
+        self.unsubscribe(sub)
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+
+    def _encode(self, symbols: List[str], previous: Dict[str, float]) -> str:
+        updates = []
+        for symbol in symbols:
+            quote = self._quotes[symbol]
+            prev = previous.get(symbol)
+            change = round((quote.price - prev) / prev * 100, 4) if prev else 0.0
+            updates.append({
+                "symbol": symbol,
+                "price": quote.price,
+                "price_change": change,
+                "volume_surge": quote.volume > quote.volume_avg * 1.5,
+            })
+        return json.dumps(
+            {"timestamp": datetime.now().isoformat(), "updates": updates}, separators=(",", ":")
+        )
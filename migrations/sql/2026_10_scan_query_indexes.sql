@@ -0,0 +1,7 @@
+-- Indexes behind /api/scans/results and /api/scans/stats on databases created
+-- before the ORM declared them (create_all does not add indexes to existing tables)
+-- The results query sorts on this exact expression; NULL confidence ranks as 0
+CREATE INDEX IF NOT EXISTS ix_patterns_status_rank
+    ON patterns (status, coalesce(confidence, 0) DESC, id);
+DROP INDEX IF EXISTS ix_patterns_status_confidence;
+CREATE INDEX IF NOT EXISTS ix_stocks_sector ON stocks (sector);
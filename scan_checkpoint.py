@@ -0,0 +1,119 @@
+"""
+Per-symbol scan checkpoints so an interrupted scan can be resumed.
+
+Every symbol a scan finishes is recorded in `scan_progress` under the scan's
+run key (`daily:<scan_runs.id>` for daily_market_scanner, `batch:<timestamp>`
+for worker/scan_batch.py) as `done` or `failed`. A resumed run skips `done`
+symbols and retries `failed` ones with exponential backoff, so recovering
+from a crash or deploy only costs the work that was left.
+
+Functions take anything with `.execute()` (a Session or a Connection) and
+never commit; callers record progress in the same transaction as the work it
+describes.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import delete, func, insert, select, update
+
+from legend_ai_backend import ScanProgress
+
+T = TypeVar("T")
+
+DONE = "done"
+FAILED = "failed"
+RESUME_ATTEMPTS = 3  # tries for a symbol that failed in the interrupted run
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 30.0
+KEEP_DAYS = 14
+RUN_KEY_FORMAT = "%Y%m%dT%H%M%S"
+
+progress = ScanProgress.__table__
+
+
+def ensure_table(bind) -> None:
+    progress.create(bind, checkfirst=True)
+
+
+def load_progress(conn, run_key: str) -> Dict[str, str]:
+    """symbol -> status for everything already recorded under `run_key`."""
+    rows = conn.execute(
+        select(progress.c.symbol, progress.c.status).where(progress.c.run_key == run_key)
+    )
+    return dict(rows.all())
+
+
+def record_progress(conn, run_key: str, symbol: str, ok: bool, error: Optional[str] = None) -> None:
+    values = {
+        "status": DONE if ok else FAILED,
+        "error": None if ok else (error or "")[:500],
+        "updated_at": datetime.utcnow(),
+    }
+    updated = conn.execute(
+        update(progress)
+        .where(progress.c.run_key == run_key, progress.c.symbol == symbol)
+        .values(attempts=progress.c.attempts + 1, **values)
+    )
+    if updated.rowcount == 0:
+        conn.execute(insert(progress).values(run_key=run_key, symbol=symbol, attempts=1, **values))
+
+
+def plan_resume(
+    tickers: List[str], recorded: Dict[str, str]
+) -> Tuple[List[str], List[str], List[str]]:
+    """Split `tickers` into (done, retry, todo) against a run's recorded progress."""
+    done = [t for t in tickers if recorded.get(t) == DONE]
+    retry = [t for t in tickers if recorded.get(t) == FAILED]
+    todo = [t for t in tickers if t not in recorded]
+    return done, retry, todo
+
+
+def latest_run_key(conn, prefix: str) -> Optional[str]:
+    """Most recently updated run key starting with `prefix`, if any."""
+    return conn.execute(
+        select(progress.c.run_key)
+        .where(progress.c.run_key.like(f"{prefix}%"))
+        .group_by(progress.c.run_key)
+        .order_by(func.max(progress.c.updated_at).desc())
+        .limit(1)
+    ).scalar()
+
+
+def run_as_of(run_key: str, per_day: bool = False) -> datetime:
+    """The `as_of` every pattern of a run is upserted with.
+
+    Taken from the `<prefix>:<YYYYmmddTHHMMSS>` run key, so a resumed run keeps
+    its stamp; `per_day` truncates it to the date so repeated intraday runs
+    update the day's rows instead of adding new ones.
+    """
+    try:
+        as_of = datetime.strptime(run_key.rpartition(":")[2], RUN_KEY_FORMAT)
+    except ValueError:
+        as_of = datetime.utcnow().replace(microsecond=0)
+    return datetime(as_of.year, as_of.month, as_of.day) if per_day else as_of
+
+
+def prune_progress(conn, keep_days: int = KEEP_DAYS) -> None:
+    cutoff = datetime.utcnow() - timedelta(days=keep_days)
+    conn.execute(delete(progress).where(progress.c.updated_at < cutoff))
+
+
+def retry_with_backoff(
+    fn: Callable[..., T],
+    *args,
+    attempts: int = RESUME_ATTEMPTS,
+    base_delay: float = BACKOFF_BASE_SECONDS,
+    max_delay: float = BACKOFF_MAX_SECONDS,
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    """Call `fn(*args)`, retrying exceptions with delays of base, 2*base, ... capped at max."""
+    for attempt in range(attempts):
+        try:
+            return fn(*args)
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            sleep(min(max_delay, base_delay * 2 ** attempt))
+    raise ValueError("attempts must be at least 1")
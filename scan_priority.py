@@ -0,0 +1,148 @@
+"""
+Scan ordering: likely VCP candidates first.
+
+Before a scan touches the network, every symbol gets a priority from cheap
+priors that are already on disk or in the database:
+
+  active      the symbol had a pattern after the last scan
+  near_miss   how far the detector got last time (`data/scan_priority.json`,
+              the trend-template pass rate for symbols that were not detected)
+  trend       trend-template checks passed on the stored price history
+  rs          6-month return, as a percentile of the universe
+  proximity   closeness of the last close to the 52-week high
+
+Symbols with no priors at all score zero and keep their universe order at
+the end. Scanners write their results as they go, so the best setups are in
+the database within the first batches of a long run.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+DATA_DIR = Path("data")
+PRIORITY_PATH = DATA_DIR / "scan_priority.json"
+PRICE_HISTORY_DIR = DATA_DIR / "price_history"  # written by daily_market_scanner
+
+WEIGHTS = {"active": 3.0, "near_miss": 2.0, "trend": 1.0, "rs": 1.0, "proximity": 1.0}
+RS_LOOKBACK = 126  # trading days, ~6 months
+HIGH_LOOKBACK = 252  # 52 weeks
+NEAR_HIGH = 0.25  # within 25% of the high counts as near
+
+Candles = List[Dict]
+
+
+def load_stored_history(symbol: str) -> Candles:
+    """Candles the daily scanner stored for `symbol`; empty if there are none."""
+    try:
+        return json.loads((PRICE_HISTORY_DIR / f"{symbol}.json").read_text()) or []
+    except (OSError, ValueError):
+        return []
+
+
+def read_near_misses(path: Path = PRIORITY_PATH) -> Dict[str, float]:
+    try:
+        return {str(k): float(v) for k, v in json.loads(path.read_text()).items()}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def write_near_misses(scores: Dict[str, float], path: Path = PRIORITY_PATH) -> None:
+    """Merge this scan's per-symbol detector progress into the stored scores."""
+    merged = read_near_misses(path)
+    merged.update({symbol: round(float(score), 4) for symbol, score in scores.items()})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(merged, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def near_miss_score(detected: bool, trend_strength: float) -> float:
+    """1.0 for a detection, otherwise the share of the trend template that passed."""
+    return 1.0 if detected else float(trend_strength or 0.0)
+
+
+def _sma(closes: List[float], window: int) -> Optional[float]:
+    if len(closes) < window:
+        return None
+    return sum(closes[-window:]) / window
+
+
+def history_priors(candles: Candles) -> Dict[str, float]:
+    """Trend-template pass rate, 6-month return and 52-week-high proximity from stored candles.
+
+    Only the checks the history is long enough for are counted, so a short
+    history is not penalised for missing 150/200-day averages.
+    """
+    closes = [float(c["close"]) for c in candles if c.get("close")]
+    if not closes:
+        return {}
+    price = closes[-1]
+    highs = [float(c.get("high") or c["close"]) for c in candles[-HIGH_LOOKBACK:]]
+    lows = [float(c.get("low") or c["close"]) for c in candles[-HIGH_LOOKBACK:]]
+    high, low = max(highs), min(lows)
+    ma50, ma150, ma200 = _sma(closes, 50), _sma(closes, 150), _sma(closes, 200)
+
+    checks = [
+        low > 0 and (price - low) / low >= 0.30,
+        high > 0 and (high - price) / high <= NEAR_HIGH,
+    ]
+    if ma50 is not None:
+        checks.append(price > ma50)
+    if ma150 is not None:
+        checks.append(price > ma150 and ma50 > ma150)
+    if ma200 is not None:
+        checks.append(price > ma200 and ma150 > ma200)
+
+    start = closes[-RS_LOOKBACK] if len(closes) >= RS_LOOKBACK else closes[0]
+    return {
+        "trend": sum(bool(c) for c in checks) / len(checks),
+        "return": (price - start) / start if start > 0 else 0.0,
+        "proximity": max(0.0, 1.0 - (high - price) / high / NEAR_HIGH) if high > 0 else 0.0,
+    }
+
+
+def _percentiles(values: Dict[str, float]) -> Dict[str, float]:
+    ranked = sorted(values, key=values.get)
+    if len(ranked) < 2:
+        return {symbol: 1.0 for symbol in ranked}
+    return {symbol: i / (len(ranked) - 1) for i, symbol in enumerate(ranked)}
+
+
+def priority_scores(
+    symbols: Iterable[str],
+    load_history: Callable[[str], Candles],
+    active: Iterable[str] = (),
+    near_misses: Optional[Dict[str, float]] = None,
+) -> Dict[str, float]:
+    near_misses = read_near_misses() if near_misses is None else near_misses
+    active = set(active)
+    priors = {}
+    for symbol in symbols:
+        try:
+            priors[symbol] = history_priors(load_history(symbol))
+        except Exception:
+            priors[symbol] = {}
+    rs = _percentiles({s: p["return"] for s, p in priors.items() if p})
+    return {
+        symbol: (
+            WEIGHTS["active"] * (symbol in active)
+            + WEIGHTS["near_miss"] * near_misses.get(symbol, 0.0)
+            + WEIGHTS["trend"] * p.get("trend", 0.0)
+            + WEIGHTS["rs"] * rs.get(symbol, 0.0)
+            + WEIGHTS["proximity"] * p.get("proximity", 0.0)
+        )
+        for symbol, p in priors.items()
+    }
+
+
+def order_by_priority(
+    symbols: List[str],
+    load_history: Callable[[str], Candles],
+    active: Iterable[str] = (),
+    near_misses: Optional[Dict[str, float]] = None,
+) -> List[str]:
+    """`symbols` sorted by descending priority; ties keep their original order."""
+    scores = priority_scores(symbols, load_history, active, near_misses)
+    return sorted(symbols, key=lambda s: -scores.get(s, 0.0))
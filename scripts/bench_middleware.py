@@ -0,0 +1,185 @@
+"""
+Per-request middleware overhead on a trivial endpoint.
+
+Drives five ASGI apps in process (no sockets or HTTP parsing) with GET
+/healthz and reports microseconds per request and the overhead on top of bare
+Starlette:
+
+  bare        Starlette with the route only
+  fastapi     FastAPI with the route only (request parsing and encoding cost)
+  base_http   the previous stack: request id as BaseHTTPMiddleware plus
+              `@app.middleware("http")` security headers
+  asgi        the same two concerns as pure ASGI (app/middleware.py)
+  full        app.legend_ai_backend as served (CORS, compression, timing,
+              metrics and the ASGI request-id and header middleware)
+
+Usage: python scripts/bench_middleware.py [--requests 20000] [--repeat 3] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fastapi import FastAPI  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from app.middleware import (  # noqa: E402
+    RequestIdMiddleware,
+    SecureHeadersMiddleware,
+    default_security_headers,
+)
+
+
+async def healthz(request):
+    return JSONResponse({"ok": True, "version": "0.1.0"})
+
+
+def bare_app() -> Starlette:
+    return Starlette(routes=[Route("/healthz", healthz)])
+
+
+def fastapi_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/healthz")
+    async def healthz_route():
+        return {"ok": True, "version": "0.1.0"}
+
+    return app
+
+
+def base_http_app() -> Starlette:
+    """The stack before app/middleware.py, reproduced for comparison."""
+    app = bare_app()
+    headers = default_security_headers()
+
+    class LegacyRequestIdMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            rid = request.headers.get("x-request-id") or str(uuid.uuid4())
+            response = await call_next(request)
+            response.headers["x-request-id"] = rid
+            return response
+
+    app.add_middleware(LegacyRequestIdMiddleware)
+
+    @app.middleware("http")
+    async def set_secure_headers(request, call_next):
+        resp = await call_next(request)
+        for name, value in headers.items():
+            resp.headers[name] = value
+        return resp
+
+    return app
+
+
+def asgi_app() -> Starlette:
+    app = bare_app()
+    app.add_middleware(RequestIdMiddleware)
+    app.add_middleware(SecureHeadersMiddleware)
+    return app
+
+
+def full_app():
+    logging.disable(logging.CRITICAL)
+    from app.legend_ai_backend import app
+
+    return app
+
+
+APPS: Dict[str, Callable] = {
+    "bare": bare_app, "fastapi": fastapi_app, "base_http": base_http_app, "asgi": asgi_app,
+    "full": full_app,
+}
+
+
+def _scope() -> Dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/healthz", "raw_path": b"/healthz", "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+
+async def _request(app) -> None:
+    sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Like a server: the next message is the disconnect, once the client leaves
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"unexpected status {message['status']}")
+
+    await app(_scope(), receive, send)
+    disconnected.set()
+
+
+async def _drive(app, requests: int) -> float:
+    for _ in range(200):  # warm up routing and lazy state
+        await _request(app)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await _request(app)
+    return time.perf_counter() - start
+
+
+def run_benchmark(
+    requests: int = 20000, repeat: int = 3, names: Optional[List[str]] = None
+) -> Dict:
+    results = {}
+    for name in names or list(APPS):
+        app = APPS[name]()
+        best = min(asyncio.run(_drive(app, requests)) for _ in range(repeat))
+        results[name] = {"us_per_request": best / requests * 1e6, "requests_per_s": requests / best}
+    bare = results.get("bare", {}).get("us_per_request")
+    if bare:
+        for row in results.values():
+            row["overhead_us"] = row["us_per_request"] - bare
+    return results
+
+
+def report(results: Dict) -> None:
+    print(f"  {'stack':<11}{'us/request':>12}{'overhead us':>13}{'requests/s':>12}")
+    for name, row in results.items():
+        print(f"  {name:<11}{row['us_per_request']:>12.1f}{row.get('overhead_us', 0.0):>13.1f}"
+              f"{row['requests_per_s']:>12.0f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=list(APPS), help="stacks to run")
+    parser.add_argument("--json", action="store_true", help="print the raw result as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.requests, args.repeat, args.only)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        report(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Scan throughput benchmark over the bundled price history corpus.
+
+Loads every `data/price_history/*.json` file, runs `VCPDetector.detect_vcp`
+on each symbol with a StageStats sink attached (per-stage timings for load,
+validate, trend template, swings, contractions, pattern rules and scoring,
+plus rejection reasons), then runs `scan_for_vcp` end to end.
+Prints symbols per second and peak RSS, and compares against the stored
+baseline for the same mode (trend template on, or all stages with it off):
+it fails if throughput drops more than `--tolerance` below it.
+
+Baselines are machine specific; refresh with --update-baseline on the
+machine that runs the comparison.
+
+Usage: python scripts/bench_scan.py [--limit N] [--repeat 3] [--no-trend-template]
+                                    [--baseline PATH] [--update-baseline] [--json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from vcp_ultimate_algorithm import STAGES, StageStats, VCPDetector, scan_for_vcp  # noqa: E402
+
+HISTORY_DIR = ROOT / "data" / "price_history"
+DEFAULT_BASELINE = ROOT / "scripts" / "bench_scan_baseline.json"
+DEFAULT_TOLERANCE = 0.20
+
+def corpus_symbols(limit: Optional[int] = None) -> List[str]:
+    # "X 2.json" files are copy artifacts of "X.json"
+    symbols = sorted(p.stem for p in HISTORY_DIR.glob("*.json") if " " not in p.stem)
+    return symbols[:limit] if limit else symbols
+
+
+def load_frame(symbol: str) -> Optional[pd.DataFrame]:
+    rows = json.loads((HISTORY_DIR / f"{symbol}.json").read_text())
+    if not rows:
+        return None
+    df = pd.DataFrame(rows).rename(columns={
+        "date": "Date", "open": "Open", "high": "High", "low": "Low", "close": "Close",
+        "volume": "Volume",
+    })
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df.set_index("Date")[["Open", "High", "Low", "Close", "Volume"]].sort_index()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(symbols: List[str], repeat: int = 3, trend_template: bool = True) -> Dict:
+    """Best-of-`repeat` timings; stage totals come from the fastest detect pass."""
+    start = time.perf_counter()
+    frames = {s: df for s in symbols if (df := load_frame(s)) is not None}
+    load_s = time.perf_counter() - start
+
+    best = None
+    for _ in range(repeat):
+        stats = StageStats()
+        detector = VCPDetector(check_trend_template=trend_template, stage_sink=stats)
+        start = time.perf_counter()
+        for symbol, df in frames.items():
+            # detect_vcp adds indicator columns to its input
+            detector.detect_vcp(df.copy(), symbol)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best["detect_s"]:
+            best = {"detect_s": elapsed, "stats": stats.to_dict()}
+
+    scan_s = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # scan_for_vcp prints per symbol
+            scan_for_vcp(
+                list(frames), lambda s: frames[s].copy(), check_trend_template=trend_template
+            )
+        scan_s = min(scan_s, time.perf_counter() - start)
+
+    n = len(frames)
+    stages = best["stats"]["stages"]
+    return {
+        "symbols": n,
+        "detected": best["stats"]["detected"],
+        "trend_template": trend_template,
+        "stages": {
+            "load": {"ms": load_s * 1000, "calls": n},
+            **{
+                stage: {
+                    "ms": stages.get(stage, {}).get("total_ms", 0.0),
+                    "calls": stages.get(stage, {}).get("count", 0),
+                }
+                for stage in STAGES
+            },
+        },
+        "rejections": best["stats"]["rejections"],
+        "detect_symbols_per_s": n / best["detect_s"] if best["detect_s"] else 0.0,
+        "scan_symbols_per_s": n / scan_s if scan_s else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Regression messages for throughput metrics more than `tolerance` below baseline."""
+    problems = []
+    for key in ("detect_symbols_per_s", "scan_symbols_per_s"):
+        expected = baseline.get(key)
+        if expected and result[key] < expected * (1 - tolerance):
+            problems.append(
+                f"{key} {result[key]:.1f} is {1 - result[key] / expected:.0%} below "
+                f"baseline {expected:.1f}"
+            )
+    return problems
+
+
+def report(result: Dict) -> None:
+    n = result["symbols"] or 1
+    total = sum(stage["ms"] for stage in result["stages"].values()) or 1.0
+    print(f"[bench_scan] {result['symbols']} symbols, {result['detected']} detected "
+          f"(trend template {'on' if result['trend_template'] else 'off'})")
+    print(f"  {'stage':<15}{'total ms':>10}{'us/symbol':>11}{'calls':>8}{'share':>8}")
+    for stage, row in result["stages"].items():
+        print(f"  {stage:<15}{row['ms']:>10.1f}{row['ms'] * 1000 / n:>11.0f}"
+              f"{row['calls']:>8}{row['ms'] / total:>8.0%}")
+    for stage, reasons in result.get("rejections", {}).items():
+        top = ", ".join(f"{r} x{c}" for r, c in sorted(reasons.items(), key=lambda kv: -kv[1])[:4])
+        print(f"  rejected at {stage}: {top}")
+    print(f"  detect_vcp: {result['detect_symbols_per_s']:.0f} symbols/s, "
+          f"scan_for_vcp: {result['scan_symbols_per_s']:.0f} symbols/s, "
+          f"peak RSS {result['peak_rss_mb']:.0f} MB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--limit", type=int, help="only the first N symbols")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-trend-template", action="store_true",
+                        help="run every symbol through all stages")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print the raw result as JSON")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(corpus_symbols(args.limit), args.repeat, not args.no_trend_template)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        report(result)
+
+    mode = "trend_template" if result["trend_template"] else "all_stages"
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update_baseline:
+        baselines[mode] = result
+        args.baseline.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"[bench_scan] {mode} baseline written to {args.baseline}")
+        return 0
+    baseline = baselines.get(mode)
+    if baseline is None:
+        print(f"[bench_scan] no {mode} baseline; run with --update-baseline to record one")
+        return 0
+    if baseline.get("symbols") != result["symbols"]:
+        print("[bench_scan] baseline was recorded on a different corpus; not comparing")
+        return 0
+    problems = compare(result, baseline, args.tolerance)
+    for problem in problems:
+        print(f"[bench_scan] REGRESSION {problem}")
+    if not problems:
+        print("[bench_scan] OK")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Cold-start guard for the API process.
+
+Imports `app.legend_ai_backend` in a fresh interpreter under `-X importtime`,
+prints the slowest imports, and fails if the total exceeds the budget or if any
+module that is supposed to be deferred (pandas, yfinance, ...) was pulled in at
+import time.
+
+Usage: python scripts/check_import_time.py [--budget-ms 1500] [--top 15]
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+TARGET = "app.legend_ai_backend"
+DEFAULT_BUDGET_MS = 1500
+# Loaded lazily on first use or by the startup warm-up thread
+DEFERRED_MODULES = ("pandas", "yfinance", "vcp_ultimate_algorithm", "app.local_dataset")
+
+
+def fail(msg: str) -> None:
+    print(f"[check_import_time] {msg}")
+    sys.exit(1)
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Rows of (module, self_us, cumulative_us) from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=int, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    probe = (
+        f"import sys, {TARGET}; "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    )
+    if proc.returncode != 0:
+        fail(f"importing {TARGET} failed:\n{proc.stderr[-2000:]}")
+
+    rows = parse_importtime(proc.stderr)
+    total = next((cum for name, _, cum in rows if name == TARGET), None)
+    if total is None:
+        fail(f"no importtime entry for {TARGET}")
+
+    print(f"[check_import_time] {TARGET}: {total / 1000:.0f} ms (budget {args.budget_ms} ms)")
+    for name, self_us, cum_us in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+        print(f"  {cum_us / 1000:8.1f} ms cumulative {self_us / 1000:8.1f} ms self  {name}")
+
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    if loaded:
+        fail(f"deferred modules imported eagerly: {', '.join(loaded)}")
+    if total / 1000 > args.budget_ms:
+        fail(f"import time {total / 1000:.0f} ms exceeds budget {args.budget_ms} ms")
+    print("[check_import_time] OK")
+
+
+if __name__ == "__main__":
+    main()
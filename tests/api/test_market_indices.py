@@ -0,0 +1,25 @@
+import pytest
+from starlette.testclient import TestClient
+
+try:
+    from app.legend_ai_backend import app
+except Exception:  # pragma: no cover
+    pytest.skip("app not importable", allow_module_level=True)
+
+
+def test_market_indices_points_and_compact_agree():
+    c = TestClient(app)
+    points = c.get("/api/market/indices")
+    compact = c.get("/api/market/indices", params={"format": "compact"})
+    assert points.status_code == 200 and compact.status_code == 200
+
+    for full, packed in zip(points.json()["indices"], compact.json()["indices"]):
+        assert full["symbol"] == packed["symbol"]
+        assert [p["time"] for p in full["sparkline"]] == packed["times"]
+        assert [p["close"] for p in full["sparkline"]] == packed["closes"]
+        assert packed["last_price"] == packed["closes"][-1]
+
+
+def test_market_indices_rejects_unknown_format():
+    c = TestClient(app)
+    assert c.get("/api/market/indices", params={"format": "csv"}).status_code == 422
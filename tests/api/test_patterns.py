@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+try:
+    from app.db import async_database_url
+    from app.legend_ai_backend import app
+except Exception:  # pragma: no cover
+    pytest.skip("app not importable", allow_module_level=True)
+
+
+def test_patterns_all_v1_shape():
+    c = TestClient(app)
+    r = c.get("/v1/patterns/all", params={"limit": 5})
+    assert r.status_code == 200
+    body = r.json()
+    assert {"items", "next"}.issubset(body.keys())
+    assert len(body["items"]) <= 5
+
+
+def test_async_database_url_mapping():
+    url, args = async_database_url("postgresql://u:p@db.example.com/legend?sslmode=require")
+    assert url == "postgresql+asyncpg://u:p@db.example.com/legend"
+    assert args == {"ssl": "require"}
+    assert async_database_url("sqlite:///./legendai.db") == (
+        "sqlite+aiosqlite:///./legendai.db", {}
+    )
+    assert async_database_url("mysql://u@h/db") == (None, {})
+
+
+def test_patterns_all_v1_body_matches_model():
+    from app.legend_ai_backend import PaginatedPatterns
+
+    r = TestClient(app).get("/v1/patterns/all", params={"limit": 5})
+    assert r.headers["content-type"] == "application/json"
+    PaginatedPatterns.parse_raw(r.content)
+
+
+def test_root_patterns_cache_hit_returns_stored_bytes(monkeypatch):
+    import legend_ai_backend as root
+
+    body = b'[{"symbol":"AAPL","name":"Apple","sector":"Tech","pattern_type":"VCP"}]'
+
+    class _Cache:
+        def get(self, key):
+            return body
+
+    monkeypatch.setattr(root, "redis_client", _Cache())
+    response = root.get_all_patterns(fields=None, format="rows", db=None)
+    assert response.body == body
+    assert response.media_type == "application/json"
+
+
+def test_dumps_handles_datetimes_and_numpy():
+    from datetime import datetime
+
+    import numpy as np
+
+    from app.responses import dumps
+
+    encoded = dumps({"as_of": datetime(2024, 1, 2, 3, 4, 5), "n": np.float64(1.5), "k": [1]})
+    assert json.loads(encoded) == {"as_of": "2024-01-02T03:04:05", "n": 1.5, "k": [1]}
+
+
+def test_patterns_all_projection_and_columns(monkeypatch):
+    import legend_ai_backend as root
+
+    full = [
+        {"symbol": "AAPL", "name": "Apple", "sector": "Tech", "confidence": 0.9},
+        {"symbol": "MSFT", "name": "Microsoft", "sector": "Tech", "confidence": 0.7},
+    ]
+
+    class _Cache:
+        def get(self, key):
+            return json.dumps(full)
+
+    monkeypatch.setattr(root, "redis_client", _Cache())
+    c = TestClient(app)
+    assert c.get("/api/patterns/all").json() == full
+    slim = c.get("/api/patterns/all", params={"fields": "symbol,confidence"}).json()
+    assert slim == [{"symbol": r["symbol"], "confidence": r["confidence"]} for r in full]
+
+    cols = c.get("/api/patterns/all", params={"fields": "symbol", "format": "columns"}).json()
+    assert cols == {"fields": ["symbol"], "count": 2, "columns": {"symbol": ["AAPL", "MSFT"]}}
+
+    assert c.get("/api/patterns/all", params={"fields": "nope"}).status_code == 422
+
+
+def test_dumps_fallback_matches_orjson_for_non_finite(monkeypatch):
+    from app import responses
+
+    content = {"a": float("nan"), "b": [float("inf"), 1.5], "c": (float("-inf"),)}
+    monkeypatch.setattr(responses, "orjson", None)
+    assert responses.dumps(content) == b'{"a":null,"b":[null,1.5],"c":[null]}'
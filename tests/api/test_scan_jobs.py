@@ -0,0 +1,101 @@
+import json
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.scan_jobs import MAX_QUEUED, QueueFull, ScanJobManager
+
+try:
+    import app.legend_ai_backend as backend
+except Exception:  # pragma: no cover
+    pytest.skip("app not importable", allow_module_level=True)
+
+
+def _scan_one(ticker, as_of):
+    if ticker == "BAD":
+        raise RuntimeError("provider down")
+    if ticker.startswith("V"):
+        record = {"ticker": ticker, "pattern": "VCP", "as_of": as_of, "confidence": 80.0,
+                  "rs": None, "price": 10.0, "meta": "{}"}
+        return f"✓ {ticker}: VCP", record
+    return f"✗ {ticker}: no VCP", None
+
+
+def _wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+def test_job_persists_in_batches_and_records_failures():
+    batches = []
+    manager = ScanJobManager(_scan_one, batches.append, persist_every=2)
+    job = manager.submit(["V1", "A", "BAD", "V2", "V3"])
+    _wait(job)
+
+    snap = job.snapshot()
+    assert snap["status"] == "done" and snap["processed"] == 5 and snap["failed"] == 1
+    assert [r["ticker"] for batch in batches for r in batch] == ["V1", "V2", "V3"]
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert len({r["as_of"] for batch in batches for r in batch}) == 1
+    assert snap["results"][2].startswith("⚠ BAD")
+    assert [p["ticker"] for p in snap["patterns"]] == ["V1", "V2", "V3"]
+    manager.shutdown()
+
+
+def test_persist_error_fails_the_job():
+    def persist(records):
+        raise RuntimeError("db down")
+
+    manager = ScanJobManager(_scan_one, persist)
+    job = manager.submit(["V1"])
+    _wait(job)
+    assert job.status == "failed" and job.error == "db down"
+    manager.shutdown()
+
+
+def test_queue_is_bounded():
+    release = []
+
+    def slow(ticker, as_of):
+        while not release:
+            time.sleep(0.01)
+        return "ok", None
+
+    manager = ScanJobManager(slow, lambda records: None)
+    first = manager.submit(["A"])
+    while first.status == "queued":
+        time.sleep(0.01)
+    for _ in range(MAX_QUEUED):
+        manager.submit(["A"])
+    with pytest.raises(QueueFull):
+        manager.submit(["A"])
+    release.append(True)
+    manager.shutdown()
+
+
+def test_run_scan_returns_job_and_progress_is_followable(monkeypatch):
+    manager = ScanJobManager(_scan_one, lambda records: None)
+    monkeypatch.setattr(backend, "scan_jobs", manager)
+    client = TestClient(backend.app)
+
+    resp = client.post("/admin/run-scan", params={"limit": 3})
+    assert resp.status_code == 202
+    body = resp.json()
+    assert body["status_url"] == f"/admin/scan-jobs/{body['job_id']}"
+
+    with client.stream("GET", body["status_url"], params={"follow": "true"}) as stream:
+        assert stream.headers["content-type"] == "application/x-ndjson"
+        events = [json.loads(line) for line in stream.iter_lines() if line]
+    assert events[-1]["status"] == "done"
+    assert events[-1]["processed"] == body["total"]
+    lines = [line for event in events for line in event["results"]]
+    assert len(lines) == body["total"]  # each result line is sent once
+
+    snapshot = client.get(body["status_url"]).json()
+    assert snapshot["results"] == lines
+    assert client.get("/admin/scan-jobs/nope").status_code == 404
+    assert [j["id"] for j in client.get("/admin/scan-jobs").json()["jobs"]] == [body["job_id"]]
+    manager.shutdown()
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+def trending_series(seed, n=300):
+    '''Seeded synthetic uptrend with a slow wave, enough to form VCP bases.'''
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0012, 0.02, n) + 0.01 * np.sin(np.arange(n) / 9)))
+    return pd.DataFrame({
+        "Open": close,
+        "High": close * (1 + rng.uniform(0, 0.02, n)),
+        "Low": close * (1 - rng.uniform(0, 0.02, n)),
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 3_000_000, n),
+    }, index=pd.bdate_range("2020-01-01", periods=n))
+
+
+@pytest.fixture()
+def trending():
+    return trending_series
+
+
+@pytest.fixture()
+def db_session():
+    '''Session on a fresh in-memory SQLite database with the backend schema.'''
+    try:
+        from legend_ai_backend import Base
+    except Exception:  # pragma: no cover
+        pytest.skip("backend not importable")
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
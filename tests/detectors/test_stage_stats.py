@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from vcp_ultimate_algorithm import STAGES, Contraction, StageStats, VCPDetector
+
+
+def _frame(closes, volume=2_000_000):
+    closes = np.asarray(closes, dtype=float)
+    index = pd.date_range("2025-01-01", periods=len(closes), freq="B")
+    return pd.DataFrame({
+        "Open": closes, "High": closes * 1.01, "Low": closes * 0.99, "Close": closes,
+        "Volume": np.full(len(closes), volume),
+    }, index=index)
+
+
+def test_sink_records_stage_latencies_and_rejection_reasons():
+    stats = StageStats(keep_tickers=True)
+    detector = VCPDetector(check_trend_template=True, stage_sink=stats)
+
+    thin = detector.detect_vcp(_frame([50.0] * 120, volume=1_000), "THIN")
+    short = detector.detect_vcp(_frame([50.0] * 20), "SHORT")
+    weak = detector.detect_vcp(_frame(np.linspace(120, 60, 260)), "WEAK")
+
+    assert (thin.rejected_stage, thin.rejection) == ("validate", "min_volume")
+    assert short.rejection == "insufficient_data"
+    assert weak.rejected_stage == "trend_template"
+    assert weak.rejection.startswith("trend_template_")
+
+    out = stats.to_dict()
+    assert out["scanned"] == 3 and out["detected"] == 0
+    assert out["rejections"]["validate"] == {"min_volume": 1, "insufficient_data": 1}
+    assert list(out["stages"]) == ["validate", "trend_template"]
+    assert out["stages"]["validate"]["count"] == 3
+    assert sum(out["stages"]["validate"]["histogram"].values()) == 3
+    assert set(out["tickers"]["WEAK"]["stages_ms"]) == {"validate", "trend_template"}
+    assert "rejected at validate: min_volume x1" in stats.summary()
+
+
+def test_detection_is_unchanged_without_a_sink():
+    df = _frame(np.linspace(60, 120, 260) + 5 * np.sin(np.arange(260) / 6))
+    plain = VCPDetector(check_trend_template=False).detect_vcp(df.copy(), "X")
+    stats = StageStats()
+    hooked = VCPDetector(check_trend_template=False, stage_sink=stats).detect_vcp(df.copy(), "X")
+
+    assert plain.detected == hooked.detected and plain.notes == hooked.notes
+    assert (plain.rejected_stage, plain.rejection) == (hooked.rejected_stage, hooked.rejection)
+    assert set(stats.to_dict()["stages"]) <= set(STAGES)
+
+
+def test_error_after_scoring_starts_is_not_reported_as_a_detection():
+    # _score_signal sets detected before computing the pivot; an exception there
+    # must not leave a half-scored signal marked as detected
+    class BrokenPivot(VCPDetector):
+        def _identify_contractions(self, df, swing_highs, swing_lows):
+            day = df.index[-1]
+            return 0, [Contraction(day, day, 110.0, 100.0, 0.09, 1e6, 5),
+                       Contraction(day, day, 108.0, 104.0, 0.04, 8e5, 5)]
+
+
+        def _calculate_pivot_price(self, df, contractions):
+            raise RuntimeError("no pivot")
+
+    stats = StageStats()
+    df = _frame(np.linspace(60, 120, 260) + 5 * np.sin(np.arange(260) / 6))
+    signal = BrokenPivot(check_trend_template=False, stage_sink=stats).detect_vcp(df, "ERR")
+
+    assert not signal.detected
+    assert (signal.rejected_stage, signal.rejection) == ("scoring", "error:RuntimeError")
+    assert "Error in VCP detection: no pivot" in signal.notes
+    assert stats.to_dict()["rejections"] == {"scoring": {"error:RuntimeError": 1}}
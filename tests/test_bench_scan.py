@@ -0,0 +1,32 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "bench_scan.py"
+spec = importlib.util.spec_from_file_location("bench_scan", SCRIPT)
+bench_scan = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench_scan)
+
+
+def test_benchmark_times_every_stage():
+    symbols = bench_scan.corpus_symbols(limit=8)
+    if not symbols:
+        pytest.skip("no price history corpus")
+    result = bench_scan.run_benchmark(symbols, repeat=1, trend_template=False)
+
+    assert result["symbols"] == len(symbols)
+    assert list(result["stages"]) == ["load", *bench_scan.STAGES]
+    assert result["stages"]["validate"]["calls"] == len(symbols)
+    assert result["detect_symbols_per_s"] > 0 and result["peak_rss_mb"] > 0
+
+
+def test_compare_flags_throughput_regressions_only():
+    baseline = {"detect_symbols_per_s": 1000.0, "scan_symbols_per_s": 1000.0}
+    assert bench_scan.compare({"detect_symbols_per_s": 850.0, "scan_symbols_per_s": 2000.0},
+                              baseline, tolerance=0.2) == []
+    problems = bench_scan.compare({"detect_symbols_per_s": 700.0, "scan_symbols_per_s": 1000.0},
+                                  baseline, tolerance=0.2)
+    assert len(problems) == 1 and problems[0].startswith("detect_symbols_per_s")
@@ -0,0 +1,129 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+
+pytest.importorskip("celery")
+pd = pytest.importorskip("pandas")
+
+from worker import celery_app, utils  # noqa: E402
+
+MIGRATIONS = Path(__file__).parent.parent / "migrations" / "sql"
+PATTERNS_DDL = MIGRATIONS / "0001_create_patterns_table.sql"
+TICKERS = [f"T{i:02d}" for i in range(7)]
+
+
+@pytest.fixture()
+def engine(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'scan.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    engine = celery_app.get_engine()
+    raw = engine.raw_connection()
+    try:
+        raw.driver_connection.executescript(PATTERNS_DDL.read_text())
+    finally:
+        raw.close()
+    # In-memory broker and backend, tasks run inline
+    monkeypatch.setattr(celery_app.celery.conf, "broker_url", "memory://")
+    monkeypatch.setattr(celery_app.celery.conf, "result_backend", "cache+memory://")
+    monkeypatch.setattr(celery_app.celery.conf, "task_always_eager", True)
+    monkeypatch.setattr(celery_app.celery.conf, "task_eager_propagates", True)
+    yield engine
+    engine.dispose()
+
+
+def _frame(ticker):
+    dates = pd.date_range("2025-01-01", periods=60, freq="B")
+    return pd.DataFrame({"Date": dates, "Open": 10.0, "High": 11.0, "Low": 9.0,
+                         "Close": 10.5, "Volume": 1e6})
+
+
+def _fake_fetch(failing=()):
+    calls = []
+
+    def fetch(ticker, period="1y"):
+        calls.append(ticker)
+        if ticker in failing:
+            raise RuntimeError("provider down")
+        return _frame(ticker)
+
+    return fetch, calls
+
+
+def _fake_detect(ticker, df, as_of=None):
+    if df is None or int(ticker[1:]) % 3:
+        return []
+    return [{"ticker": ticker, "pattern": "VCP", "as_of": as_of, "confidence": 80.0,
+             "rs": None, "price": float(df["Close"].iloc[-1]), "meta": {"contractions": 3}}]
+
+
+def test_chunked_scan_persists_patterns_progress_and_one_run(engine, monkeypatch):
+    fetch, _ = _fake_fetch(failing={"T04"})
+    monkeypatch.setattr(utils, "fetch_price_data", fetch)
+    monkeypatch.setattr(utils, "vcp_records", _fake_detect)
+
+    summary = celery_app.start_scan(TICKERS, chunk_size=3, run_key="celery:test").get()
+
+    assert summary == {"run_key": "celery:test", "chunks": 3, "total": 7, "failed": 1,
+                       "patterns": 3}
+    with engine.connect() as conn:
+        rows = conn.execute(sa.text("SELECT ticker, as_of FROM patterns ORDER BY ticker")).all()
+        progress = dict(conn.execute(sa.text(
+            "SELECT symbol, status FROM scan_progress WHERE run_key = 'celery:test'")).all())
+        runs = conn.execute(
+            sa.text("SELECT total_tickers, failed_count, notes FROM scan_runs")
+        ).all()
+    assert [r.ticker for r in rows] == ["T00", "T03", "T06"]
+    assert len({r.as_of for r in rows}) == 1  # one as_of for the whole run
+    assert progress.pop("T04") == "failed"
+    assert set(progress.values()) == {"done"} and len(progress) == 6
+    assert runs == [(7, 1, "celery scan celery:test")]
+
+
+def test_only_a_fully_failed_chunk_is_retried(engine, monkeypatch):
+    fetch, _ = _fake_fetch(failing={"T00", "T01"})
+    monkeypatch.setattr(utils, "fetch_price_data", fetch)
+
+    partial = celery_app.fetch_chunk(["T00", "T02"])
+    assert list(partial["candles"]) == ["T02"] and partial["failed"] == {"T00": "provider down"}
+    with pytest.raises(celery_app.ChunkFetchError):
+        celery_app.fetch_chunk(["T00", "T01"])
+    assert celery_app.fetch_chunk.autoretry_for == (celery_app.ChunkFetchError,)
+    assert celery_app.fetch_chunk.max_retries == celery_app.FETCH_RETRIES
+
+
+def test_chunk_out_of_fetch_retries_fails_only_its_tickers(engine, monkeypatch):
+    fetch, calls = _fake_fetch(failing={"T00", "T01"})
+    monkeypatch.setattr(utils, "fetch_price_data", fetch)
+    monkeypatch.setattr(utils, "vcp_records", _fake_detect)
+    # Eager mode only replays retries when it does not propagate the Retry
+    monkeypatch.setattr(celery_app.celery.conf, "task_eager_propagates", False)
+
+    summary = celery_app.start_scan(
+        ["T00", "T01", "T02", "T03"], chunk_size=2, run_key="celery:outage"
+    ).get()
+
+    assert summary["total"] == 4 and summary["failed"] == 2 and summary["patterns"] == 1
+    assert calls.count("T00") == celery_app.FETCH_RETRIES + 1
+    with engine.connect() as conn:
+        progress = dict(conn.execute(sa.text(
+            "SELECT symbol, status FROM scan_progress WHERE run_key = 'celery:outage'")).all())
+        runs = conn.execute(sa.text("SELECT total_tickers, failed_count FROM scan_runs")).all()
+    assert progress == {"T00": "failed", "T01": "failed", "T02": "done", "T03": "done"}
+    assert runs == [(4, 2)]
+
+
+def test_candles_round_trip_to_detector_frame():
+    candles = celery_app.to_candles(_frame("T00"))
+    assert candles[0]["date"] == "2025-01-01" and candles[0]["close"] == 10.5
+    df = celery_app.to_frame(candles)
+    assert list(df.columns) == ["Date", "Open", "High", "Low", "Close", "Volume"]
+    assert df["Date"].iloc[0] == datetime(2025, 1, 1)
+
+
+def test_start_scan_without_a_broker_raises(monkeypatch):
+    monkeypatch.setattr(celery_app.celery.conf, "broker_url", None)
+    monkeypatch.setattr(celery_app.celery.conf, "task_always_eager", False)
+    with pytest.raises(RuntimeError, match="No Celery broker"):
+        celery_app.start_scan(["T00"])
@@ -0,0 +1,26 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_app_import_defers_data_stack():
+    probe = (
+        "import sys, app.legend_ai_backend; "
+        "print(','.join(m for m in ('pandas', 'yfinance', 'vcp_ultimate_algorithm') "
+        "if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, cwd=ROOT, timeout=120
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == ""
+
+
+def test_lazy_helpers_initialise_once():
+    from app import legend_ai_backend as api
+
+    detector = api._get_detector()
+    assert api._get_detector() is detector
+    assert api._get_local_dataset() is api._get_local_dataset()
@@ -0,0 +1,58 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.compression import CompressionMiddleware, negotiate_encoding
+
+BIG = {"rows": [{"symbol": f"T{i}", "confidence": 0.5} for i in range(200)]}
+
+
+def _client() -> TestClient:
+    async def big(request):
+        return JSONResponse(BIG)
+
+    async def small(request):
+        return PlainTextResponse("ok")
+
+    async def stream(request):
+        async def chunks():
+            for _ in range(3):
+                yield b"x" * 2048
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app = Starlette(routes=[Route("/big", big), Route("/small", small), Route("/stream", stream)])
+    app.add_middleware(CompressionMiddleware, minimum_size=512)
+    return TestClient(app)
+
+
+def test_large_json_is_gzipped():
+    r = _client().get("/big", headers={"accept-encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in r.headers["vary"].lower()
+    assert int(r.headers["content-length"]) < len(r.content)
+    assert r.json() == BIG
+
+
+def test_small_streaming_and_unaccepted_pass_through():
+    c = _client()
+    assert "content-encoding" not in c.get("/small", headers={"accept-encoding": "gzip"}).headers
+    streamed = c.get("/stream", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in streamed.headers
+    assert streamed.content == b"x" * 6144
+    assert "content-encoding" not in c.get("/big", headers={"accept-encoding": "identity"}).headers
+
+
+def test_negotiate_encoding_honours_q_values():
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("deflate, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("*") in ("br", "gzip")
+
+
+def test_brotli_preferred_when_available():
+    pytest.importorskip("brotli")
+    r = _client().get("/big", headers={"accept-encoding": "gzip, br"})
+    assert r.headers["content-encoding"] == "br"
+    assert r.json() == BIG
@@ -0,0 +1,130 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+try:
+    from legend_ai_backend import PatternDetectionRunner
+except Exception:  # pragma: no cover
+    pytest.skip("backend not importable", allow_module_level=True)
+
+
+class InlineExecutor:
+    """Runs the job in submit(), so the returned future is already done."""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.shut_down = False
+
+    def submit(self, fn):
+        if self.broken:
+            raise BrokenProcessPool("child died")
+        future = Future()
+        try:
+            future.set_result(fn())
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def _wait_idle(runner, timeout=5):
+    done = threading.Event()
+
+    def poll():
+        while runner.running or runner.status()["queued"]:
+            threading.Event().wait(0.01)
+        done.set()
+
+    threading.Thread(target=poll, daemon=True).start()
+    assert done.wait(timeout)
+
+
+def test_trigger_while_running_is_queued_once_then_dropped_and_rerun():
+    release, calls = threading.Event(), []
+
+    def slow_pass():
+        calls.append(1)
+        release.wait(5)
+        return {"patterns": len(calls)}
+
+    completed = []
+    runner = PatternDetectionRunner(
+        on_complete=lambda: completed.append(1), target=slow_pass,
+        executor_factory=lambda: ThreadPoolExecutor(max_workers=1),
+    )
+    try:
+        assert runner.submit() == "started"
+        assert runner.submit() == "queued"
+        assert runner.submit() == "dropped"
+        assert runner.status()["queued"] and runner.dropped == 1
+
+        release.set()
+        _wait_idle(runner)
+        # The queued trigger ran once the first pass finished
+        assert len(calls) == 2 and len(completed) == 2
+        assert runner.last_result == {"patterns": 2}
+    finally:
+        runner.shutdown()
+
+
+def test_failed_pass_is_recorded_and_the_next_one_runs():
+    outcomes = iter([RuntimeError("db down"), {"patterns": 3}])
+
+    def flaky_pass():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    runner = PatternDetectionRunner(target=flaky_pass, executor_factory=InlineExecutor)
+    assert runner.submit() == "started"
+    assert runner.last_error == "db down" and not runner.running
+    assert runner.submit() == "started"
+    assert runner.last_error is None and runner.last_result == {"patterns": 3}
+
+
+def test_already_finished_future_does_not_deadlock():
+    runner = PatternDetectionRunner(target=lambda: {"ok": True}, executor_factory=InlineExecutor)
+    worker = threading.Thread(target=runner.submit, daemon=True)
+    worker.start()
+    worker.join(2)
+    assert not worker.is_alive()
+    assert runner.last_result == {"ok": True}
+
+
+def test_broken_process_pool_is_replaced():
+    pools = []
+
+    def factory():
+        # The first pool's child is already dead; later pools work
+        pools.append(InlineExecutor(broken=not pools))
+        return pools[-1]
+
+    runner = PatternDetectionRunner(target=lambda: {"patterns": 1}, executor_factory=factory)
+    assert runner.submit() == "started"
+    assert len(pools) == 2 and pools[0].shut_down
+    assert runner.last_result == {"patterns": 1}
+
+
+def test_pass_killed_mid_run_resets_the_pool():
+    pools = []
+
+    class DyingExecutor(InlineExecutor):
+        def submit(self, fn):
+            future = Future()
+            future.set_exception(BrokenProcessPool("child killed"))
+            return future
+
+    def factory():
+        pools.append(DyingExecutor() if not pools else InlineExecutor())
+        return pools[-1]
+
+    runner = PatternDetectionRunner(target=lambda: {"patterns": 2}, executor_factory=factory)
+    assert runner.submit() == "started"
+    assert runner.last_error.startswith("detection process died") and pools[0].shut_down
+    assert runner.submit() == "started"
+    assert len(pools) == 2 and runner.last_result == {"patterns": 2}
@@ -0,0 +1,43 @@
+import json
+
+from app.local_dataset import LocalDataset, build_index
+
+
+def _write_source(path):
+    rows = [
+        {"Date": "2025-01-03", "Open": 2, "High": 3, "Low": 1, "Close": 2.5, "Volume": 200},
+        {"Date": "2025-01-02", "Open": 1, "High": 2, "Low": 0.5, "Close": 1.5, "Volume": 100},
+    ]
+    payload = {
+        "market_data": {
+            "AAA": {"info": {"name": "Triple A", "sector": "Tech"}, "data": rows},
+            "BBB": {"info": {"name": "Bee"}, "data": rows[:1]},
+        }
+    }
+    path.write_text(json.dumps(payload))
+
+
+def test_indexed_lookup_matches_source(tmp_path):
+    source = tmp_path / "legend_ai_data.json"
+    _write_source(source)
+    index_dir = build_index(source, tmp_path / "idx")
+
+    ds = LocalDataset(source, index_dir)
+    assert ds.memory_mapped
+    df = ds.frame("aaa")
+    assert list(df["Close"]) == [1.5, 2.5]
+    assert str(df["Date"].iloc[0].date()) == "2025-01-02"
+    assert ds.info("AAA")["name"] == "Triple A"
+    assert len(ds.frame("BBB")) == 1
+    assert ds.frame("ZZZ") is None
+
+
+def test_stale_index_falls_back_to_json(tmp_path):
+    source = tmp_path / "legend_ai_data.json"
+    _write_source(source)
+    index_dir = build_index(source, tmp_path / "idx")
+    source.write_text(source.read_text() + " ")
+
+    ds = LocalDataset(source, index_dir)
+    assert not ds.memory_mapped
+    assert list(ds.frame("AAA")["Volume"]) == [100, 200]
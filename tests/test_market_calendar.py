@@ -0,0 +1,46 @@
+from datetime import date, datetime
+
+from market_calendar import (
+    ET,
+    holidays,
+    is_market_open,
+    is_trading_day,
+    next_trading_day,
+    previous_trading_day,
+    session,
+)
+
+
+def test_holidays_match_published_schedule():
+    assert holidays(2025) == {
+        date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17),
+        date(2025, 4, 18), date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4),
+        date(2025, 9, 1), date(2025, 11, 27), date(2025, 12, 25),
+    }
+
+
+def test_weekend_holidays_are_observed():
+    assert date(2026, 7, 3) in holidays(2026)  # July 4 on a Saturday
+    assert date(2022, 12, 26) in holidays(2022)  # Christmas on a Sunday
+    # A Saturday New Year's Day is not observed on the Friday before
+    assert date(2021, 12, 31) not in holidays(2021)
+    assert date(2022, 1, 1) not in holidays(2022)
+    assert date(2021, 6, 18) not in holidays(2021)  # Juneteenth starts in 2022
+
+
+def test_sessions_and_early_closes():
+    assert session(date(2025, 12, 25)) is None
+    assert session(date(2025, 12, 27)) is None  # Saturday
+    assert session(date(2025, 11, 28))[1].hour == 13  # day after Thanksgiving
+    assert session(date(2025, 12, 24))[1].hour == 13
+    assert session(date(2025, 12, 23))[1].hour == 16
+
+    assert is_market_open(datetime(2025, 12, 23, 9, 30, tzinfo=ET))
+    assert not is_market_open(datetime(2025, 12, 23, 16, 0, tzinfo=ET))
+    assert not is_market_open(datetime(2025, 12, 24, 14, 0, tzinfo=ET))
+
+
+def test_trading_day_navigation():
+    assert not is_trading_day(date(2025, 4, 18))  # Good Friday
+    assert previous_trading_day(date(2025, 4, 21)) == date(2025, 4, 17)
+    assert next_trading_day(date(2025, 12, 24)) == date(2025, 12, 26)
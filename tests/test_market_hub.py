@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+
+import pytest
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from market_hub import MarketDataHub
+
+
+class ScriptedFeed:
+    def __init__(self, ticks):
+        self.ticks = list(ticks)
+
+    async def next_tick(self):
+        return self.ticks.pop(0) if self.ticks else {}
+
+
+def _symbols(message):
+    return [u["symbol"] for u in json.loads(message)["updates"]]
+
+
+def test_hub_broadcasts_diffs_with_symbol_filters():
+    async def scenario():
+        hub = MarketDataHub(ScriptedFeed([]), interval=60)
+        everyone = hub.subscribe()
+        only_msft = hub.subscribe(["msft"])
+
+        hub.publish({"AAPL": {"price": 100.0, "volume": 10},
+                     "MSFT": {"price": 200.0, "volume": 10}})
+        hub.publish({"AAPL": {"price": 101.0, "volume": 10},
+                     "MSFT": {"price": 200.0, "volume": 10}})
+
+        assert _symbols(everyone.queue.get_nowait()) == ["AAPL", "MSFT"]
+        second = json.loads(everyone.queue.get_nowait())
+        assert [u["symbol"] for u in second["updates"]] == ["AAPL"]
+        assert second["updates"][0]["price_change"] == 1.0
+
+        assert _symbols(only_msft.queue.get_nowait()) == ["MSFT"]
+        assert only_msft.queue.empty()
+        assert _symbols(hub.snapshot(only_msft.symbols)) == ["MSFT"]
+
+        hub.unsubscribe(everyone)
+        hub.unsubscribe(only_msft)
+        assert hub.subscriber_count == 0
+
+    asyncio.run(scenario())
+
+
+def test_hub_drops_slow_consumers():
+    async def scenario():
+        hub = MarketDataHub(ScriptedFeed([]), interval=60, queue_size=2)
+        slow = hub.subscribe()
+        for price in (1.0, 2.0, 3.0):
+            hub.publish({"AAPL": {"price": price, "volume": 1}})
+        assert slow.dropped
+        assert hub.subscriber_count == 0
+        assert await slow.next_message() is None
+
+    asyncio.run(scenario())
+
+
+def _backend(monkeypatch):
+    try:
+        import legend_ai_backend as backend
+    except Exception:
+        pytest.skip("backend not importable")
+
+    hub = MarketDataHub(ScriptedFeed([]), interval=60)
+    monkeypatch.setattr(backend, "market_hub", hub)
+    return backend, hub, TestClient(backend.app)
+
+
+def test_websocket_disconnect_is_a_normal_close(monkeypatch, caplog):
+    backend, hub, client = _backend(monkeypatch)
+
+    with client.websocket_connect("/ws/market-data") as ws:
+        assert json.loads(ws.receive_text())["updates"] == []
+
+    assert hub.subscriber_count == 0
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+
+def test_websocket_task_failure_is_logged(monkeypatch, caplog):
+    backend, hub, client = _backend(monkeypatch)
+
+    def broken(symbols=None):
+        raise RuntimeError("encode failed")
+
+    monkeypatch.setattr(hub, "snapshot", broken)
+    ws = client.websocket_connect("/ws/market-data")
+    with ws, pytest.raises(WebSocketDisconnect) as closed:
+        ws.receive_text()
+    assert closed.value.code == 1011
+
+    assert hub.subscriber_count == 0
+    errors = [r for r in caplog.records if r.levelno >= logging.ERROR]
+    assert [r.exc_info[1].args for r in errors] == [("encode failed",)]
+
+
+def test_websocket_cleans_and_validates_symbols(monkeypatch):
+    backend, hub, client = _backend(monkeypatch)
+    hub.publish({"AAPL": {"price": 1.0, "volume": 1}, "MSFT": {"price": 2.0, "volume": 1},
+                 "NVDA": {"price": 3.0, "volume": 1}})
+
+    with client.websocket_connect("/ws/market-data?symbols=AAPL, MSFT") as ws:
+        assert _symbols(ws.receive_text()) == ["AAPL", "MSFT"]
+
+        ws.send_json({"subscribe": "NVDA"})
+        assert "error" in ws.receive_json()
+        ws.send_json({"subscribe": [" nvda "]})
+        assert _symbols(ws.receive_text()) == ["NVDA"]
@@ -0,0 +1,81 @@
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from app.metrics import (
+    CONTENT_TYPE,
+    MetricsMiddleware,
+    render,
+    timed_fetch,
+    track_pool,
+    write_textfile,
+)
+
+
+def test_provider_fetch_latency_is_exported_by_outcome():
+    def broken():
+        raise RuntimeError("down")
+
+    assert timed_fetch("test-provider", lambda: 42) == 42
+    with pytest.raises(RuntimeError):
+        timed_fetch("test-provider", broken)
+
+    lines = render().splitlines()
+    assert "# TYPE legend_provider_fetch_seconds histogram" in lines
+    for outcome in ("ok", "error"):
+        labels = f'outcome="{outcome}",provider="test-provider"'
+        assert f"legend_provider_fetch_seconds_count{{{labels}}} 1.0" in lines
+    assert not [line for line in lines if "_created" in line]
+
+
+def test_pool_gauges_sample_at_scrape_and_never_fail_it():
+    class _Pool:
+        def checkedout(self):
+            return 3
+
+        def size(self):
+            raise RuntimeError("pool gone")
+
+    class _Engine:
+        pool = _Pool()
+
+    track_pool(_Engine())
+    text = render()
+    assert 'legend_db_pool_connections{state="checkedout"} 3.0' in text
+    assert 'legend_db_pool_connections{state="size"} NaN' in text
+
+
+def test_middleware_labels_route_template_not_path():
+    api = FastAPI()
+
+    @api.get("/items/{item_id}")
+    def item(item_id: str):
+        return {"id": item_id}
+
+    api.add_middleware(MetricsMiddleware)
+    client = TestClient(api)
+    for item_id in ("a", "b"):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    client.get("/nope")
+
+    text = render()
+    item_route = 'method="GET",route="/items/{item_id}",status="200"'
+    assert f"legend_http_requests_total{{{item_route}}} 2.0" in text
+    assert 'route="/items/a"' not in text
+    assert 'legend_http_requests_total{method="GET",route="unmatched",status="404"}' in text
+
+
+def test_metrics_endpoint_and_textfile(tmp_path):
+    from app.legend_ai_backend import app
+
+    client = TestClient(app)
+    client.get("/healthz")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == CONTENT_TYPE
+    assert 'route="/healthz"' in resp.text
+    assert 'legend_db_pool_connections{state="checkedout"}' in resp.text
+
+    path = write_textfile(str(tmp_path / "legend.prom"))
+    assert "legend_http_requests_total" in (tmp_path / "legend.prom").read_text()
+    assert path.endswith("legend.prom")
@@ -0,0 +1,68 @@
+import importlib.util
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.middleware import RequestIdMiddleware, SecureHeadersMiddleware
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "bench_middleware.py"
+
+
+def _client() -> TestClient:
+    async def cached(request):
+        return JSONResponse(
+            {"rid": request.state.request_id}, headers={"Cache-Control": "public, max-age=30"}
+        )
+
+    async def stream(request):
+        async def chunks():
+            for i in range(3):
+                yield f"chunk{i}".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app = Starlette(routes=[Route("/cached", cached), Route("/stream", stream)])
+    app.add_middleware(RequestIdMiddleware)
+    app.add_middleware(
+        SecureHeadersMiddleware,
+        headers={"X-Frame-Options": "SAMEORIGIN", "Cache-Control": "no-store"},
+    )
+    return TestClient(app)
+
+
+def test_request_id_is_echoed_or_generated():
+    client = _client()
+    resp = client.get("/cached", headers={"x-request-id": "abc-123"})
+    assert resp.headers["x-request-id"] == "abc-123"
+    assert resp.json()["rid"] == "abc-123"
+
+    generated = client.get("/cached")
+    assert len(generated.headers["x-request-id"]) == 36
+    assert generated.json()["rid"] == generated.headers["x-request-id"]
+
+
+def test_security_headers_keep_endpoint_headers():
+    resp = _client().get("/cached")
+    assert resp.headers["x-frame-options"] == "SAMEORIGIN"
+    assert resp.headers.get_list("cache-control") == ["public, max-age=30"]
+
+
+def test_streaming_responses_pass_through():
+    resp = _client().get("/stream")
+    assert resp.text == "chunk0chunk1chunk2"
+    assert resp.headers["cache-control"] == "no-store"
+    assert resp.headers["x-request-id"]
+
+
+def test_benchmark_reports_overhead_against_bare_starlette():
+    spec = importlib.util.spec_from_file_location("bench_middleware", SCRIPT)
+    bench = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bench)
+
+    results = bench.run_benchmark(requests=50, repeat=1, names=["bare", "base_http", "asgi"])
+    assert set(results) == {"bare", "base_http", "asgi"}
+    assert results["bare"]["overhead_us"] == 0.0
+    assert all(row["requests_per_s"] > 0 for row in results.values())
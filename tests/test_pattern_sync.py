@@ -0,0 +1,44 @@
+import pytest
+
+try:
+    from legend_ai_backend import Pattern, sync_patterns
+except Exception:  # pragma: no cover
+    pytest.skip("backend not importable", allow_module_level=True)
+
+
+def _row(symbol, confidence):
+    return {
+        "symbol": symbol,
+        "confidence": confidence,
+        "pivot_price": 100.0,
+        "stop_loss": 92.0,
+        "days_in_pattern": 10,
+        "pattern_data": {"symbol": symbol},
+    }
+
+
+def test_sync_patterns_diffs_rows(db_session):
+    first = sync_patterns(db_session, [_row("AAPL", 0.8), _row("MSFT", 0.7)])
+    db_session.commit()
+    assert first == {"inserted": 2, "updated": 0, "retired": 0}
+    aapl_id = db_session.query(Pattern.id).filter(Pattern.symbol == "AAPL").scalar()
+
+    second = sync_patterns(db_session, [_row("AAPL", 0.9), _row("NVDA", 0.6)])
+    db_session.commit()
+    assert second == {"inserted": 1, "updated": 1, "retired": 1}
+    rows = {p.symbol: p for p in db_session.query(Pattern).all()}
+    assert set(rows) == {"AAPL", "NVDA"}
+    assert rows["AAPL"].id == aapl_id
+    assert rows["AAPL"].confidence == 0.9
+
+    unchanged = sync_patterns(db_session, [_row("AAPL", 0.9), _row("NVDA", 0.6)])
+    assert unchanged == {"inserted": 0, "updated": 0, "retired": 0}
+
+
+def test_sync_patterns_scope_limits_retirement(db_session):
+    sync_patterns(db_session, [_row("AAPL", 0.8), _row("MSFT", 0.7)])
+    db_session.commit()
+    changes = sync_patterns(db_session, [], scope=["MSFT"])
+    db_session.commit()
+    assert changes["retired"] == 1
+    assert [p.symbol for p in db_session.query(Pattern).all()] == ["AAPL"]
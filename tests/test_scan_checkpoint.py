@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+try:
+    from legend_ai_backend import ScanRun
+    from scan_checkpoint import (
+        latest_run_key,
+        load_progress,
+        plan_resume,
+        record_progress,
+        retry_with_backoff,
+        run_as_of,
+    )
+except Exception:  # pragma: no cover
+    pytest.skip("backend not importable", allow_module_level=True)
+
+
+def test_resume_skips_done_and_retries_failed(db_session):
+    record_progress(db_session, "batch:1", "AAPL", ok=True)
+    record_progress(db_session, "batch:1", "MSFT", ok=False, error="timeout")
+    db_session.commit()
+
+    recorded = load_progress(db_session, "batch:1")
+    assert recorded == {"AAPL": "done", "MSFT": "failed"}
+    assert plan_resume(["AAPL", "MSFT", "NVDA"], recorded) == (["AAPL"], ["MSFT"], ["NVDA"])
+
+    # A retried symbol keeps one row and counts its attempts
+    record_progress(db_session, "batch:1", "MSFT", ok=True)
+    record_progress(db_session, "batch:2", "AAPL", ok=True)
+    db_session.commit()
+    assert load_progress(db_session, "batch:1")["MSFT"] == "done"
+    assert latest_run_key(db_session, "batch:") == "batch:2"
+    assert latest_run_key(db_session, "daily:") is None
+
+
+def test_retry_with_backoff_doubles_delay_then_raises():
+    delays = []
+    calls = []
+
+    def flaky(symbol):
+        calls.append(symbol)
+        if len(calls) < 3:
+            raise RuntimeError("provider outage")
+        return [symbol]
+
+    result = retry_with_backoff(flaky, "AAPL", attempts=3, base_delay=1.0, sleep=delays.append)
+    assert result == ["AAPL"]
+    assert delays == [1.0, 2.0]
+
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        retry_with_backoff(flaky, "AAPL", attempts=2, base_delay=1.0, sleep=delays.append)
+
+
+def test_only_unfinished_daily_scans_resume(db_session):
+    daily_market_scanner = pytest.importorskip("daily_market_scanner")
+
+    db_session.add(ScanRun(started_at=datetime(2026, 10, 1), finished_at=datetime(2026, 10, 1),
+                        notes="daily scan"))
+    db_session.commit()
+    assert daily_market_scanner.resumable_run(db_session) is None
+
+    crashed = ScanRun(started_at=datetime(2026, 10, 2), notes="daily scan")
+    db_session.add(crashed)
+    db_session.commit()
+    assert daily_market_scanner.resumable_run(db_session).id == crashed.id
+
+    crashed.finished_at = datetime(2026, 10, 2)
+    crashed.notes = "daily scan failed: provider outage"
+    db_session.commit()
+    assert daily_market_scanner.resumable_run(db_session).id == crashed.id
+
+
+def test_run_as_of_is_shared_by_a_run_and_by_a_day_of_top_runs():
+    assert run_as_of("batch:20261019T143015") == datetime(2026, 10, 19, 14, 30, 15)
+    morning = run_as_of("batch-top200:20261019T143015", per_day=True)
+    afternoon = run_as_of("batch-top200:20261019T193000", per_day=True)
+    assert morning == afternoon == datetime(2026, 10, 19)
+
+    custom = run_as_of("nightly")
+    assert custom.microsecond == 0 and abs(custom - datetime.utcnow()) < timedelta(minutes=1)
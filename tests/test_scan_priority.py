@@ -0,0 +1,46 @@
+from scan_priority import (
+    history_priors,
+    near_miss_score,
+    order_by_priority,
+    read_near_misses,
+    write_near_misses,
+)
+
+
+def _candles(closes):
+    return [{"date": f"d{i}", "high": c * 1.01, "low": c * 0.99, "close": c, "volume": 1_000_000}
+            for i, c in enumerate(closes)]
+
+
+LEADER = _candles([50 + i * 0.5 for i in range(200)])  # steady uptrend, at its high
+LAGGARD = _candles([150 - i * 0.5 for i in range(200)])  # downtrend, far below its high
+FLAT = _candles([100.0] * 200)
+
+
+def test_history_priors_rank_trend_and_proximity():
+    leader, laggard = history_priors(LEADER), history_priors(LAGGARD)
+    assert leader["trend"] == 1.0 and laggard["trend"] == 0.0
+    assert leader["proximity"] > 0.9 and laggard["proximity"] == 0.0
+    assert leader["return"] > 0 > laggard["return"]
+    assert history_priors([]) == {}
+
+
+def test_order_puts_likely_candidates_first():
+    histories = {"LAG": LAGGARD, "FLAT": FLAT, "LEAD": LEADER, "NEW": []}
+    universe = ["LAG", "NEW", "FLAT", "LEAD"]
+
+    order = order_by_priority(universe, histories.get, near_misses={})
+    assert order[0] == "LEAD" and order[-1] in ("LAG", "NEW")
+
+    # Last scan's detections and near-misses outrank fresh history priors
+    assert order_by_priority(universe, histories.get, active=["NEW"], near_misses={})[0] == "NEW"
+    near = {"LAG": near_miss_score(False, 0.75), "FLAT": near_miss_score(True, 0.0)}
+    assert order_by_priority(universe, histories.get, near_misses=near)[:2] == ["FLAT", "LEAD"]
+
+
+def test_near_misses_merge_across_scans(tmp_path):
+    path = tmp_path / "scan_priority.json"
+    write_near_misses({"AAPL": 0.75, "MSFT": 1.0}, path)
+    write_near_misses({"AAPL": 0.5}, path)
+    assert read_near_misses(path) == {"AAPL": 0.5, "MSFT": 1.0}
+    assert read_near_misses(tmp_path / "missing.json") == {}
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+try:
+    import legend_ai_backend as backend
+    from legend_ai_backend import Pattern, ScanRun, Stock
+except Exception:  # pragma: no cover
+    pytest.skip("backend not importable", allow_module_level=True)
+
+
+class _DictCache:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
+@pytest.fixture()
+def session(monkeypatch, db_session):
+    '''`db_session` with sample stocks, patterns and a scan run, behind a dict cache.'''
+    monkeypatch.setattr(backend, "redis_client", _DictCache())
+    db_session.add_all([
+        Stock(symbol="AAPL", name="Apple", sector="Technology", current_price=100.0, rs_rating=90),
+        Stock(symbol="XOM", name="Exxon", sector="Energy", current_price=50.0, rs_rating=70),
+        Pattern(symbol="AAPL", pattern_type="VCP", confidence=0.9, status="active"),
+        Pattern(symbol="XOM", pattern_type="VCP", confidence=0.7, status="active"),
+        Pattern(symbol="MSFT", pattern_type="VCP", confidence=0.7, status="active"),
+        Pattern(symbol="TSLA", pattern_type="VCP", confidence=0.99, status="retired"),
+        ScanRun(notes="daily scan"),
+    ])
+    db_session.commit()
+    return db_session
+
+
+def test_scan_results_keyset_pages_match_full_order(session):
+    full = backend.get_scan_results(limit=None, offset=0, cursor=None, db=session)
+    symbols = [p["symbol"] for p in json.loads(full.body)]
+    assert symbols == ["AAPL", "XOM", "MSFT"]
+
+    paged, cursor = [], None
+    while True:
+        response = backend.get_scan_results(limit=2, offset=0, cursor=cursor, db=session)
+        paged += [p["symbol"] for p in json.loads(response.body)]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert paged == symbols
+
+    second = backend.get_scan_results(limit=1, offset=1, cursor=None, db=session)
+    assert [p["symbol"] for p in json.loads(second.body)] == ["XOM"]
+
+
+def test_scan_results_keyset_paging_keeps_null_confidence(session):
+    session.add_all([
+        Pattern(symbol="NVDA", pattern_type="VCP", confidence=None, status="active"),
+        Pattern(symbol="AMD", pattern_type="VCP", confidence=None, status="active"),
+    ])
+    session.commit()
+
+    paged, cursor = [], None
+    while True:
+        response = backend.get_scan_results(limit=1, offset=0, cursor=cursor, db=session)
+        paged += [p["symbol"] for p in json.loads(response.body)]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert paged == ["AAPL", "XOM", "MSFT", "NVDA", "AMD"]
+
+
+def test_scan_results_page_is_read_off_the_rank_index(session):
+    from sqlalchemy import event
+
+    engine = session.get_bind()
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, params, context, executemany):
+        statements.append((statement, params))
+
+    backend._scan_results_page(session, 2, 0, backend._encode_scan_cursor(0.7, 1))
+    statement, params = statements[-1]
+
+    with engine.connect() as conn:
+        plan = " ".join(row[3] for row in conn.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", params))
+    assert "ix_patterns_status_rank" in plan and "TEMP B-TREE" not in plan
+
+
+def test_scan_stats_group_by_sector_and_cache_follows_run(session):
+    stats = backend.get_scan_stats(db=session)
+    assert stats == {"total": 3, "by_sector": {"Technology": 1, "Energy": 1, "Unknown": 1}}
+
+    session.query(Pattern).filter(Pattern.symbol == "MSFT").update({"status": "retired"})
+    session.commit()
+    assert backend.get_scan_stats(db=session)["total"] == 3  # same run: cached
+
+    session.add(ScanRun(notes="daily scan"))
+    session.commit()
+    assert backend.get_scan_stats(db=session)["total"] == 2
+
+
+def test_running_scan_publishes_batches_through_the_cache(session):
+    assert backend.get_scan_stats(db=session)["total"] == 3
+
+    # A streaming scan retires a pattern and commits its progress counter
+    session.query(Pattern).filter(Pattern.symbol == "MSFT").update({"status": "retired"})
+    session.query(ScanRun).update({"success_count": 25})
+    session.commit()
+    assert backend.get_scan_stats(db=session)["total"] == 2
+
+
+def test_latest_scan_ignores_detection_passes(session):
+    from datetime import datetime, timedelta
+
+    later = datetime.utcnow() + timedelta(hours=1)
+    session.add_all([
+        ScanRun(started_at=later, total_tickers=500, notes="daily scan"),
+        ScanRun(started_at=later + timedelta(minutes=5), total_tickers=18,
+                notes=backend.DETECTION_RUN_NOTES),
+    ])
+    session.commit()
+
+    latest = backend.get_latest_scan(db=session)
+    assert latest["total_tickers"] == 500
@@ -0,0 +1,101 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("schedule")
+
+from market_calendar import ET  # noqa: E402
+from worker import scheduler  # noqa: E402
+
+TRADING_DAY_OPEN = datetime(2025, 12, 23, 11, 0, tzinfo=ET)
+TRADING_DAY_EVENING = datetime(2025, 12, 23, 18, 0, tzinfo=ET)
+HOLIDAY = datetime(2025, 12, 25, 11, 0, tzinfo=ET)
+
+
+@pytest.fixture()
+def lock(tmp_path):
+    return scheduler.ScanLock(str(tmp_path / "scan.lock"))
+
+
+def test_trading_day_and_market_hours_gating(lock):
+    runs = []
+    eod = scheduler.Cadence("eod", lambda: runs.append("eod"))
+    intraday = scheduler.Cadence(
+        "intraday", lambda: runs.append("intraday"), market_hours_only=True
+    )
+    universe = scheduler.Cadence(
+        "universe", lambda: runs.append("universe"), trading_days_only=False
+    )
+
+    assert scheduler.run_cadence(eod, lock, now=HOLIDAY).startswith("skipped")
+    assert scheduler.run_cadence(universe, lock, now=HOLIDAY).startswith("ok")
+    assert scheduler.run_cadence(intraday, lock, now=TRADING_DAY_EVENING) == (
+        "skipped: market closed"
+    )
+    assert scheduler.run_cadence(intraday, lock, now=TRADING_DAY_OPEN).startswith("ok")
+    assert scheduler.run_cadence(eod, lock, now=TRADING_DAY_EVENING).startswith("ok")
+    assert runs == ["universe", "intraday", "eod"]
+
+
+def test_overlapping_scan_is_skipped(lock, tmp_path):
+    entered, release = threading.Event(), threading.Event()
+
+    def long_scan():
+        entered.set()
+        release.wait(5)
+
+    eod = scheduler.Cadence("eod", long_scan)
+    worker = threading.Thread(target=scheduler.run_cadence, args=(eod, lock, TRADING_DAY_OPEN))
+    worker.start()
+    assert entered.wait(5)
+
+    intraday = scheduler.Cadence("intraday", lambda: None, market_hours_only=True)
+    assert scheduler.run_cadence(intraday, lock, now=TRADING_DAY_OPEN) == "skipped: eod running"
+    # A second scheduler process on the same host sees the flock
+    other = scheduler.ScanLock(lock.path)
+    assert not other.acquire("other")
+
+    release.set()
+    worker.join(5)
+    assert eod.last_outcome.startswith("ok")
+    assert scheduler.run_cadence(intraday, lock, now=TRADING_DAY_OPEN).startswith("ok")
+
+
+def test_failed_scan_releases_lock(lock):
+    def broken():
+        raise SystemExit("DATABASE_URL required")
+
+    eod = scheduler.Cadence("eod", broken)
+    assert scheduler.run_cadence(eod, lock, now=TRADING_DAY_OPEN) == (
+        "failed: DATABASE_URL required"
+    )
+    assert lock.acquire("next")
+    lock.release()
+
+
+def test_celery_scan_holds_lock_until_aggregated(lock, monkeypatch):
+    celery_app = pytest.importorskip("worker.celery_app")
+    enqueued, aggregated = threading.Event(), threading.Event()
+
+    class _Result:
+        id = "chord-1"
+
+        def get(self, timeout=None):
+            assert aggregated.wait(5)
+            return {"total": 1}
+
+    monkeypatch.setattr(scheduler, "BACKEND", "celery")
+    monkeypatch.setattr(celery_app, "start_scan", lambda tickers: enqueued.set() or _Result())
+    eod = scheduler.Cadence("eod", scheduler.batch_scan)
+    worker = threading.Thread(target=scheduler.run_cadence, args=(eod, lock, TRADING_DAY_OPEN))
+    worker.start()
+    assert enqueued.wait(5)
+
+    intraday = scheduler.Cadence("intraday", lambda: None, market_hours_only=True)
+    assert scheduler.run_cadence(intraday, lock, now=TRADING_DAY_OPEN) == "skipped: eod running"
+
+    aggregated.set()
+    worker.join(5)
+    assert eod.last_outcome.startswith("ok")
+    assert scheduler.run_cadence(intraday, lock, now=TRADING_DAY_OPEN).startswith("ok")
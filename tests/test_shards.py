@@ -0,0 +1,90 @@
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+
+try:
+    from worker.shards import (
+        claim_shard,
+        complete_shard,
+        ensure_tables,
+        init_run,
+        next_run_key,
+        parse_shard,
+        run_coordinated,
+        select_shard,
+        shard_of,
+    )
+except Exception:  # pragma: no cover
+    pytest.skip("worker not importable", allow_module_level=True)
+
+TICKERS = [f"T{i:03d}" for i in range(40)]
+MIGRATIONS = Path(__file__).parent.parent / "migrations" / "sql"
+PATTERNS_DDL = MIGRATIONS / "0001_create_patterns_table.sql"
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'scan.db'}", future=True)
+    raw = engine.raw_connection()
+    try:
+        raw.driver_connection.executescript(PATTERNS_DDL.read_text())
+    finally:
+        raw.close()
+    ensure_tables(engine)
+    return engine
+
+
+def _process(ticker):
+    if ticker == "T013":
+        return None
+    if int(ticker[1:]) % 5 == 0:
+        return [{"ticker": ticker, "pattern": "VCP", "confidence": 80.0, "rs": None,
+                 "price": 10.0, "meta": {"contractions": 3}}]
+    return []
+
+
+def test_static_shards_partition_universe():
+    shards = [select_shard(TICKERS, i, 4) for i in range(4)]
+    assert sorted(t for shard in shards for t in shard) == TICKERS
+    assert shard_of("aapl", 4) == shard_of("AAPL", 4)
+    assert parse_shard("2/8") == (2, 8)
+    with pytest.raises(ValueError):
+        parse_shard("8/8")
+
+
+def test_default_run_key_starts_a_new_generation_after_merge(engine):
+    assert next_run_key(engine, "scan-2026-10-19") == "scan-2026-10-19"
+    init_run(engine, "scan-2026-10-19", 1)
+    assert next_run_key(engine, "scan-2026-10-19") == "scan-2026-10-19"
+
+    run_coordinated(engine, TICKERS, _process, 1, run_key="scan-2026-10-19", poll_seconds=0)
+    assert next_run_key(engine, "scan-2026-10-19") == "scan-2026-10-19.2"
+    run_coordinated(engine, TICKERS, _process, 1, run_key="scan-2026-10-19.2", poll_seconds=0)
+    assert next_run_key(engine, "scan-2026-10-19") == "scan-2026-10-19.3"
+
+
+def test_crashed_shard_is_reclaimed_and_run_merged_once(engine, caplog):
+    init_run(engine, "run-1", 3)
+    crashed = claim_shard(engine, "run-1", "worker-a")
+    assert crashed == 0
+
+    result = run_coordinated(engine, TICKERS, _process, 3, run_key="run-1",
+                             owner="worker-b", lease_seconds=0, poll_seconds=0)
+    assert sorted(result["shards"]) == [0, 1, 2]
+    assert result["merged"] == {"run_key": "run-1", "patterns": 8, "total": 40, "failed": 1}
+
+    # The crashed worker can no longer publish its shard
+    assert not complete_shard(engine, "run-1", crashed, "worker-a", [], 0, 0)
+
+    with engine.connect() as conn:
+        patterns = conn.execute(sa.text("SELECT ticker, as_of FROM patterns")).all()
+        runs = conn.execute(
+            sa.text("SELECT total_tickers, failed_count, notes FROM scan_runs")
+        ).all()
+    assert len(patterns) == 8 and len({row.as_of for row in patterns}) == 1
+    assert runs == [(40, 1, "sharded scan run-1")]
+
+    again = run_coordinated(engine, TICKERS, _process, 3, run_key="run-1", owner="worker-c")
+    assert again["shards"] == [] and again["merged"] is None
+    assert "already finished" in caplog.text
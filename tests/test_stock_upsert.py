@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+try:
+    import daily_market_scanner as scanner
+    from legend_ai_backend import Stock
+except Exception:  # pragma: no cover
+    pytest.skip("scanner not importable", allow_module_level=True)
+
+
+@pytest.fixture()
+def session(db_session):
+    '''`db_session` that records every SELECT it runs in `.selects`.'''
+    selects = []
+
+    @event.listens_for(db_session.get_bind(), "before_cursor_execute")
+    def count(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    db_session.selects = selects
+    return db_session
+
+
+def _seed(session, symbols, price=1.0):
+    old = datetime(2020, 1, 1)
+    session.add_all(
+        Stock(symbol=s, name=f"{s} Inc", sector="Tech", industry="Chips", current_price=price,
+              market_cap="1B", rs_rating=90, created_at=old, updated_at=old)
+        for s in symbols
+    )
+    session.commit()
+    session.selects.clear()
+
+
+def test_upsert_stocks_inserts_and_updates_across_batches(session):
+    existing = [f"E{i:04d}" for i in range(600)]
+    _seed(session, existing)
+    fresh = [f"n{i:04d}" for i in range(700)]  # lower case: symbols are upper-cased
+    closes = {s: 2.0 for s in existing}
+    closes.update({s: 3.0 for s in fresh})
+
+    scanner.upsert_stocks(session, closes)
+    session.commit()
+
+    # 1300 symbols -> 3 batches of at most STOCK_BATCH_SIZE, one lookup each
+    assert scanner.STOCK_BATCH_SIZE == 500
+    assert len([s for s in session.selects if "IN" in s.upper()]) == 3
+    assert session.query(Stock).count() == 1300
+    updated = session.get(Stock, "E0599")
+    assert updated.current_price == 2.0 and updated.updated_at > datetime(2020, 1, 1)
+    # Updates only touch price and timestamp
+    assert (updated.name, updated.sector, updated.rs_rating) == ("E0599 Inc", "Tech", 90)
+    inserted = session.get(Stock, "N0699")
+    assert (inserted.name, inserted.sector, inserted.current_price) == ("N0699", "Unknown", 3.0)
+    assert (inserted.market_cap, inserted.rs_rating) == ("", 0)
+
+
+def test_load_stock_map_batches_lookups(session):
+    _seed(session, [f"S{i:04d}" for i in range(1100)])
+
+    stock_map = scanner.load_stock_map(session, [f"s{i:04d}" for i in range(1200)])
+
+    assert len(stock_map) == 1100 and stock_map["S1099"].name == "S1099 Inc"
+    assert len(session.selects) == 3
+
+
+def test_upsert_stock_keeps_single_symbol_behaviour(session):
+    _seed(session, ["AAPL"], price=100.0)
+
+    scanner.upsert_stock(session, "aapl", 150.0)
+    scanner.upsert_stock(session, "nvda", 900.0)
+    session.commit()
+
+    assert session.get(Stock, "AAPL").current_price == 150.0
+    assert session.get(Stock, "AAPL").name == "AAPL Inc"
+    nvda = session.get(Stock, "NVDA")
+    assert (nvda.name, nvda.current_price, nvda.industry) == ("NVDA", 900.0, "Unknown")
+    scanner.upsert_stocks(session, {})
+    assert session.query(Stock).count() == 2
@@ -0,0 +1,58 @@
+import logging
+import time
+
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from app.timing import ServerTimingMiddleware, phase, server_timing
+
+
+def _app(**kwargs) -> FastAPI:
+    api = FastAPI()
+
+    @api.get("/work")
+    async def work():
+        with phase("serialize"):
+            pass
+        with phase("db"):
+            time.sleep(0.002)
+        with phase("db"):
+            time.sleep(0.002)
+        return {"ok": True}
+
+    api.add_middleware(ServerTimingMiddleware, **kwargs)
+    return api
+
+
+def test_server_timing_header_orders_and_accumulates_phases():
+    resp = TestClient(_app(sample_rate=0.0)).get("/work")
+    names = [part.split(";")[0] for part in resp.headers["server-timing"].split(", ")]
+    assert names == ["db", "serialize", "total"]
+    db_ms = float(resp.headers["server-timing"].split(", ")[0].split("dur=")[1])
+    assert db_ms >= 4.0
+
+
+def test_phase_is_a_noop_outside_a_request():
+    with phase("db"):
+        pass
+    assert server_timing({}, 0.0012) == "total;dur=1.2"
+
+
+def test_sampled_requests_are_logged_with_phase_fields(caplog):
+    client = TestClient(_app(sample_rate=1.0))
+    with caplog.at_level(logging.INFO, logger="legend.timing"):
+        client.get("/work")
+    (record,) = (r for r in caplog.records if r.name == "legend.timing")
+    fields = record.fields
+    assert fields["path"] == "/work" and fields["status"] == 200
+    assert fields["db_ms"] >= 4.0 and fields["total_ms"] >= fields["db_ms"]
+
+
+def test_patterns_endpoint_reports_phases():
+    from app.legend_ai_backend import app
+
+    resp = TestClient(app).get("/v1/patterns/all", params={"limit": 5})
+    assert resp.status_code == 200
+    timing = resp.headers["server-timing"]
+    for name in ("db", "enrich", "serialize", "total"):
+        assert f"{name};dur=" in timing
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime, timedelta
+
+from universe import is_stale, read_meta, read_snapshot, update_metadata, write_snapshot
+
+
+def _rows(*symbols, sector=""):
+    return {
+        s: {"symbol": s, "name": f"{s} Inc", "sector": sector, "source": "test"} for s in symbols
+    }
+
+
+def test_reads_legacy_symbol_list(tmp_path):
+    path = tmp_path / "universe.csv"
+    path.write_text("AAPL\nbrk.b\n\nMSFT\n")
+    assert list(read_snapshot(path)) == ["AAPL", "BRK-B", "MSFT"]
+
+
+def test_write_snapshot_records_diffs_and_versions(tmp_path):
+    first = write_snapshot(_rows("AAPL", "MSFT", sector="Technology"), ["test"], data_dir=tmp_path)
+    assert (first.version, first.added, first.removed) == (1, ["AAPL", "MSFT"], [])
+    seen = read_snapshot(tmp_path / "universe.csv")["AAPL"]["first_seen"]
+
+    # Same membership: no new version; known metadata survives a source without it
+    same = write_snapshot(_rows("MSFT", "AAPL"), ["test"], data_dir=tmp_path)
+    assert (same.version, same.changed) == (1, False)
+    aapl = read_snapshot(tmp_path / "universe.csv")["AAPL"]
+    assert aapl["sector"] == "Technology" and aapl["first_seen"] == seen
+
+    second = write_snapshot(_rows("NVDA", "AAPL", "AMD"), ["test"], data_dir=tmp_path)
+    assert (second.version, second.added, second.removed) == (2, ["AMD", "NVDA"], ["MSFT"])
+    # Existing rows keep their place; new symbols are appended
+    assert list(read_snapshot(tmp_path / "universe.csv")) == ["AAPL", "AMD", "NVDA"]
+    changes_text = (tmp_path / "universe_changes.jsonl").read_text()
+    changes = [json.loads(line) for line in changes_text.splitlines()]
+    assert [c["version"] for c in changes] == [1, 2]
+    assert read_meta(tmp_path / "universe_meta.json")["count"] == 3
+
+
+def test_update_metadata_and_staleness(tmp_path):
+    write_snapshot(_rows("AAPL"), ["test"], data_dir=tmp_path)
+    update_metadata(
+        {"AAPL": {"adv": "1500000"}, "ZZZZ": {"adv": "1"}}, path=tmp_path / "universe.csv"
+    )
+    assert read_snapshot(tmp_path / "universe.csv")["AAPL"]["adv"] == "1500000"
+
+    meta = read_meta(tmp_path / "universe_meta.json")
+    assert not is_stale(meta)
+    assert is_stale(meta, now=datetime.utcnow() + timedelta(days=30))
+    assert is_stale({})
+
+
+def test_seed_rows_stay_pinned_across_refresh(tmp_path):
+    (tmp_path / "universe.csv").write_text(
+        "symbol,name,sector,adv,source,first_seen\nAAPL,,,,seed,\nPLTR,,,,seed,\n"
+    )
+    diff = write_snapshot(_rows("AAPL", "MSFT", sector="Technology"), ["test"], data_dir=tmp_path)
+    assert (diff.added, diff.removed) == (["MSFT"], [])
+
+    rows = read_snapshot(tmp_path / "universe.csv")
+    assert list(rows) == ["AAPL", "PLTR", "MSFT"]
+    assert rows["AAPL"]["source"] == "seed" and rows["AAPL"]["sector"] == "Technology"
+    assert rows["PLTR"]["source"] == "seed" and rows["MSFT"]["source"] == "test"
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vcp_backtest import SymbolReplay, corpus_symbols, load_history, summarize
+from vcp_ultimate_algorithm import Contraction, VCPDetector, VCPSignal
+
+FIELDS = (
+    "pivot_price", "confidence_score", "trend_strength", "volume_dry_up",
+    "final_contraction_tightness", "breakout_detected", "signal_date", "notes", "contractions",
+)
+
+
+def _assert_matches_detect_vcp(detector, df, symbol):
+    replayed = dict(SymbolReplay(detector, df, symbol).signals())
+    for t in range(len(df)):
+        expected = detector.detect_vcp(df.iloc[:t + 1].copy(), symbol)
+        got = replayed.get(t)
+        assert expected.detected == (got is not None), (symbol, t, expected.rejection)
+        if got is not None:
+            assert [getattr(got, f) for f in FIELDS] == [getattr(expected, f) for f in FIELDS]
+    return len(replayed)
+
+
+@pytest.mark.parametrize("trend_template", [True, False])
+def test_replay_matches_detect_vcp_on_every_prefix(trend_template, trending):
+    detector = VCPDetector(check_trend_template=trend_template, min_price=10, min_volume=500000)
+    series = (trending(seed, n=320) for seed in (0, 1))
+    detected = sum(_assert_matches_detect_vcp(detector, df, "SYN") for df in series)
+    assert detected > 0
+
+
+def test_replay_matches_detect_vcp_on_stored_history():
+    symbols = corpus_symbols()[:5]
+    if not symbols:
+        pytest.skip("no price history corpus")
+    detector = VCPDetector(check_trend_template=False, min_price=10, min_volume=500000)
+    for symbol in symbols:
+        _assert_matches_detect_vcp(detector, load_history(symbol), symbol)
+
+
+def test_outcome_records_returns_breakout_and_stop():
+    close = np.array([100.0] * 70 + [101, 104, 103, 95, 96] + [97.0] * 60)
+    df = pd.DataFrame({
+        "Open": close, "High": close + 0.5, "Low": close - 0.5, "Close": close,
+        "Volume": np.full(len(close), 2_000_000),
+    }, index=pd.bdate_range("2024-01-01", periods=len(close)))
+    replay = SymbolReplay(VCPDetector(), df, "OUT")
+    day = df.index[60]
+    signal = VCPSignal(
+        symbol="OUT", detected=True, pivot_price=102.0, confidence_score=70.0,
+        final_contraction_tightness=0.04, breakout_detected=False,
+        contractions=[Contraction(day, day, 105.0, 96.0, 0.04, 1.0, 5)],
+    )
+
+    out = replay.outcome(69, signal, fresh=True)
+    assert out.returns[5] == pytest.approx(96 / 100 - 1)
+    assert (out.bars_to_breakout, out.breakout_date) == (2, str(df.index[71].date()))
+    assert out.bars_to_stop == 4 and out.first_event == "breakout"
+    assert out.returns[60] is not None and replay.outcome(120, signal, True).returns[60] is None
+
+    stats = summarize([out, replay.outcome(70, signal, fresh=False)])
+    assert stats["signals"] == 2 and stats["fresh"] == 1
+    assert stats["breakout_rate"] == 1.0 and stats["returns"][5]["hit_rate"] == 0.0
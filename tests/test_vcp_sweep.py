@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from vcp_backtest import SymbolReplay
+from vcp_sweep import (
+    BarFeatures,
+    Fixture,
+    expand_grid,
+    parse_grid,
+    sweep,
+    table,
+)
+from vcp_ultimate_algorithm import VCPDetector
+
+GRID = {
+    "min_price": [10.0, 60.0],
+    "min_contractions": [2, 3],
+    "max_contractions": [2, 6],
+    "max_base_depth": [0.2, 0.35],
+    "final_contraction_max": [0.06, 0.10],
+    "check_trend_template": [True, False],
+}
+
+
+def test_grid_matches_detect_vcp_for_every_setting(trending):
+    df = trending(0)
+    grid = expand_grid(GRID)
+    bars = list(range(59, len(df), 5))
+    replay = SymbolReplay(VCPDetector(), df, "SYN")
+    matrix = BarFeatures(replay, bars, grid["max_contractions"]).detected(grid)
+
+    assert matrix.shape == (len(grid["min_price"]), len(bars)) and matrix.any()
+    for i in range(len(grid["min_price"])):
+        detector = VCPDetector(**{k: v[i].item() for k, v in grid.items()})
+        expected = [detector.detect_vcp(df.iloc[:t + 1].copy(), "SYN").detected for t in bars]
+        assert matrix[i].tolist() == expected, {k: v[i] for k, v in grid.items()}
+
+
+def test_sweep_scores_fixture_windows(tmp_path, trending):
+    for symbol, seed in (("UP", 0), ("FLAT", 3)):
+        df = trending(seed) if symbol == "UP" else trending(seed) * 0 + 20
+        rows = [
+            {"date": str(d.date()), "open": r.Open, "high": r.High, "low": r.Low,
+             "close": r.Close, "volume": int(r.Volume)}
+            for d, r in df.iterrows()
+        ]
+        (tmp_path / f"{symbol}.json").write_text(json.dumps(rows))
+    fixtures = [
+        Fixture("UP", "2020-06-01", "2021-01-31", True),
+        Fixture("FLAT", "2020-06-01", "2021-01-31", False),
+        Fixture("GONE", "2020-06-01", "2021-01-31", True),
+    ]
+    grid = expand_grid({"min_price": [10.0, 1000.0], "check_trend_template": [False]})
+    scores = sweep(fixtures, grid, history_dir=tmp_path)
+
+    assert scores["fixtures"] == ["UP", "FLAT"] and scores["missing"] == 1
+    assert scores["in_window"] == 2
+    rows = table(grid, scores)
+    assert [(r["min_price"], r["tp"], r["fp"], r["fn"], r["tn"]) for r in rows] == [
+        (10.0, 1, 0, 0, 1), (1000.0, 0, 0, 1, 1),
+    ]
+    assert rows[0]["precision"] == rows[0]["recall"] == 1.0 and rows[1]["f1"] == 0.0
+
+
+def test_parse_grid_types_values_and_rejects_unknown_parameters():
+    assert parse_grid(["min_volume=5e5,1000000", "check_trend_template=true,0"]) == {
+        "min_volume": [500000, 1000000], "check_trend_template": [True, False],
+    }
+    with pytest.raises(ValueError):
+        parse_grid(["breakout_volume_multiplier=1.5"])
+    with pytest.raises(ValueError):
+        expand_grid({"stage_sink": [None]})
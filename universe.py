@@ -0,0 +1,322 @@
+"""
+Versioned ticker universe snapshot.
+
+The scanned universe lives in `data/universe.csv` (one row per symbol with
+name, sector, average daily dollar volume and when it was first seen), with
+`data/universe_meta.json` holding the snapshot version and refresh time and
+`data/universe_changes.jsonl` recording every add/remove diff. Rows with
+source `seed` are the curated list and stay pinned across refreshes.
+
+Scans read the snapshot directly, so they start without any network calls.
+`refresh_universe()` rebuilds it from the configured sources when it is older
+than `LEGEND_UNIVERSE_MAX_AGE_DAYS` (default 7); if every source fails the
+existing snapshot is kept.
+
+Sources (`LEGEND_UNIVERSE_SOURCES`, comma separated, default `sp500,ndx`):
+  sp500, ndx       Wikipedia constituents (DataHub fallback for sp500)
+  csv:<path|url>   any listing file with a Symbol/Ticker column, e.g. a
+                   Russell 3000 or full US listings export; optional
+                   Name/Sector/ADV columns are carried into the snapshot
+
+Usage: python universe.py [refresh [--force] | show]
+"""
+
+import csv
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+UNIVERSE_PATH = DATA_DIR / "universe.csv"
+META_PATH = DATA_DIR / "universe_meta.json"
+CHANGES_PATH = DATA_DIR / "universe_changes.jsonl"
+
+COLUMNS = ("symbol", "name", "sector", "adv", "source", "first_seen")
+PINNED_SOURCE = "seed"
+DEFAULT_SOURCES = "sp500,ndx"
+MAX_AGE = timedelta(days=int(os.getenv("LEGEND_UNIVERSE_MAX_AGE_DAYS", "7")))
+
+# Used only when there is no snapshot at all and every source fails
+FALLBACK_SYMBOLS = [
+    'AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOGL', 'META', 'AVGO', 'TSLA', 'AMD', 'NFLX',
+    'SMCI', 'COST', 'PEP', 'ADBE', 'CSCO', 'CRM', 'LIN', 'TXN', 'QCOM', 'INTC',
+    'JPM', 'WMT', 'PG', 'XOM', 'UNH', 'V', 'MA', 'HD', 'MRK', 'ABBV',
+]
+
+Rows = Dict[str, Dict[str, str]]
+
+
+@dataclass
+class UniverseDiff:
+    version: int
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+
+def normalize_symbol(raw: str) -> str:
+    return str(raw).strip().upper().replace('.', '-')
+
+
+def read_snapshot(path: Path = UNIVERSE_PATH) -> Rows:
+    '''Snapshot rows keyed by symbol; also accepts the legacy one-symbol-per-line file.'''
+    if not path.exists():
+        return {}
+    with path.open(newline="") as f:
+        lines = [row for row in csv.reader(f) if row and any(c.strip() for c in row)]
+    if not lines:
+        return {}
+    header = [c.strip().lower() for c in lines[0]]
+    rows: Rows = {}
+    if "symbol" in header:
+        for line in lines[1:]:
+            record = dict(zip(header, (c.strip() for c in line)))
+            symbol = normalize_symbol(record.get("symbol", ""))
+            if symbol:
+                rows[symbol] = {col: record.get(col, "") for col in COLUMNS}
+                rows[symbol]["symbol"] = symbol
+    else:
+        for line in lines:
+            for cell in line:
+                symbol = normalize_symbol(cell)
+                if symbol:
+                    rows[symbol] = {col: "" for col in COLUMNS}
+                    rows[symbol]["symbol"] = symbol
+    return rows
+
+
+def load_symbols(path: Path = UNIVERSE_PATH) -> List[str]:
+    '''Symbols in snapshot order; empty if there is no snapshot.'''
+    return list(read_snapshot(path))
+
+
+def read_meta(path: Path = META_PATH) -> Dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def is_stale(meta: Dict, max_age: timedelta = MAX_AGE, now: Optional[datetime] = None) -> bool:
+    refreshed = meta.get("refreshed_at")
+    if not refreshed:
+        return True
+    try:
+        return (now or datetime.utcnow()) - datetime.fromisoformat(refreshed) > max_age
+    except ValueError:
+        return True
+
+
+def _write_rows(path: Path, rows: Rows) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for symbol in rows:
+            writer.writerow({col: rows[symbol].get(col, "") for col in COLUMNS})
+    os.replace(tmp, path)
+
+
+def write_snapshot(fetched: Rows, sources: List[str], data_dir: Path = DATA_DIR) -> UniverseDiff:
+    '''Replace the snapshot with `fetched`, recording the diff and bumping the version on change.
+
+    Metadata already known for a symbol (first_seen, and name/sector/adv when
+    the new source lacks them) is carried over. Pinned `seed` rows are kept
+    even when no source lists them. Existing rows keep their order, so the
+    curated leaders stay first; new symbols are appended alphabetically.
+    '''
+    universe_path = data_dir / UNIVERSE_PATH.name
+    meta_path = data_dir / META_PATH.name
+    current = read_snapshot(universe_path)
+    meta = read_meta(meta_path)
+    now = datetime.utcnow().replace(microsecond=0).isoformat()
+
+    pinned = {s for s, row in current.items() if row.get("source") == PINNED_SOURCE}
+
+    rows: Rows = {}
+    kept = [s for s in current if s in fetched or s in pinned]
+    for symbol in kept + sorted(set(fetched) - set(current)):
+        record = fetched.get(symbol, {})
+        previous = current.get(symbol, {})
+        merged = {col: record.get(col) or previous.get(col, "") for col in COLUMNS}
+        merged["symbol"] = symbol
+        merged["first_seen"] = previous.get("first_seen") or now
+        if symbol in pinned:
+            merged["source"] = PINNED_SOURCE
+        rows[symbol] = merged
+
+    diff = UniverseDiff(
+        version=int(meta.get("version", 0)),
+        added=sorted(set(rows) - set(current)),
+        removed=sorted(set(current) - set(rows)),
+    )
+    if diff.changed:
+        diff.version += 1
+        with (data_dir / CHANGES_PATH.name).open("a") as f:
+            f.write(json.dumps({
+                "version": diff.version, "at": now, "added": diff.added, "removed": diff.removed,
+            }) + "\n")
+    _write_rows(universe_path, rows)
+    meta.update(
+        {"version": diff.version, "refreshed_at": now, "count": len(rows), "sources": sources}
+    )
+    meta_path.write_text(json.dumps(meta, indent=2))
+    return diff
+
+
+def update_metadata(updates: Dict[str, Dict[str, str]], path: Path = UNIVERSE_PATH) -> None:
+    '''Fill in metadata columns (e.g. adv from a scan) without changing membership or version.'''
+    rows = read_snapshot(path)
+    touched = False
+    for symbol, values in updates.items():
+        row = rows.get(normalize_symbol(symbol))
+        if row is None:
+            continue
+        for col, value in values.items():
+            if col not in COLUMNS or col in ("symbol", "first_seen"):
+                continue
+            if row.get(col) != str(value):
+                row[col] = str(value)
+                touched = True
+    if touched:
+        _write_rows(path, rows)
+
+
+# Sources
+
+def _frame_rows(df, source: str) -> Rows:
+    '''Turn a listing table into snapshot rows, picking up whatever metadata columns it has.'''
+    cols = {str(c).strip().lower(): c for c in df.columns}
+    symbol_col = next((cols[k] for k in ("symbol", "ticker") if k in cols), None)
+    if symbol_col is None:
+        return {}
+    name_col = next((cols[k] for k in ("security", "company", "name") if k in cols), None)
+    sector_col = next((cols[k] for k in ("gics sector", "sector") if k in cols), None)
+    adv_col = cols.get("adv")
+    rows: Rows = {}
+    for _, rec in df.iterrows():
+        symbol = normalize_symbol(rec[symbol_col])
+        if not symbol or symbol == "NAN":
+            continue
+        rows[symbol] = {
+            "symbol": symbol,
+            "name": str(rec[name_col]) if name_col is not None else "",
+            "sector": str(rec[sector_col]) if sector_col is not None else "",
+            "adv": str(rec[adv_col]) if adv_col is not None else "",
+            "source": source,
+        }
+    return rows
+
+
+def _fetch_sp500() -> Rows:
+    import pandas as pd
+
+    try:
+        tables = pd.read_html("https://en.wikipedia.org/wiki/List_of_S%26P_500_companies")
+        rows = _frame_rows(tables[0], "sp500")
+        if rows:
+            return rows
+    except Exception as e:
+        print(f"SP500 fetch failed (Wikipedia): {e}")
+    return _frame_rows(
+        pd.read_csv("https://datahub.io/core/s-and-p-500-companies/r/constituents.csv"), "sp500"
+    )
+
+
+def _fetch_ndx() -> Rows:
+    import pandas as pd
+
+    for table in pd.read_html("https://en.wikipedia.org/wiki/Nasdaq-100"):
+        rows = _frame_rows(table, "ndx")
+        if rows:
+            return rows
+    return {}
+
+
+def _fetch_csv(location: str) -> Rows:
+    import pandas as pd
+
+    return _frame_rows(pd.read_csv(location), f"csv:{Path(location).name}")
+
+
+def fetch_sources(sources: List[str]) -> Rows:
+    '''Union of all sources; earlier sources win on metadata. Failing sources are skipped.'''
+    rows: Rows = {}
+    for source in sources:
+        try:
+            if source == "sp500":
+                fetched = _fetch_sp500()
+            elif source == "ndx":
+                fetched = _fetch_ndx()
+            elif source.startswith("csv:"):
+                fetched = _fetch_csv(source[4:])
+            else:
+                print(f"Unknown universe source {source!r}; skipping")
+                continue
+        except Exception as e:
+            print(f"Universe source {source} failed: {e}")
+            continue
+        for symbol, record in fetched.items():
+            rows.setdefault(symbol, record)
+    return rows
+
+
+def configured_sources() -> List[str]:
+    raw = os.getenv("LEGEND_UNIVERSE_SOURCES", DEFAULT_SOURCES)
+    return [s.strip() for s in raw.split(",") if s.strip()]
+
+
+def refresh_universe(
+    force: bool = False, sources: Optional[List[str]] = None
+) -> Optional[UniverseDiff]:
+    '''Rebuild the snapshot if it is stale (or `force`); None if nothing was refreshed.'''
+    if not force and not is_stale(read_meta()):
+        return None
+    sources = sources or configured_sources()
+    fetched = fetch_sources(sources)
+    if not fetched:
+        print("Universe refresh fetched nothing; keeping cached snapshot")
+        return None
+    diff = write_snapshot(fetched, sources)
+    print(
+        f"Universe v{diff.version}: {len(fetched)} symbols, "
+        f"+{len(diff.added)} -{len(diff.removed)}"
+    )
+    return diff
+
+
+def get_universe() -> List[str]:
+    '''Symbols to scan: the snapshot, refreshed first when stale.'''
+    try:
+        refresh_universe()
+    except Exception as e:
+        print(f"Universe refresh failed ({e}); using cached snapshot")
+    return load_symbols() or list(FALLBACK_SYMBOLS)
+
+
+def main(argv: List[str]) -> int:
+    command = argv[0] if argv else "show"
+    if command == "refresh":
+        diff = refresh_universe(force="--force" in argv)
+        if diff is None:
+            print("Universe snapshot is fresh; use --force to refresh anyway")
+        return 0
+    if command == "show":
+        meta = read_meta()
+        print(f"version={meta.get('version', 0)} count={len(load_symbols())} "
+              f"refreshed_at={meta.get('refreshed_at')} sources={meta.get('sources')}")
+        return 0
+    print(__doc__.strip().splitlines()[-1])
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,414 @@
+"""
+Walk-forward backtest for VCPDetector.
+
+Replays each symbol's stored price history one bar at a time. Every bar is
+judged only on the bars up to it, exactly as `detect_vcp(df.iloc[:t + 1])`
+would judge it on that day. Rather than re-slicing and re-running the detector
+at every date, `SymbolReplay` computes the prefix-invariant pieces once per
+symbol:
+
+  validate         50-bar average volume per bar
+  trend template   50/150/200-day SMAs and 52-week high/low (rolling values at
+                   bar t only depend on bars up to t)
+  swings           swing highs/lows; a swing at bar i is final once bar i + 5
+                   exists, so each bar only adds the swing confirmed that day
+  contractions     built from the swings inside the trailing base window and
+                   memoized per (swing high, swing low) pair across bars
+
+Only bars that pass those gates run the detector's own pattern rules and
+scoring, so a detected bar yields the same VCPSignal as detect_vcp on the
+prefix (tests/test_vcp_backtest.py checks this bar by bar).
+
+Every detected bar is recorded with its forward returns (HORIZONS bars
+ahead), the first close above the pivot (breakout) and the first low at or
+below the final contraction's low (stop) within FOLLOW_BARS bars. A signal is
+`fresh` when the bar before it was not detected; rates in `summarize` are over
+fresh signals, one per setup.
+
+Usage: python vcp_backtest.py [--symbols AAPL NVDA] [--limit N] [--workers 4]
+                              [--no-trend-template] [--min-price 10]
+                              [--min-volume 500000] [--csv signals.csv] [--json]
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scan_priority import PRICE_HISTORY_DIR
+from vcp_ultimate_algorithm import Contraction, VCPDetector, VCPSignal
+
+HORIZONS = (5, 10, 20, 60)  # forward-return horizons, in bars
+FOLLOW_BARS = 60  # bars after a signal searched for a breakout or stop
+MIN_BARS = 60  # detect_vcp rejects shorter histories
+SWING_WINDOW = 5  # VCPDetector._find_swing_points default
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+@dataclass
+class BacktestSignal:
+    """One detected bar and what the price did afterwards"""
+    symbol: str
+    date: str
+    bar: int
+    close: float
+    pivot_price: float
+    stop_price: float
+    confidence: float
+    contractions: int
+    final_contraction: float
+    breakout_detected: bool
+    fresh: bool
+    returns: Dict[int, Optional[float]] = field(default_factory=dict)
+    breakout_date: Optional[str] = None
+    bars_to_breakout: Optional[int] = None
+    stop_date: Optional[str] = None
+    bars_to_stop: Optional[int] = None
+    first_event: str = "open"  # "breakout", "stop" or "open" (neither within FOLLOW_BARS)
+
+
+def load_history(symbol: str, history_dir: Path = PRICE_HISTORY_DIR) -> Optional[pd.DataFrame]:
+    """Stored candles as a date-indexed OHLCV frame, without incomplete rows."""
+    try:
+        rows = json.loads((Path(history_dir) / f"{symbol}.json").read_text())
+    except (OSError, ValueError):
+        return None
+    if not rows:
+        return None
+    df = pd.DataFrame(rows).rename(columns={
+        "date": "Date", "open": "Open", "high": "High", "low": "Low", "close": "Close",
+        "volume": "Volume",
+    })
+    if not set(COLUMNS) <= set(df.columns) or "Date" not in df.columns:
+        return None
+    df["Date"] = pd.to_datetime(df["Date"])
+    df = df.set_index("Date")[COLUMNS].dropna().sort_index()
+    return df[~df.index.duplicated(keep="last")]
+
+
+def corpus_symbols(history_dir: Path = PRICE_HISTORY_DIR) -> List[str]:
+    # "X 2.json" files are copy artifacts of "X.json"
+    return sorted(p.stem for p in Path(history_dir).glob("*.json") if " " not in p.stem)
+
+
+def _mean(values: np.ndarray, start: int, stop: int) -> float:
+    # Same summation as pandas' Series.mean, so threshold checks agree exactly
+    return values[start:stop].sum(dtype=np.float64) / (stop - start)
+
+
+def _swings(values: np.ndarray, pick) -> np.ndarray:
+    """Bars equal to the `pick` (max or min) of the SWING_WINDOW bars either side."""
+    flags = np.zeros(len(values), dtype=bool)
+    width = 2 * SWING_WINDOW + 1
+    if len(values) >= width:
+        windows = np.lib.stride_tricks.sliding_window_view(values, width)
+        flags[SWING_WINDOW:len(values) - SWING_WINDOW] = (
+            values[SWING_WINDOW:len(values) - SWING_WINDOW] == pick(windows, axis=1)
+        )
+    return flags
+
+
+class SymbolReplay:
+    """
+    Bar-by-bar VCP detection over one symbol's history.
+
+    `df` must be sorted by date with unique dates and no missing OHLCV values
+    (see `load_history`). The detector supplies every threshold; its pattern
+    and scoring stages run unchanged on the bars that reach them.
+    """
+
+    def __init__(self, detector: VCPDetector, df: pd.DataFrame, symbol: str):
+        self.detector = detector
+        self.df = df
+        self.symbol = symbol
+        self.dates = df.index
+        self.high = df["High"].values
+        self.low = df["Low"].values
+        self.close = df["Close"].values
+        self.volume = df["Volume"].values
+        self._contractions: Dict[Tuple[int, int], Contraction] = {}
+
+        n = len(self.close)
+        # Bars detect_vcp can evaluate; the threshold-free features below are per bar
+        self.bars = np.arange(MIN_BARS - 1, n) if n >= MIN_BARS else np.arange(0)
+        self.avg_volume = np.full(n, np.nan)
+        self.avg_volume[self.bars] = [_mean(self.volume, t - 49, t + 1) for t in self.bars]
+        swing_highs = _swings(self.high, np.max)
+        swing_lows = _swings(self.low, np.min)
+        self.swing_highs = np.flatnonzero(swing_highs).tolist()
+        self.swing_lows = np.flatnonzero(swing_lows).tolist()
+        # Swings known at each bar: a swing at bar i is final once bar i + SWING_WINDOW exists
+        self.highs_seen = np.zeros(n, dtype=int)
+        self.lows_seen = np.zeros(n, dtype=int)
+        if n > SWING_WINDOW:
+            self.highs_seen[SWING_WINDOW:] = np.cumsum(swing_highs)[:n - SWING_WINDOW]
+            self.lows_seen[SWING_WINDOW:] = np.cumsum(swing_lows)[:n - SWING_WINDOW]
+        self.gate = self.gate_for(detector)
+
+    def gate_for(self, detector: VCPDetector) -> np.ndarray:
+        """Bars that pass validation, the trend template and the swing-count check."""
+        gate = np.zeros(len(self.close), dtype=bool)
+        bars = self.bars
+        ok = self.close[bars] >= detector.min_price
+        ok &= self.avg_volume[bars] >= detector.min_volume
+        if detector.check_trend_template:
+            ok &= self.trend_passed[bars]
+        ok &= self.highs_seen[bars] >= detector.min_contractions
+        ok &= self.lows_seen[bars] >= detector.min_contractions
+        gate[bars] = ok
+        return gate
+
+    @cached_property
+    def trend_passed(self) -> np.ndarray:
+        """VCPDetector._check_trend_template for every bar at once"""
+        passed = np.zeros(len(self.close), dtype=bool)
+        bars = self.bars
+        if not len(bars):
+            return passed
+        close = pd.Series(self.close)
+        ma50 = close.rolling(50).mean().values[bars]
+        ma150 = close.rolling(150).mean().values[bars]
+        ma200_all = close.rolling(200).mean().values
+        ma200, ma200_20d_ago = ma200_all[bars], ma200_all[bars - 19]
+        high_52w = pd.Series(self.high).rolling(252, min_periods=1).max().values[bars]
+        low_52w = pd.Series(self.low).rolling(252, min_periods=1).min().values[bars]
+        price = self.close[bars]
+        six_months_ago = self.close[np.maximum(bars - 125, 0)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            criteria = [
+                (price > ma150) & (price > ma200),
+                ma150 > ma200,
+                ma200 > ma200_20d_ago,
+                (ma50 > ma150) & (ma50 > ma200),
+                price > ma50,
+                (low_52w > 0) & ((price - low_52w) / low_52w >= 0.30),
+                (high_52w > 0) & ((high_52w - price) / high_52w <= 0.25),
+                np.where(bars + 1 >= 126, (price - six_months_ago) / six_months_ago > 0.1, True),
+            ]
+        passed[bars] = np.sum(criteria, axis=0) >= 6
+        return passed
+
+    def _contraction(self, hi: int, lo: int) -> Contraction:
+        key = (hi, lo)
+        contraction = self._contractions.get(key)
+        if contraction is None:
+            high, low = self.high[hi], self.low[lo]
+            contraction = self._contractions[key] = Contraction(
+                start_date=self.dates[hi],
+                end_date=self.dates[lo],
+                high_price=high,
+                low_price=low,
+                percent_drop=(high - low) / high,
+                avg_volume=_mean(self.volume, hi, lo + 1),
+                duration_days=(self.dates[lo] - self.dates[hi]).days,
+            )
+        return contraction
+
+    def contractions_at(self, t: int) -> List[Contraction]:
+        """VCPDetector._identify_contractions on the bars up to t"""
+        n = t + 1
+        base_start = n - min(60, n // 2)
+        last = t - SWING_WINDOW
+        highs, lows = self.swing_highs, self.swing_lows
+        highs = highs[bisect.bisect_left(highs, base_start):bisect.bisect_right(highs, last)]
+        lows = lows[bisect.bisect_left(lows, base_start):bisect.bisect_right(lows, last)]
+        if len(highs) < 2 or len(lows) < 2:
+            return []
+        contractions = []
+        for hi in highs[:-1]:
+            after = lows[bisect.bisect_right(lows, hi):]
+            if after:
+                # First of the lowest lows, as min() picks
+                lo = min(after, key=lambda i: self.low[i])
+                contractions.append(self._contraction(hi, lo))
+        return contractions
+
+    def signal_at(self, t: int) -> Optional[VCPSignal]:
+        """The signal detect_vcp would give on the bars up to t, if it detects one"""
+        if not self.gate[t]:
+            return None
+        contractions = self.contractions_at(t)
+        if len(contractions) < self.detector.min_contractions:
+            return None
+        signal = VCPSignal(symbol=self.symbol, detected=False, notes=[])
+        if not self.detector._validate_vcp_pattern(None, contractions, signal):
+            return None
+        self.detector._score_signal(self.df.iloc[:t + 1], contractions, signal)
+        return signal
+
+    def signals(self) -> Iterator[Tuple[int, VCPSignal]]:
+        for t in np.flatnonzero(self.gate).tolist():
+            signal = self.signal_at(t)
+            if signal is not None:
+                yield t, signal
+
+    def outcome(self, t: int, signal: VCPSignal, fresh: bool) -> BacktestSignal:
+        close = float(self.close[t])
+        stop = float(signal.contractions[-1].low_price)
+        pivot = float(signal.pivot_price)
+        ahead = slice(t + 1, min(t + 1 + FOLLOW_BARS, len(self.close)))
+        broke = np.flatnonzero(self.close[ahead] > pivot)
+        stopped = np.flatnonzero(self.low[ahead] <= stop)
+        out = BacktestSignal(
+            symbol=self.symbol,
+            date=str(self.dates[t].date()),
+            bar=t,
+            close=close,
+            pivot_price=pivot,
+            stop_price=stop,
+            confidence=float(signal.confidence_score),
+            contractions=len(signal.contractions),
+            final_contraction=float(signal.final_contraction_tightness),
+            breakout_detected=bool(signal.breakout_detected),
+            fresh=fresh,
+            returns={
+                h: float(self.close[t + h] / close - 1) if t + h < len(self.close) else None
+                for h in HORIZONS
+            },
+        )
+        if len(broke):
+            out.bars_to_breakout = int(broke[0]) + 1
+            out.breakout_date = str(self.dates[t + out.bars_to_breakout].date())
+        if len(stopped):
+            out.bars_to_stop = int(stopped[0]) + 1
+            out.stop_date = str(self.dates[t + out.bars_to_stop].date())
+        # A stop on the breakout bar counts as a stop: the daily bar cannot order them
+        if out.bars_to_stop is not None and (
+            out.bars_to_breakout is None or out.bars_to_stop <= out.bars_to_breakout
+        ):
+            out.first_event = "stop"
+        elif out.bars_to_breakout is not None:
+            out.first_event = "breakout"
+        return out
+
+    def run(self) -> List[BacktestSignal]:
+        results, previous = [], None
+        for t, signal in self.signals():
+            results.append(self.outcome(t, signal, fresh=previous != t - 1))
+            previous = t
+        return results
+
+
+def backtest_symbol(
+    symbol: str,
+    detector: Optional[VCPDetector] = None,
+    df: Optional[pd.DataFrame] = None,
+    history_dir: Path = PRICE_HISTORY_DIR,
+) -> List[BacktestSignal]:
+    detector = detector or VCPDetector()
+    df = load_history(symbol, history_dir) if df is None else df
+    if df is None or len(df) < MIN_BARS:
+        return []
+    return SymbolReplay(detector, df, symbol).run()
+
+
+def _backtest_worker(args: Tuple[str, Dict, str]) -> List[BacktestSignal]:
+    symbol, params, history_dir = args
+    return backtest_symbol(symbol, VCPDetector(**params), history_dir=Path(history_dir))
+
+
+def run_backtest(
+    symbols: List[str],
+    params: Optional[Dict] = None,
+    workers: int = 1,
+    history_dir: Path = PRICE_HISTORY_DIR,
+) -> List[BacktestSignal]:
+    """Signals for every symbol; symbols are spread over `workers` processes."""
+    params = params or {}
+    jobs = [(symbol, params, str(history_dir)) for symbol in symbols]
+    if workers <= 1:
+        per_symbol = map(_backtest_worker, jobs)
+        return [s for signals in per_symbol for s in signals]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        per_symbol = pool.map(_backtest_worker, jobs, chunksize=8)
+        return [s for signals in per_symbol for s in signals]
+
+
+def summarize(signals: List[BacktestSignal]) -> Dict:
+    """Breakout/stop rates and forward returns over fresh signals."""
+    fresh = [s for s in signals if s.fresh]
+    n = len(fresh)
+    out = {
+        "signals": len(signals),
+        "fresh": n,
+        "symbols": len({s.symbol for s in signals}),
+        "breakout_rate": sum(s.first_event == "breakout" for s in fresh) / n if n else 0.0,
+        "stop_rate": sum(s.first_event == "stop" for s in fresh) / n if n else 0.0,
+        "returns": {},
+    }
+    for h in HORIZONS:
+        values = [s.returns[h] for s in fresh if s.returns.get(h) is not None]
+        out["returns"][h] = {
+            "n": len(values),
+            "mean": float(np.mean(values)) if values else None,
+            "hit_rate": sum(v > 0 for v in values) / len(values) if values else None,
+        }
+    return out
+
+
+def write_csv(signals: List[BacktestSignal], path: str) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        head = [k for k in asdict(signals[0]) if k != "returns"] if signals else []
+        writer.writerow(head + [f"return_{h}" for h in HORIZONS])
+        for signal in signals:
+            row = asdict(signal)
+            writer.writerow([row[k] for k in head] + [signal.returns.get(h) for h in HORIZONS])
+
+
+def report(summary: Dict, elapsed: float, symbols: int) -> None:
+    print(f"[backtest] {symbols} symbols in {elapsed:.1f}s: {summary['signals']} signal bars, "
+          f"{summary['fresh']} fresh signals on {summary['symbols']} symbols")
+    print(f"  breakout first {summary['breakout_rate']:.1%}, stop first {summary['stop_rate']:.1%} "
+          f"(within {FOLLOW_BARS} bars)")
+    for h, row in summary["returns"].items():
+        if row["n"]:
+            print(f"  +{h:<3} bars  n={row['n']:<6} mean {row['mean']:+.2%}  "
+                  f"hit rate {row['hit_rate']:.1%}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Walk-forward VCP backtest over stored history")
+    parser.add_argument("--symbols", nargs="*", help="default: every stored symbol")
+    parser.add_argument("--limit", type=int, help="only the first N symbols")
+    parser.add_argument("--history-dir", type=Path, default=PRICE_HISTORY_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--no-trend-template", action="store_true")
+    parser.add_argument("--min-price", type=float, default=30.0)
+    parser.add_argument("--min-volume", type=int, default=1000000)
+    parser.add_argument("--csv", help="write every signal to this CSV file")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    symbols = args.symbols or corpus_symbols(args.history_dir)
+    symbols = symbols[:args.limit] if args.limit else symbols
+    params = {
+        "min_price": args.min_price,
+        "min_volume": args.min_volume,
+        "check_trend_template": not args.no_trend_template,
+    }
+    started = time.perf_counter()
+    signals = run_backtest(symbols, params, args.workers, args.history_dir)
+    summary = summarize(signals)
+    if args.csv:
+        write_csv(signals, args.csv)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        report(summary, time.perf_counter() - started, len(symbols))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Parameter sweep for VCPDetector thresholds, scored against labelled fixtures.
+
+The entry points disagree on thresholds: the API uses min_price 30 and
+min_volume 1M, while worker/scan_batch and the root backend use 10 and 500k.
+This tool scores a whole grid of settings in one pass and prints a
+precision/recall table against tests/fixtures (true_vcp.json, false_vcp.json).
+
+Nothing the detector computes before its thresholds depends on them: swing
+points, contractions, SMAs, the trend-template verdict and average volume.
+These are built once per fixture with vcp_backtest.SymbolReplay. Each bar is
+then reduced to a few numbers, such as its close, its contraction count and,
+for each max_contractions in the grid, the pattern rule inputs. Every grid
+row is judged on every bar with one broadcast comparison per threshold.
+
+A fixture counts as detected when any bar inside its [start, end] window is
+detected. When the stored history does not cover the window, the latest bar
+is used instead, as tests/detectors/test_vcp_fixtures.py does.
+
+breakout_volume_multiplier is not swept. It only sets `breakout_detected` on
+a signal that was already detected, so it cannot move precision or recall.
+
+Usage: python vcp_sweep.py [--grid min_price=10,30 --grid max_base_depth=0.25,0.35]
+                           [--true tests/fixtures/true_vcp.json]
+                           [--false tests/fixtures/false_vcp.json]
+                           [--top 20] [--csv sweep.csv] [--json]
+"""
+
+import argparse
+import csv
+import inspect
+import itertools
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scan_priority import PRICE_HISTORY_DIR
+from vcp_backtest import MIN_BARS, SymbolReplay, load_history
+from vcp_ultimate_algorithm import Contraction, VCPDetector
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "tests" / "fixtures"
+SWEEPABLE = (
+    "min_price", "min_volume", "min_contractions", "max_contractions", "max_base_depth",
+    "final_contraction_max", "check_trend_template",
+)
+DEFAULT_GRID: Dict[str, list] = {
+    "min_price": [10.0, 30.0],
+    "min_volume": [500_000, 1_000_000],
+    "min_contractions": [2, 3],
+    "max_contractions": [4, 6],
+    "max_base_depth": [0.25, 0.35, 0.50],
+    "final_contraction_max": [0.08, 0.10, 0.15],
+    "check_trend_template": [True, False],
+}
+# Settings hard-coded by the entry points (the root backend matches scan_batch)
+PRESETS: Dict[str, Dict] = {
+    "api": {"min_price": 30.0, "min_volume": 1_000_000, "check_trend_template": True},
+    "scan_batch": {"min_price": 10.0, "min_volume": 500_000, "check_trend_template": True},
+}
+
+Grid = Dict[str, np.ndarray]  # parameter -> one value per grid row
+
+
+@dataclass
+class Fixture:
+    symbol: str
+    start: str
+    end: str
+    label: bool
+
+
+def load_fixtures(true_path: Path, false_path: Path) -> List[Fixture]:
+    fixtures = []
+    for path, label in ((true_path, True), (false_path, False)):
+        for row in json.loads(Path(path).read_text()):
+            fixtures.append(Fixture(row["symbol"], row["start"], row["end"], label))
+    return fixtures
+
+
+def detector_defaults() -> Dict:
+    params = inspect.signature(VCPDetector.__init__).parameters
+    return {name: params[name].default for name in SWEEPABLE}
+
+
+def expand_grid(grid: Dict[str, Sequence]) -> Grid:
+    """Cartesian product of `grid`; parameters it leaves out keep the detector default."""
+    unknown = set(grid) - set(SWEEPABLE)
+    if unknown:
+        raise ValueError(f"not sweepable: {', '.join(sorted(unknown))}")
+    values = {**{k: [v] for k, v in detector_defaults().items()}, **grid}
+    rows = list(itertools.product(*(values[k] for k in SWEEPABLE)))
+    return {k: np.array([row[i] for row in rows]) for i, k in enumerate(SWEEPABLE)}
+
+
+def pattern_inputs(
+    contractions: List[Contraction], max_contractions: int
+) -> Tuple[bool, float, float]:
+    """(decreasing enough, final drop, base depth) as VCPDetector._validate_vcp_pattern sees them"""
+    if len(contractions) > max_contractions:
+        contractions = contractions[-max_contractions:]
+    if len(contractions) < 2:
+        # The decreasing ratio divides by zero; detect_vcp reports an error, not a signal
+        return False, np.nan, np.nan
+    decreasing = sum(
+        contractions[i].percent_drop <= contractions[i - 1].percent_drop
+        for i in range(1, len(contractions))
+    )
+    highs = [c.high_price for c in contractions]
+    lows = [c.low_price for c in contractions]
+    return (
+        decreasing / (len(contractions) - 1) >= 0.6,
+        contractions[-1].percent_drop,
+        (max(highs) - min(lows)) / max(highs),
+    )
+
+
+class BarFeatures:
+    """Threshold-free inputs of every detection stage, for a list of bars."""
+
+    def __init__(self, replay: SymbolReplay, bars: Sequence[int], max_contractions: Sequence[int]):
+        bars = np.asarray(bars, dtype=int)
+        self.bars = bars
+        self.close = replay.close[bars].astype(float)
+        self.avg_volume = replay.avg_volume[bars]
+        self.trend_passed = replay.trend_passed[bars]
+        self.highs_seen = replay.highs_seen[bars]
+        self.lows_seen = replay.lows_seen[bars]
+        found = [replay.contractions_at(int(t)) for t in bars]
+        self.contractions = np.array([len(c) for c in found], dtype=int)
+        self.max_contractions = sorted({int(m) for m in max_contractions})
+        # Pattern rule inputs per max_contractions value, each shaped (max_contractions, bars)
+        shape = (len(self.max_contractions), len(bars))
+        inputs = [pattern_inputs(c, m) for m in self.max_contractions for c in found]
+        self.decreasing = np.array([x[0] for x in inputs], dtype=bool).reshape(shape)
+        self.final_drop = np.array([x[1] for x in inputs], dtype=float).reshape(shape)
+        self.base_depth = np.array([x[2] for x in inputs], dtype=float).reshape(shape)
+
+    def detected(self, grid: Grid) -> np.ndarray:
+        """(grid rows, bars) matrix: would detect_vcp detect at this bar with these settings"""
+        col = {k: v[:, None] for k, v in grid.items()}
+        m = np.searchsorted(self.max_contractions, grid["max_contractions"])
+        with np.errstate(invalid="ignore"):
+            ok = self.close >= col["min_price"]
+            ok &= self.avg_volume >= col["min_volume"]
+            ok &= ~col["check_trend_template"] | self.trend_passed
+            ok &= self.highs_seen >= col["min_contractions"]
+            ok &= self.lows_seen >= col["min_contractions"]
+            ok &= self.contractions >= col["min_contractions"]
+            ok &= self.decreasing[m]
+            ok &= self.final_drop[m] <= col["final_contraction_max"]
+            ok &= self.base_depth[m] <= col["max_base_depth"]
+        return ok
+
+
+def fixture_bars(df: pd.DataFrame, fixture: Fixture) -> Tuple[List[int], bool]:
+    """Bars inside the fixture window, or the latest bar when history misses the window."""
+    dates = df.index
+    inside = np.flatnonzero((dates >= pd.Timestamp(fixture.start))
+                            & (dates <= pd.Timestamp(fixture.end)))
+    inside = [int(t) for t in inside if t >= MIN_BARS - 1]
+    if inside:
+        return inside, True
+    return ([len(df) - 1] if len(df) >= MIN_BARS else []), False
+
+
+def sweep(
+    fixtures: List[Fixture],
+    grid: Grid,
+    history_dir: Path = PRICE_HISTORY_DIR,
+) -> Dict:
+    """Confusion counts per grid row over the fixtures that have stored history."""
+    rows = len(grid["min_price"])
+    predicted, labels, used, covered = [], [], [], 0
+    for fixture in fixtures:
+        df = load_history(fixture.symbol, history_dir)
+        if df is None:
+            continue
+        bars, in_window = fixture_bars(df, fixture)
+        covered += in_window
+        if bars:
+            replay = SymbolReplay(VCPDetector(), df, fixture.symbol)
+            hits = BarFeatures(replay, bars, grid["max_contractions"]).detected(grid).any(axis=1)
+        else:
+            hits = np.zeros(rows, dtype=bool)
+        predicted.append(hits)
+        labels.append(fixture.label)
+        used.append(fixture.symbol)
+    predicted = np.array(predicted, dtype=bool).reshape(len(used), rows).T
+    labels = np.array(labels, dtype=bool)
+    tp = (predicted & labels).sum(axis=1)
+    fp = (predicted & ~labels).sum(axis=1)
+    fn = (~predicted & labels).sum(axis=1)
+    tn = (~predicted & ~labels).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = np.nan_to_num(tp / (tp + fp))
+        recall = np.nan_to_num(tp / (tp + fn))
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+    return {
+        "fixtures": used, "missing": len(fixtures) - len(used), "in_window": covered,
+        "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+        "precision": precision, "recall": recall, "f1": f1,
+    }
+
+
+def table(grid: Grid, scores: Dict) -> List[Dict]:
+    """One row per grid setting, best F1 first (then precision, then recall)."""
+    out = []
+    for i in range(len(grid["min_price"])):
+        row = {k: grid[k][i].item() for k in SWEEPABLE}
+        row.update({k: scores[k][i].item() for k in ("tp", "fp", "fn", "tn")})
+        row.update({k: round(scores[k][i].item(), 4) for k in ("precision", "recall", "f1")})
+        row["preset"] = ",".join(
+            name for name, preset in PRESETS.items()
+            if all(row[k] == v for k, v in {**detector_defaults(), **preset}.items())
+        )
+        out.append(row)
+    return sorted(out, key=lambda r: (-r["f1"], -r["precision"], -r["recall"]))
+
+
+def parse_grid(specs: List[str]) -> Dict[str, list]:
+    """`name=v1,v2` specs, typed like the detector's defaults."""
+    defaults = detector_defaults()
+    grid: Dict[str, list] = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in defaults or not values:
+            raise ValueError(f"bad --grid {spec!r}; sweepable: {', '.join(SWEEPABLE)}")
+        kind = type(defaults[name])
+        if kind is bool:
+            truthy = ("1", "true", "yes", "on")
+            grid[name] = [v.strip().lower() in truthy for v in values.split(",")]
+        else:
+            grid[name] = [kind(float(v)) for v in values.split(",")]
+    return grid
+
+
+def report(rows: List[Dict], scores: Dict, top: int, elapsed: float) -> None:
+    print(f"[sweep] {len(rows)} settings x {len(scores['fixtures'])} fixtures in {elapsed:.2f}s "
+          f"({scores['in_window']} windows covered by stored history, "
+          f"{scores['missing']} fixtures without history)")
+    head = ("price", "volume", "minc", "maxc", "depth", "final", "trend")
+    print("  " + " ".join(f"{h:>8}" for h in head)
+          + f" {'tp':>3} {'fp':>3} {'fn':>3} {'tn':>3} {'prec':>6} {'recall':>6} {'f1':>6}  preset")
+    shown = rows[:top] + [r for r in rows[top:] if r["preset"]]
+    for r in shown:
+        values = [r[k] for k in SWEEPABLE]
+        print("  " + " ".join(f"{v!s:>8}" for v in values)
+              + f" {r['tp']:>3} {r['fp']:>3} {r['fn']:>3} {r['tn']:>3} {r['precision']:>6.2f}"
+              f" {r['recall']:>6.2f} {r['f1']:>6.2f}  {r['preset']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sweep VCPDetector thresholds against fixtures")
+    parser.add_argument("--grid", action="append", default=[],
+                        help="name=v1,v2 (repeatable); replaces that parameter's default values")
+    parser.add_argument("--true", type=Path, default=FIXTURES_DIR / "true_vcp.json")
+    parser.add_argument("--false", type=Path, default=FIXTURES_DIR / "false_vcp.json")
+    parser.add_argument("--history-dir", type=Path, default=PRICE_HISTORY_DIR)
+    parser.add_argument("--top", type=int, default=20, help="rows to print (presets always shown)")
+    parser.add_argument("--csv", help="write the full table to this CSV file")
+    parser.add_argument("--json", action="store_true", help="print the full table as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = expand_grid({**DEFAULT_GRID, **parse_grid(args.grid)})
+    except ValueError as exc:
+        parser.error(str(exc))
+    started = time.perf_counter()
+    scores = sweep(load_fixtures(args.true, args.false), grid, args.history_dir)
+    rows = table(grid, scores)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        report(rows, scores, args.top, time.perf_counter() - started)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
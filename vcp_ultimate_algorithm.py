@@ -5,6 +5,9 @@ A comprehensive implementation for detecting VCP patterns in stock data
 Based on Mark Minervini's and William O'Neil's trading methodologies
 """
 
+import json
+import math
+import time
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
@@ -40,6 +43,108 @@ class VCPSignal:
     breakout_detected: bool = False
     signal_date: pd.Timestamp = None
     notes: List[str] = None
+    rejected_stage: Optional[str] = None  # stage that rejected the ticker, see STAGES
+    rejection: Optional[str] = None  # short reason code, e.g. "min_volume"
+
+
+# Detection stages, in order, as reported to a stage sink
+STAGES = ("validate", "trend_template", "swings", "contractions", "pattern", "scoring")
+
+
+class StageStats:
+    """
+    Stage sink that aggregates detector instrumentation over a scan.
+
+    Pass an instance as `VCPDetector(stage_sink=...)`. Any object with the same
+    two methods can be used instead:
+
+        record_stage(symbol, stage, seconds)   after every stage that ran
+        record_result(symbol, signal)          once per detect_vcp call
+
+    Latencies go into fixed millisecond buckets per stage; rejections are
+    counted per (stage, reason). With `keep_tickers=True` the per-ticker stage
+    timings and outcome are kept too.
+    """
+
+    BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, math.inf)
+
+    def __init__(self, keep_tickers: bool = False):
+        self.keep_tickers = keep_tickers
+        self.stages: Dict[str, Dict] = {}
+        self.rejections: Dict[str, Dict[str, int]] = {}
+        self.scanned = 0
+        self.detected = 0
+        self.tickers: Dict[str, Dict] = {}
+
+    def record_stage(self, symbol: str, stage: str, seconds: float) -> None:
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = {
+                "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "buckets": [0] * len(self.BUCKETS_MS),
+            }
+        ms = seconds * 1000.0
+        entry["count"] += 1
+        entry["total_ms"] += ms
+        entry["max_ms"] = max(entry["max_ms"], ms)
+        entry["buckets"][next(i for i, edge in enumerate(self.BUCKETS_MS) if ms <= edge)] += 1
+        if self.keep_tickers:
+            self.tickers.setdefault(symbol, {"stages_ms": {}})["stages_ms"][stage] = ms
+
+    def record_result(self, symbol: str, signal: "VCPSignal") -> None:
+        self.scanned += 1
+        if signal.detected:
+            self.detected += 1
+        else:
+            stage = signal.rejected_stage or "unknown"
+            reason = signal.rejection or stage
+            by_reason = self.rejections.setdefault(stage, {})
+            by_reason[reason] = by_reason.get(reason, 0) + 1
+        if self.keep_tickers:
+            self.tickers.setdefault(symbol, {"stages_ms": {}}).update(
+                detected=signal.detected, rejected_stage=signal.rejected_stage,
+                rejection=signal.rejection,
+            )
+
+    def to_dict(self) -> Dict:
+        stages = {}
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        for stage in sorted(self.stages, key=lambda s: order.get(s, len(STAGES))):
+            entry = self.stages[stage]
+            stages[stage] = {
+                "count": entry["count"],
+                "total_ms": round(entry["total_ms"], 3),
+                "mean_ms": round(entry["total_ms"] / entry["count"], 4) if entry["count"] else 0.0,
+                "max_ms": round(entry["max_ms"], 3),
+                "histogram": {
+                    ("+Inf" if math.isinf(edge) else f"le_{edge:g}ms"): n
+                    for edge, n in zip(self.BUCKETS_MS, entry["buckets"])
+                },
+            }
+        out = {
+            "scanned": self.scanned,
+            "detected": self.detected,
+            "stages": stages,
+            "rejections": self.rejections,
+        }
+        if self.keep_tickers:
+            out["tickers"] = self.tickers
+        return out
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self) -> str:
+        lines = [f"Scanned {self.scanned}, detected {self.detected}"]
+        for stage, entry in self.to_dict()["stages"].items():
+            rejected = sum(self.rejections.get(stage, {}).values())
+            lines.append(f"  {stage:<15} {entry['count']:>6} runs  {entry['mean_ms']:>8.3f} ms mean  "
+                         f"{entry['max_ms']:>8.2f} ms max  {rejected:>6} rejected")
+        for stage, reasons in self.rejections.items():
+            for reason, n in sorted(reasons.items(), key=lambda kv: -kv[1]):
+                lines.append(f"  rejected at {stage}: {reason} x{n}")
+        return "\n".join(lines)
 
 
 class VCPDetector:
@@ -58,7 +163,8 @@ class VCPDetector:
                  max_base_depth: float = 0.35,
                  final_contraction_max: float = 0.10,
                  breakout_volume_multiplier: float = 1.5,
-                 check_trend_template: bool = True):
+                 check_trend_template: bool = True,
+                 stage_sink=None):
         """
         Initialize VCP Detector with configurable parameters
         
@@ -71,6 +177,8 @@ class VCPDetector:
             final_contraction_max: Maximum depth of final contraction (default: 0.10 = 10%)
             breakout_volume_multiplier: Volume multiplier for breakout confirmation (default: 1.5)
             check_trend_template: Whether to apply Minervini's 8-point trend template (default: True)
+            stage_sink: Optional instrumentation sink (e.g. StageStats) that receives
+                per-stage latencies and each ticker's outcome (default: None, no overhead)
         """
         self.min_price = min_price
         self.min_volume = min_volume
@@ -80,6 +188,7 @@ class VCPDetector:
         self.final_contraction_max = final_contraction_max
         self.breakout_volume_multiplier = breakout_volume_multiplier
         self.check_trend_template = check_trend_template
+        self.stage_sink = stage_sink
     
     def detect_vcp(self, df: pd.DataFrame, symbol: str) -> VCPSignal:
         """
@@ -92,72 +201,110 @@ class VCPDetector:
         Returns:
             VCPSignal object with detection results
         """
+        # Initialize signal object
+        signal = VCPSignal(symbol=symbol, detected=False, notes=[])
+        stage = "validate"
         try:
-            # Initialize signal object
-            signal = VCPSignal(symbol=symbol, detected=False, notes=[])
-            
             # Data validation
-            if not self._validate_data(df, signal):
-                return signal
+            if not self._run_stage(stage, symbol, self._validate_data, df, signal):
+                return self._finish(signal, stage)
             
             # Apply Minervini Trend Template filter (can be bypassed)
             if self.check_trend_template:
-                if not self._check_trend_template(df, signal):
-                    return signal
+                stage = "trend_template"
+                if not self._run_stage(stage, symbol, self._check_trend_template, df, signal):
+                    return self._finish(signal, stage, signal.rejection or "trend_template")
             
             # Find swing points (highs and lows)
-            swing_highs, swing_lows = self._find_swing_points(df)
+            stage = "swings"
+            swing_highs, swing_lows = self._run_stage(stage, symbol, self._find_swing_points, df)
             
             if len(swing_highs) < self.min_contractions or len(swing_lows) < self.min_contractions:
                 signal.notes.append("Insufficient swing points for pattern analysis")
-                return signal
+                return self._finish(signal, stage, "swing_points")
             
             # Identify base and contractions
-            base_start, contractions = self._identify_contractions(df, swing_highs, swing_lows)
+            stage = "contractions"
+            base_start, contractions = self._run_stage(
+                stage, symbol, self._identify_contractions, df, swing_highs, swing_lows
+            )
             
             if len(contractions) < self.min_contractions:
                 signal.notes.append(f"Only {len(contractions)} contractions found, need {self.min_contractions}")
-                return signal
+                return self._finish(signal, stage, "too_few_contractions")
             
             # Validate VCP criteria
-            is_valid_vcp = self._validate_vcp_pattern(df, contractions, signal)
+            stage = "pattern"
+            is_valid_vcp = self._run_stage(
+                stage, symbol, self._validate_vcp_pattern, df, contractions, signal
+            )
             
             if is_valid_vcp:
-                signal.detected = True
-                signal.contractions = contractions
-                signal.signal_date = df.index[-1]
-                
-                # Calculate additional metrics
-                signal.pivot_price = self._calculate_pivot_price(df, contractions)
-                signal.trend_strength = self._calculate_trend_strength(df)
-                signal.volume_dry_up = self._check_volume_dry_up(df, contractions)
-                signal.final_contraction_tightness = contractions[-1].percent_drop
-                
-                # Calculate confidence score
-                signal.confidence_score = self._calculate_confidence_score(
-                    signal, len(contractions), signal.volume_dry_up, True
-                )
-                
-                # Check for breakout
-                signal.breakout_detected = self._check_breakout(df, signal.pivot_price)
-                
-                signal.notes.append(f"VCP detected with {len(contractions)} contractions")
+                stage = "scoring"
+                self._run_stage(stage, symbol, self._score_signal, df, contractions, signal)
+                return self._finish(signal)
             
-            return signal
+            return self._finish(signal, stage)
             
         except Exception as e:
             signal.notes.append(f"Error in VCP detection: {str(e)}")
-            return signal
+            signal.detected = False
+            return self._finish(signal, stage, f"error:{type(e).__name__}")
+    
+    def _run_stage(self, stage: str, symbol: str, fn, *args):
+        """Call a detection stage, reporting its latency when a stage sink is attached"""
+        if self.stage_sink is None:
+            return fn(*args)
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.stage_sink.record_stage(symbol, stage, time.perf_counter() - start)
+    
+    def _finish(self, signal: VCPSignal, stage: Optional[str] = None,
+                reason: Optional[str] = None) -> VCPSignal:
+        """Record where (and why) the ticker was rejected and report the outcome"""
+        if not signal.detected:
+            signal.rejected_stage = stage
+            signal.rejection = reason or signal.rejection or stage
+        if self.stage_sink is not None:
+            self.stage_sink.record_result(signal.symbol, signal)
+        return signal
+    
+    def _score_signal(self, df: pd.DataFrame, contractions: List[Contraction],
+                      signal: VCPSignal) -> None:
+        """Fill in pivot, strength, volume and confidence metrics for a detected pattern"""
+        signal.detected = True
+        signal.contractions = contractions
+        signal.signal_date = df.index[-1]
+        
+        # Calculate additional metrics
+        signal.pivot_price = self._calculate_pivot_price(df, contractions)
+        signal.trend_strength = self._calculate_trend_strength(df)
+        signal.volume_dry_up = self._check_volume_dry_up(df, contractions)
+        signal.final_contraction_tightness = contractions[-1].percent_drop
+        
+        # Calculate confidence score
+        signal.confidence_score = self._calculate_confidence_score(
+            signal, len(contractions), signal.volume_dry_up, True
+        )
+        
+        # Check for breakout
+        signal.breakout_detected = self._check_breakout(df, signal.pivot_price)
+        
+        signal.notes.append(f"VCP detected with {len(contractions)} contractions")
     
     def _validate_data(self, df: pd.DataFrame, signal: VCPSignal) -> bool:
         """Validate input data quality and minimum requirements"""
         if df is None or len(df) < 60:
             signal.notes.append("Insufficient data points (need 60+ days)")
+            signal.rejection = "insufficient_data"
             return False
         
         required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
         if not all(col in df.columns for col in required_columns):
             signal.notes.append("Missing required OHLCV columns")
+            signal.rejection = "missing_columns"
             return False
         
         current_price = df['Close'].iloc[-1]
@@ -165,10 +312,12 @@ class VCPDetector:
         
         if current_price < self.min_price:
             signal.notes.append(f"Price {current_price:.2f} below minimum {self.min_price}")
+            signal.rejection = "min_price"
             return False
         
         if avg_volume < self.min_volume:
             signal.notes.append(f"Volume {avg_volume:.0f} below minimum {self.min_volume}")
+            signal.rejection = "min_volume"
             return False
         
         return True
@@ -246,10 +395,12 @@ class VCPDetector:
                 return True
             else:
                 signal.notes.append(f"Trend Template: {passed_criteria}/8 criteria passed")
+                signal.rejection = f"trend_template_{passed_criteria}_of_8"
                 return False
                 
         except Exception as e:
             signal.notes.append(f"Trend Template error: {str(e)}")
+            signal.rejection = "trend_template_error"
             return False
     
     def _find_swing_points(self, df: pd.DataFrame, window: int = 5) -> Tuple[List, List]:
@@ -351,12 +502,14 @@ class VCPDetector:
         
         if decreasing_count / (len(contractions) - 1) < 0.6:  # At least 60% should be decreasing
             signal.notes.append("Contractions not sufficiently decreasing")
+            signal.rejection = "not_decreasing"
             return False
         
         # Check 2: Final contraction should be tight
         final_contraction = contractions[-1]
         if final_contraction.percent_drop > self.final_contraction_max:
             signal.notes.append(f"Final contraction {final_contraction.percent_drop:.1%} too wide")
+            signal.rejection = "final_contraction_too_wide"
             return False
         
         # Check 3: Base shouldn't be too deep overall
@@ -366,6 +519,7 @@ class VCPDetector:
         
         if base_depth > self.max_base_depth:
             signal.notes.append(f"Base too deep: {base_depth:.1%}")
+            signal.rejection = "base_too_deep"
             return False
         
         # Check 4: Volume should generally decrease through pattern
@@ -0,0 +1,250 @@
+"""
+Celery task graph for distributed VCP scans.
+
+A scan is a chord over chunks of `LEGEND_SCAN_CHUNK_SIZE` tickers (default 50),
+in priority order (scan_priority.py). Each chunk is a chain:
+
+  fetch_chunk    price history for every ticker, as candles (the JSON format
+                 of data/price_history). A chunk where every fetch failed is
+                 retried with backoff, since that means a provider outage;
+                 once retries run out its tickers are recorded as failed and
+                 the scan carries on. A single ticker's failure is only recorded.
+  detect_chunk   VCP detection on each ticker's candles
+  persist_chunk  upserts the chunk's patterns with the run's shared `as_of`
+                 and checkpoints every ticker in `scan_progress`, in one
+                 transaction. Retried on database errors.
+
+`aggregate_scan` receives every chunk's summary, writes one `scan_runs` row
+and exports scan metrics. Chunks run on any number of workers, so scan
+capacity scales independently of the API and scheduler.
+
+The broker and result backend default to REDIS_URL (CELERY_BROKER_URL and
+CELERY_RESULT_BACKEND override them). Without either, enqueueing a scan raises
+rather than queueing into a transport no worker reads; tests opt into the
+in-memory transport together with `task_always_eager`.
+
+  celery -A worker.celery_app worker -Q scans     # run a worker
+  python -m worker.celery_app [--chunk-size 50] [--wait]   # start a scan
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import sqlalchemy as sa
+from celery import Celery, chain, chord
+from celery.result import AsyncResult
+
+# Add parent directory to path so we can import the detector
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.metrics import SCAN_SYMBOLS, record_scan, timed_fetch, write_textfile  # noqa: E402
+from scan_checkpoint import ensure_table, record_progress  # noqa: E402
+from worker import utils  # noqa: E402
+from worker.shards import record_scan_run  # noqa: E402
+
+REDIS_URL = os.getenv("REDIS_URL")
+CHUNK_SIZE = int(os.getenv("LEGEND_SCAN_CHUNK_SIZE", "50"))
+QUEUE = "scans"
+FETCH_RETRIES = 3
+PERSIST_RETRIES = 5
+
+celery = Celery("legend")
+celery.conf.update(
+    broker_url=os.getenv("CELERY_BROKER_URL") or REDIS_URL,
+    result_backend=os.getenv("CELERY_RESULT_BACKEND") or REDIS_URL,
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_default_queue=QUEUE,
+    # A chunk is minutes of work; take one at a time and ack it once persisted
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    result_expires=24 * 3600,
+)
+
+Candles = List[Dict]
+
+
+class ChunkFetchError(RuntimeError):
+    """Every ticker in a chunk failed to fetch."""
+
+
+def require_broker() -> None:
+    """Raise unless scans can reach a worker: a configured broker, or eager mode."""
+    if not celery.conf.broker_url and not celery.conf.task_always_eager:
+        raise RuntimeError("No Celery broker configured; set REDIS_URL or CELERY_BROKER_URL")
+
+
+@lru_cache(maxsize=None)
+def _engine_for(url: str) -> sa.engine.Engine:
+    return sa.create_engine(url, future=True, pool_pre_ping=True)
+
+
+def get_engine() -> sa.engine.Engine:
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL required")
+    return _engine_for(url)
+
+
+def to_candles(df) -> Candles:
+    return [
+        {
+            "date": str(row["Date"])[:10], "open": float(row["Open"]), "high": float(row["High"]),
+            "low": float(row["Low"]), "close": float(row["Close"]), "volume": float(row["Volume"]),
+        }
+        for row in df.to_dict("records")
+    ]
+
+
+def to_frame(candles: Candles):
+    import pandas as pd
+
+    df = pd.DataFrame(candles).rename(columns={
+        "date": "Date", "open": "Open", "high": "High", "low": "Low", "close": "Close",
+        "volume": "Volume",
+    })
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+
+def chunks(tickers: List[str], size: int) -> List[List[str]]:
+    return [tickers[i:i + size] for i in range(0, len(tickers), size)]
+
+
+@celery.task(
+    bind=True, autoretry_for=(ChunkFetchError,), max_retries=FETCH_RETRIES,
+    retry_backoff=True, retry_backoff_max=300,
+)
+def fetch_chunk(self, tickers: List[str]) -> Dict:
+    """{"candles": {ticker: candles}, "failed": {ticker: error}} for `tickers`."""
+    candles: Dict[str, Candles] = {}
+    failed: Dict[str, str] = {}
+    for ticker in tickers:
+        try:
+            df = timed_fetch("yfinance", utils.fetch_price_data, ticker)
+            candles[ticker] = to_candles(df) if df is not None else []
+        except Exception as exc:
+            failed[ticker] = str(exc)[:500]
+    if tickers and len(failed) == len(tickers):
+        sample = next(iter(failed.values()))
+        if self.request.retries < self.max_retries:
+            raise ChunkFetchError(f"all {len(tickers)} fetches failed, e.g. {sample}")
+        # Out of retries: fail only this chunk's tickers so the chord still aggregates
+        logging.warning(f"Chunk of {len(tickers)} tickers failed after {self.max_retries} "
+                        f"retries, e.g. {sample}")
+    return {"candles": candles, "failed": failed}
+
+
+@celery.task
+def detect_chunk(fetched: Dict, as_of: str) -> Dict:
+    """Pattern rows for the fetched candles; detector errors fail only that ticker."""
+    rows: List[Dict] = []
+    scanned: List[str] = []
+    failed = dict(fetched["failed"])
+    stamp = datetime.fromisoformat(as_of)
+    for ticker, candles in fetched["candles"].items():
+        try:
+            found = utils.vcp_records(ticker, to_frame(candles) if candles else None, as_of=stamp)
+        except Exception as exc:
+            failed[ticker] = f"detect: {exc}"[:500]
+            continue
+        rows.extend({**r, "as_of": as_of, "meta": json.dumps(r["meta"])} for r in found)
+        scanned.append(ticker)
+    return {"rows": rows, "scanned": scanned, "failed": failed}
+
+
+@celery.task(
+    bind=True, autoretry_for=(sa.exc.OperationalError,), max_retries=PERSIST_RETRIES,
+    retry_backoff=True,
+)
+def persist_chunk(self, detected: Dict, run_key: str) -> Dict:
+    """Upsert the chunk's patterns and checkpoint its tickers in one transaction."""
+    rows = [{**r, "as_of": datetime.fromisoformat(r["as_of"])} for r in detected["rows"]]
+    with get_engine().begin() as conn:
+        if rows:
+            conn.execute(utils.upsert_patterns_sql(list(rows[0].keys())), rows)
+        for ticker in detected["scanned"]:
+            record_progress(conn, run_key, ticker, ok=True)
+        for ticker, error in detected["failed"].items():
+            record_progress(conn, run_key, ticker, ok=False, error=error)
+    SCAN_SYMBOLS.labels(scanner="celery", outcome="ok").inc(len(detected["scanned"]))
+    SCAN_SYMBOLS.labels(scanner="celery", outcome="failed").inc(len(detected["failed"]))
+    return {
+        "scanned": len(detected["scanned"]), "failed": sorted(detected["failed"]),
+        "patterns": len(rows),
+    }
+
+
+@celery.task
+def aggregate_scan(results: List[Dict], run_key: str, as_of: str, started: float) -> Dict:
+    """Fold chunk summaries into one scan_runs row and scan metrics."""
+    scanned = sum(r["scanned"] for r in results)
+    failed = [t for r in results for t in r["failed"]]
+    patterns = sum(r["patterns"] for r in results)
+    total = scanned + len(failed)
+    with get_engine().begin() as conn:
+        record_scan_run(
+            conn, datetime.fromisoformat(as_of), total, len(failed), f"celery scan {run_key}"
+        )
+    record_scan("celery", total, time.time() - started)
+    write_textfile()
+    summary = {
+        "run_key": run_key, "chunks": len(results), "total": total, "failed": len(failed),
+        "patterns": patterns,
+    }
+    logging.info(f"Celery scan finished: {summary}")
+    return summary
+
+
+def scan_graph(tickers: List[str], run_key: str, as_of: datetime, chunk_size: int = CHUNK_SIZE):
+    """The chord for one scan: fetch -> detect -> persist per chunk, then aggregate."""
+    stamp = as_of.isoformat()
+    header = [
+        chain(fetch_chunk.s(chunk), detect_chunk.s(stamp), persist_chunk.s(run_key))
+        for chunk in chunks(tickers, chunk_size)
+    ]
+    return chord(header, aggregate_scan.s(run_key, stamp, time.time()))
+
+
+def start_scan(
+    tickers: Optional[List[str]] = None,
+    chunk_size: int = CHUNK_SIZE,
+    run_key: Optional[str] = None,
+) -> AsyncResult:
+    """Enqueue a scan of `tickers` (default: the universe, likely candidates first)."""
+    require_broker()
+    if tickers is None:
+        from scan_priority import load_stored_history, order_by_priority
+
+        tickers = order_by_priority(utils.load_universe(), load_stored_history)
+    as_of = datetime.utcnow().replace(microsecond=0)
+    run_key = run_key or f"celery:{as_of:%Y%m%dT%H%M%S}"
+    with get_engine().begin() as conn:
+        ensure_table(conn)
+    return scan_graph(tickers, run_key, as_of, chunk_size).apply_async()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Enqueue a chunked VCP scan on Celery workers")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--wait", action="store_true", help="block until the scan is aggregated")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    result = start_scan(chunk_size=args.chunk_size)
+    logging.info(f"[celery] scan enqueued: {result.id}")
+    if args.wait:
+        logging.info(f"[celery] {result.get()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Dedicated pattern detection worker.
+
+Runs `legend_ai_backend.run_pattern_detection` on a fixed interval in its own
+process, so detection never shares an event loop with API traffic. Each pass
+records its progress in `scan_runs`; passes never overlap because they run
+sequentially in this loop.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import the backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from legend_ai_backend import DETECTION_INTERVAL_SECONDS, redis_client, run_pattern_detection
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+def run_once() -> dict:
+    result = run_pattern_detection()
+    if redis_client:
+        redis_client.delete("patterns:all")
+    logging.info(f"Pattern detection pass complete: {result}")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run VCP pattern detection passes")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    parser.add_argument("--interval", type=int, default=DETECTION_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    while True:
+        started = time.monotonic()
+        try:
+            run_once()
+        except Exception as e:
+            logging.error(f"Pattern detection pass failed: {e}")
+        if args.once:
+            return
+        # Interval is measured start-to-start; a slow pass delays the next one
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,46 @@
 """
 Runs batch scans over a symbol universe and upserts results into Timescale.
 Idempotent by (ticker, pattern, as_of).
+
+Tickers are scanned most-likely-first (see scan_priority.py) and each
+ticker's patterns are upserted as soon as it is scanned.
+
+Every ticker is checkpointed in `scan_progress` together with its patterns;
+`--resume` continues the latest interrupted run (or `--run-key`), skipping
+finished tickers and retrying failed ones with backoff (see scan_checkpoint.py).
+
+`--top N` scans only the N highest-priority tickers: active patterns and
+near misses, for intraday incremental scans (see worker/scheduler.py). All
+patterns of a run share one `as_of` (the trading day's for `--top` runs), so
+repeated runs update rows instead of adding them.
+
+Scale out across containers with either:
+  --shard i/N   scan only the tickers whose crc32 lands in shard i
+  --shards N    lease N shards through the database; crashed shards are
+                reclaimed and the last worker merges one scan run
+                (see worker/shards.py)
 """
 
+import argparse
 import os
 import sys
 import logging
+import time
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict
-import pandas as pd
-import yfinance as yf
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
 
 # Add parent directory to path so we can import the detector
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from vcp_ultimate_algorithm import VCPDetector
-from worker.utils import upsert_patterns, load_universe
+from app.metrics import SCAN_SYMBOLS, record_scan, timed_fetch, write_textfile
+from scan_priority import load_stored_history, order_by_priority
+from scan_checkpoint import (
+    FAILED, RESUME_ATTEMPTS, RUN_KEY_FORMAT, ensure_table, latest_run_key, load_progress,
+    plan_resume, prune_progress, record_progress, retry_with_backoff, run_as_of,
+)
+from worker.utils import fetch_price_data, load_universe, upsert_patterns_sql, vcp_records
+from worker.shards import parse_shard, run_coordinated, select_shard
 import sqlalchemy as sa
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -29,76 +53,111 @@ if not PG_URL:
 engine = sa.create_engine(PG_URL, future=True, pool_pre_ping=True)
 
 
-def fetch_price_data(ticker: str, period: str = "1y") -> pd.DataFrame:
-    """Fetch historical price data from yfinance."""
-    try:
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=period)
-        if df.empty:
-            return None
-        # Reset index to make Date a column, keep uppercase for VCP detector
-        df = df.reset_index()
-        return df
-    except Exception as e:
-        logging.error(f"Error fetching {ticker}: {e}")
-        return None
+def detect_patterns(ticker: str, as_of: Optional[datetime] = None) -> List[Dict]:
+    """Run VCP detection on a single ticker and return pattern records."""
+    return vcp_records(ticker, timed_fetch("yfinance", fetch_price_data, ticker), as_of=as_of)
 
 
-def run_one(ticker: str) -> List[Dict]:
-    """Run VCP detection on a single ticker and return pattern records."""
+def run_one(ticker: str) -> Optional[List[Dict]]:
+    """Pattern records for `ticker`, or None if it failed."""
     try:
-        df = fetch_price_data(ticker)
-        if df is None or len(df) < 50:
-            return []
-        
-        detector = VCPDetector(
-            min_price=10.0,
-            min_volume=500000,
-            min_contractions=2,
-            check_trend_template=True
-        )
-        
-        signal = detector.detect_vcp(df, ticker)
-        
-        if not signal.detected:
-            return []
-        
-        # Convert signal to database record
-        record = {
-            "ticker": ticker,
-            "pattern": "VCP",
-            "as_of": datetime.now(),
-            "confidence": float(signal.confidence_score),
-            "rs": None,  # TODO: calculate RS if available
-            "price": float(signal.pivot_price) if signal.pivot_price else None,
-            "meta": {
-                "contractions": len(signal.contractions),
-                "base_depth": float(signal.base_depth_percent) if signal.base_depth_percent else None,
-                "notes": signal.notes or []
-            }
-        }
-        
-        logging.info(f"✓ {ticker}: VCP detected (confidence={signal.confidence_score:.1f}%)")
-        return [record]
-        
+        rows = detect_patterns(ticker)
     except Exception as e:
         logging.error(f"Error processing {ticker}: {e}")
-        return []
+        SCAN_SYMBOLS.labels(scanner="batch", outcome="failed").inc()
+        return None
+    SCAN_SYMBOLS.labels(scanner="batch", outcome="ok").inc()
+    return rows
+
+
+ACTIVE_LOOKBACK_DAYS = 7
 
 
-def main() -> None:
+def recent_pattern_tickers(days: int = ACTIVE_LOOKBACK_DAYS) -> List[str]:
+    """Tickers with a pattern stored in the last `days` days (a strong prior for this scan)."""
+    since = datetime.now() - timedelta(days=days)
+    with engine.connect() as conn:
+        rows = conn.execute(sa.text("SELECT DISTINCT ticker FROM patterns WHERE as_of >= :since"),
+                            {"since": since})
+        return [row[0] for row in rows]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Main scan batch function."""
-    tickers = load_universe()
-    logging.info(f"Starting scan for {len(tickers)} tickers...")
-    
+    parser = argparse.ArgumentParser(description="Batch VCP scan over the universe")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--shard", help="scan only shard i of N (0-based), e.g. 2/8")
+    mode.add_argument("--shards", type=int, help="coordinate N leased shards through the database")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the latest interrupted run instead of starting over")
+    parser.add_argument("--run-key", help="run id to coordinate (--shards) or resume (--resume)")
+    parser.add_argument("--top", type=int,
+                        help="only the N highest-priority tickers (intraday incremental scans)")
+    args = parser.parse_args(argv)
+    if args.resume and args.shards:
+        parser.error("--shards runs recover through shard leases; --resume does not apply")
+
+    # Likely candidates first, so the best setups are upserted early in the run
+    tickers = order_by_priority(load_universe(), load_stored_history, active=recent_pattern_tickers())
+    if args.top:
+        tickers = tickers[:args.top]
+    started = time.perf_counter()
+    if args.shards:
+        result = run_coordinated(engine, tickers, run_one, args.shards, run_key=args.run_key)
+        logging.info(f"Coordinated scan finished: {result}")
+        record_scan("batch", len(tickers), time.perf_counter() - started)
+        write_textfile()
+        return
+    prefix = f"batch-top{args.top}:" if args.top else "batch:"
+    if args.shard:
+        index, count = parse_shard(args.shard)
+        tickers = select_shard(tickers, index, count)
+        prefix = f"batch-{index}of{count}:"
+        logging.info(f"Shard {index}/{count}")
+
+    with engine.begin() as conn:
+        ensure_table(conn)
+        run_key = args.run_key
+        if args.resume and not run_key:
+            run_key = latest_run_key(conn, prefix)
+        recorded = load_progress(conn, run_key) if args.resume and run_key else {}
+        if not recorded:
+            prune_progress(conn)
+        run_key = run_key or f"{prefix}{datetime.utcnow():{RUN_KEY_FORMAT}}"
+    # One stamp per run (per day for --top), so re-upserts hit the same (ticker, pattern, as_of)
+    as_of = run_as_of(run_key, per_day=bool(args.top))
+
+    done, retry, todo = plan_resume(tickers, recorded)
+    if recorded:
+        logging.info(f"Resuming {run_key}: {len(done)} done, retrying {len(retry)} failed")
+    logging.info(f"Starting scan for {len(retry) + len(todo)} tickers ({run_key})...")
+
     total_patterns = 0
+    failed = 0
+    finished = set(done)
     for ticker in tickers:
-        rows = run_one(ticker)
-        if rows:
-            upsert_patterns(engine, rows)
-            total_patterns += len(rows)
-    
-    logging.info(f"Scan complete. Found {total_patterns} patterns.")
+        if ticker in finished:
+            SCAN_SYMBOLS.labels(scanner="batch", outcome="skipped").inc()
+            continue
+        attempts = RESUME_ATTEMPTS if recorded.get(ticker) == FAILED else 1
+        try:
+            rows = retry_with_backoff(detect_patterns, ticker, as_of, attempts=attempts)
+            error = None
+        except Exception as e:
+            logging.error(f"Error processing {ticker}: {e}")
+            rows, error = None, str(e)
+        # Patterns and the checkpoint commit together, so a crash never skips a ticker
+        with engine.begin() as conn:
+            if rows:
+                conn.execute(upsert_patterns_sql(list(rows[0].keys())), rows)
+                total_patterns += len(rows)
+            record_progress(conn, run_key, ticker, ok=rows is not None, error=error)
+        failed += rows is None
+        SCAN_SYMBOLS.labels(scanner="batch", outcome="failed" if rows is None else "ok").inc()
+
+    logging.info(f"Scan complete. Found {total_patterns} patterns, {failed} tickers failed.")
+    record_scan("batch", len(tickers), time.perf_counter() - started)
+    write_textfile()
 
 
 if __name__ == "__main__":
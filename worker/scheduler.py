@@ -1,21 +1,224 @@
-import schedule
-import time
-import subprocess
+"""
+Long-lived scan scheduler.
+
+Scans run inside this process, so pandas, yfinance, the detector and
+`scan_batch` are imported once at startup (`warm()`) and stay loaded between
+runs. Cadences:
+
+  eod        full batch scan daily at LEGEND_SCAN_AT (HH:MM, container time)
+             on NYSE trading days
+  intraday   incremental scan of the LEGEND_INTRADAY_TOP (default 200)
+             highest-priority tickers every LEGEND_INTRADAY_MINUTES while the
+             market is open (0, the default, disables it)
+  universe   universe snapshot refresh on Mondays at LEGEND_UNIVERSE_REFRESH_AT
+
+Trading days and hours come from the local exchange calendar
+(market_calendar.py). Scans hold an exclusive lock (a thread lock plus an
+flock on LEGEND_SCAN_LOCK), so they never overlap, even with a second
+scheduler on the same host. A scan that comes due while another holds the
+lock is skipped, not queued.
+
+Each cadence runs on its own thread, so the loop keeps ticking while a long
+scan is in progress. With LEGEND_SCAN_BACKEND=celery scans are enqueued on
+Celery workers (worker/celery_app.py) instead of running here; the cadence
+thread keeps the scan lock until the chord aggregates (or
+LEGEND_CELERY_SCAN_TIMEOUT seconds pass), so Celery scans never overlap either.
+
+Usage: python worker/scheduler.py [--run eod|intraday|universe] [--list]
+"""
+
+import argparse
+import fcntl
+import logging
 import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Add parent directory to path so we can import the detector
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import schedule  # noqa: E402
+
+from market_calendar import is_market_open, is_trading_day, now_et  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 WHEN = os.getenv("LEGEND_SCAN_AT", "13:30")  # HH:MM 24h
+INTRADAY_MINUTES = int(os.getenv("LEGEND_INTRADAY_MINUTES", "0"))
+INTRADAY_TOP = int(os.getenv("LEGEND_INTRADAY_TOP", "200"))
+UNIVERSE_WHEN = os.getenv("LEGEND_UNIVERSE_REFRESH_AT", "12:00")  # Mondays, HH:MM 24h
+# "celery" enqueues the scan on Celery workers (worker/celery_app.py) instead of running it here
+BACKEND = os.getenv("LEGEND_SCAN_BACKEND", "inprocess").lower()
+CELERY_SCAN_TIMEOUT = float(os.getenv("LEGEND_CELERY_SCAN_TIMEOUT", str(6 * 3600)))
+LOCK_PATH = os.getenv("LEGEND_SCAN_LOCK", "/tmp/legend-scan.lock")
+
+
+class ScanLock:
+    """Non-blocking exclusive lock, held across threads and processes on this host."""
+
+    def __init__(self, path: str = LOCK_PATH) -> None:
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self.holder: Optional[str] = None
+
+    def acquire(self, holder: str) -> bool:
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            self._thread_lock.release()
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()} {holder}\n".encode())
+        self._fd, self.holder = fd, holder
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd, self.holder = None, None
+            self._thread_lock.release()
+
+
+class Cadence:
+    def __init__(
+        self,
+        name: str,
+        job: Callable[[], object],
+        trading_days_only: bool = True,
+        market_hours_only: bool = False,
+        exclusive: bool = True,
+    ) -> None:
+        self.name = name
+        self.job = job
+        self.trading_days_only = trading_days_only
+        self.market_hours_only = market_hours_only
+        self.exclusive = exclusive
+        self.last_outcome: Optional[str] = None
+
+
+def run_cadence(cadence: Cadence, lock: ScanLock, now=None) -> str:
+    """Run `cadence` now if the calendar and lock allow it; returns the outcome."""
+    now = now or now_et()
+    if cadence.trading_days_only and not is_trading_day(now.date()):
+        outcome = "skipped: market holiday or weekend"
+    elif cadence.market_hours_only and not is_market_open(now):
+        outcome = "skipped: market closed"
+    elif cadence.exclusive and not lock.acquire(cadence.name):
+        outcome = f"skipped: {lock.holder or 'another scan'} running"
+    else:
+        started = time.monotonic()
+        try:
+            cadence.job()
+            outcome = f"ok in {time.monotonic() - started:.0f}s"
+        except (Exception, SystemExit) as exc:
+            logging.exception(f"[scheduler] {cadence.name} failed")
+            outcome = f"failed: {exc}"
+        finally:
+            if cadence.exclusive:
+                lock.release()
+    cadence.last_outcome = outcome
+    logging.info(f"[scheduler] {cadence.name}: {outcome}")
+    return outcome
+
+
+def start(cadence: Cadence, lock: ScanLock) -> None:
+    """Run `cadence` on its own thread so the schedule loop keeps ticking."""
+    threading.Thread(
+        target=run_cadence, args=(cadence, lock), name=f"scan-{cadence.name}", daemon=True
+    ).start()
+
+
+def warm() -> None:
+    """Import the scan stack once; every later run reuses it."""
+    started = time.monotonic()
+    if BACKEND == "celery":
+        from worker.celery_app import require_broker
+
+        require_broker()
+    else:
+        from worker import scan_batch, utils  # noqa: F401
+
+        utils.get_detector()
+    logging.info(f"[scheduler] scan stack warm in {time.monotonic() - started:.1f}s")
+
+
+def batch_scan(top: Optional[int] = None) -> None:
+    if BACKEND == "celery":
+        from scan_priority import load_stored_history, order_by_priority
+        from worker.celery_app import start_scan
+        from worker.utils import load_universe
+
+        tickers = order_by_priority(load_universe(), load_stored_history)[:top] if top else None
+        result = start_scan(tickers)
+        logging.info(f"[scheduler] enqueued celery scan {result.id}; waiting for it to aggregate")
+        # Block this cadence thread (and so hold the scan lock) until aggregate_scan is done
+        logging.info(f"[scheduler] celery scan finished: {result.get(timeout=CELERY_SCAN_TIMEOUT)}")
+        return
+    from worker import scan_batch
+
+    scan_batch.main(["--top", str(top)] if top else [])
+
+
+def refresh_universe() -> None:
+    from universe import refresh_universe as refresh
+
+    refresh(force=True)
+
+
+def cadences() -> Dict[str, Cadence]:
+    return {
+        "eod": Cadence("eod", batch_scan),
+        "intraday": Cadence(
+            "intraday", lambda: batch_scan(top=INTRADAY_TOP), market_hours_only=True
+        ),
+        "universe": Cadence(
+            "universe", refresh_universe, trading_days_only=False, exclusive=False
+        ),
+    }
+
 
+def register(jobs: Dict[str, Cadence], lock: ScanLock) -> List[str]:
+    schedule.every().day.at(WHEN).do(start, jobs["eod"], lock)
+    plan = [f"eod daily at {WHEN} on trading days"]
+    if INTRADAY_MINUTES > 0:
+        schedule.every(INTRADAY_MINUTES).minutes.do(start, jobs["intraday"], lock)
+        plan.append(
+            f"intraday top {INTRADAY_TOP} every {INTRADAY_MINUTES}m while the market is open"
+        )
+    schedule.every().monday.at(UNIVERSE_WHEN).do(start, jobs["universe"], lock)
+    plan.append(f"universe refresh Mondays at {UNIVERSE_WHEN}")
+    return plan
 
-def run():
-    print("[scheduler] running batch scan")
-    subprocess.check_call(["python", "worker/scan_batch.py"])
 
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Long-lived scan scheduler")
+    parser.add_argument("--run", choices=["eod", "intraday", "universe"],
+                        help="run one cadence now (calendar and lock still apply) and exit")
+    parser.add_argument("--list", action="store_true", help="print the schedule and exit")
+    args = parser.parse_args(argv)
 
-schedule.every().day.at(WHEN).do(run)
-print(f"[scheduler] scheduled daily at {WHEN}")
-while True:
-    schedule.run_pending()
-    time.sleep(1)
+    jobs, lock = cadences(), ScanLock()
+    if args.run:
+        print(run_cadence(jobs[args.run], lock))
+        return
+    plan = register(jobs, lock)
+    logging.info(f"[scheduler] {'; '.join(plan)} (backend {BACKEND})")
+    if args.list:
+        return
+    warm()
+    while True:
+        schedule.run_pending()
+        time.sleep(1)
 
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Shard assignment and lease coordination for horizontally scaled batch scans.
+
+Static mode: `shard_of(ticker, N)` assigns every ticker to one of N shards by
+crc32, so `scan_batch.py --shard i/N` on N containers covers the universe
+exactly once with no coordination.
+
+Coordinated mode: workers share a run (`run_key`, default `scan-YYYY-MM-DD`,
+then `scan-YYYY-MM-DD.2`, ... once the day's earlier runs are merged)
+recorded in `scan_shards`. Each worker repeatedly claims a pending shard, or one
+whose lease holder stopped heartbeating for `lease_seconds`, scans it, and
+stages the results in `scan_shard_results`. A shard is only marked done by its
+current lease holder, so a worker that lost its lease cannot publish stale
+results. The first worker to find every shard done wins the merge: all staged
+rows are upserted into `patterns` with one shared `as_of`, and one `scan_runs`
+row is written, in a single transaction.
+"""
+
+import json
+import logging
+import os
+import socket
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from worker.utils import upsert_patterns_sql
+
+HEADER_SHARD = -1  # per-run header row: shard_count, merge state
+LEASE_SECONDS = int(os.getenv("LEGEND_SHARD_LEASE_SECONDS", "300"))
+HEARTBEAT_EVERY = 10  # tickers between heartbeats
+POLL_SECONDS = 5.0  # wait between claim attempts while other workers hold shards
+
+metadata = sa.MetaData()
+
+scan_shards = sa.Table(
+    "scan_shards",
+    metadata,
+    sa.Column("run_key", sa.String(64), primary_key=True),
+    sa.Column("shard", sa.Integer, primary_key=True),
+    sa.Column("shard_count", sa.Integer, nullable=False),
+    sa.Column("status", sa.String(16), nullable=False, default="pending"),
+    sa.Column("owner", sa.String(128)),
+    sa.Column("heartbeat_at", sa.DateTime),
+    sa.Column("started_at", sa.DateTime),
+    sa.Column("finished_at", sa.DateTime),
+    sa.Column("attempts", sa.Integer, nullable=False, default=0),
+    sa.Column("total", sa.Integer, nullable=False, default=0),
+    sa.Column("failed", sa.Integer, nullable=False, default=0),
+)
+
+scan_shard_results = sa.Table(
+    "scan_shard_results",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+    sa.Column("run_key", sa.String(64), nullable=False, index=True),
+    sa.Column("shard", sa.Integer, nullable=False),
+    sa.Column("ticker", sa.String(16), nullable=False),
+    sa.Column("pattern", sa.String(32), nullable=False),
+    sa.Column("confidence", sa.Float),
+    sa.Column("rs", sa.Float),
+    sa.Column("price", sa.Float),
+    sa.Column("meta", sa.Text),
+)
+
+
+def shard_of(ticker: str, shard_count: int) -> int:
+    """Stable shard index for `ticker` (same on every host and Python version)."""
+    return zlib.crc32(ticker.strip().upper().encode("utf-8")) % shard_count
+
+
+def select_shard(tickers: List[str], shard: int, shard_count: int) -> List[str]:
+    return [t for t in tickers if shard_of(t, shard_count) == shard]
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse `i/N` (0-based i) into (i, N)."""
+    try:
+        index, count = (int(part) for part in spec.split("/", 1))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {spec!r}") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"shard index must be in [0, {count}), got {spec!r}")
+    return index, count
+
+
+def default_run_key() -> str:
+    return f"scan-{datetime.utcnow():%Y-%m-%d}"
+
+
+def next_run_key(engine: Engine, base: Optional[str] = None) -> str:
+    """The day's unmerged run to join, or a new generation once the latest is merged."""
+    base = base or default_run_key()
+    with engine.connect() as conn:
+        headers = conn.execute(
+            sa.select(scan_shards.c.run_key, scan_shards.c.status).where(
+                scan_shards.c.shard == HEADER_SHARD,
+                sa.or_(scan_shards.c.run_key == base, scan_shards.c.run_key.like(f"{base}.%")),
+            )
+        ).all()
+    generations: Dict[int, str] = {}
+    for key, status in headers:
+        suffix = key[len(base) + 1:]
+        if key == base or suffix.isdigit():
+            generations[int(suffix) if suffix else 1] = status
+    if not generations:
+        return base
+    latest = max(generations)
+    if generations[latest] == "merged":
+        latest += 1
+    return base if latest == 1 else f"{base}.{latest}"
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def ensure_tables(engine: Engine) -> None:
+    metadata.create_all(engine)
+
+
+def init_run(engine: Engine, run_key: str, shard_count: int) -> None:
+    """Create the header and shard rows for `run_key`; safe to call from every worker."""
+    now = datetime.utcnow()
+    for shard in [HEADER_SHARD, *range(shard_count)]:
+        try:
+            with engine.begin() as conn:
+                conn.execute(scan_shards.insert().values(
+                    run_key=run_key, shard=shard, shard_count=shard_count, status="pending",
+                    started_at=now if shard == HEADER_SHARD else None,
+                    attempts=0, total=0, failed=0,
+                ))
+        except IntegrityError:
+            pass  # another worker created it first
+    with engine.connect() as conn:
+        existing = conn.execute(
+            sa.select(scan_shards.c.shard_count).where(
+                scan_shards.c.run_key == run_key, scan_shards.c.shard == HEADER_SHARD
+            )
+        ).scalar_one()
+    if existing != shard_count:
+        raise ValueError(f"run {run_key} was started with {existing} shards, not {shard_count}")
+
+
+def claim_shard(engine: Engine, run_key: str, owner: str,
+                lease_seconds: int = LEASE_SECONDS) -> Optional[int]:
+    """Claim a pending shard, or one whose lease expired; None if nothing is claimable."""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=lease_seconds)
+    claimable = sa.or_(
+        scan_shards.c.status == "pending",
+        sa.and_(scan_shards.c.status == "claimed", scan_shards.c.heartbeat_at < stale),
+    )
+    with engine.connect() as conn:
+        candidates = conn.execute(
+            sa.select(scan_shards.c.shard)
+            .where(scan_shards.c.run_key == run_key, scan_shards.c.shard != HEADER_SHARD, claimable)
+            .order_by(scan_shards.c.shard)
+        ).scalars().all()
+    for shard in candidates:
+        # Conditional update: exactly one racing worker sees rowcount == 1
+        with engine.begin() as conn:
+            result = conn.execute(
+                scan_shards.update()
+                .where(scan_shards.c.run_key == run_key, scan_shards.c.shard == shard, claimable)
+                .values(status="claimed", owner=owner, heartbeat_at=now, started_at=now,
+                        attempts=scan_shards.c.attempts + 1)
+            )
+        if result.rowcount == 1:
+            return shard
+    return None
+
+
+def heartbeat(engine: Engine, run_key: str, shard: int, owner: str) -> bool:
+    """Extend the lease; False means it was lost to another worker."""
+    with engine.begin() as conn:
+        result = conn.execute(
+            scan_shards.update()
+            .where(scan_shards.c.run_key == run_key, scan_shards.c.shard == shard,
+                   scan_shards.c.owner == owner, scan_shards.c.status == "claimed")
+            .values(heartbeat_at=datetime.utcnow())
+        )
+    return result.rowcount == 1
+
+
+def complete_shard(engine: Engine, run_key: str, shard: int, owner: str,
+                   rows: List[Dict], total: int, failed: int) -> bool:
+    """Stage `rows` and mark the shard done, only if `owner` still holds the lease."""
+    with engine.begin() as conn:
+        done = conn.execute(
+            scan_shards.update()
+            .where(scan_shards.c.run_key == run_key, scan_shards.c.shard == shard,
+                   scan_shards.c.owner == owner, scan_shards.c.status == "claimed")
+            .values(status="done", finished_at=datetime.utcnow(), total=total, failed=failed)
+        )
+        if done.rowcount != 1:
+            return False
+        conn.execute(scan_shard_results.delete().where(
+            scan_shard_results.c.run_key == run_key, scan_shard_results.c.shard == shard
+        ))
+        if rows:
+            conn.execute(scan_shard_results.insert(), [
+                {"run_key": run_key, "shard": shard, "ticker": r["ticker"], "pattern": r["pattern"],
+                 "confidence": r.get("confidence"), "rs": r.get("rs"), "price": r.get("price"),
+                 "meta": json.dumps(r.get("meta"))}
+                for r in rows
+            ])
+    return True
+
+
+def record_scan_run(conn: Connection, started_at: datetime, total: int, failed: int,
+                    notes: str) -> None:
+    # scan_runs is owned by the API models; reuse its table definition
+    from legend_ai_backend import ScanRun
+
+    ScanRun.__table__.create(conn, checkfirst=True)
+    conn.execute(ScanRun.__table__.insert().values(
+        started_at=started_at, finished_at=datetime.utcnow(), total_tickers=total,
+        success_count=total - failed, failed_count=failed, notes=notes,
+    ))
+
+
+def outstanding_shards(engine: Engine, run_key: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            sa.select(sa.func.count()).select_from(scan_shards).where(
+                scan_shards.c.run_key == run_key, scan_shards.c.shard != HEADER_SHARD,
+                scan_shards.c.status != "done",
+            )
+        ).scalar_one()
+
+
+def merge_run(engine: Engine, run_key: str) -> Optional[Dict]:
+    """Publish a finished run once; None if shards are outstanding or another worker merged it."""
+    with engine.begin() as conn:
+        shards = conn.execute(
+            sa.select(scan_shards).where(scan_shards.c.run_key == run_key)
+        ).mappings().all()
+        header = next((s for s in shards if s["shard"] == HEADER_SHARD), None)
+        work = [s for s in shards if s["shard"] != HEADER_SHARD]
+        if header is None or any(s["status"] != "done" for s in work):
+            return None
+        won = conn.execute(
+            scan_shards.update()
+            .where(scan_shards.c.run_key == run_key, scan_shards.c.shard == HEADER_SHARD,
+                   scan_shards.c.status == "pending")
+            .values(status="merged", finished_at=datetime.utcnow())
+        )
+        if won.rowcount != 1:
+            return None
+
+        as_of = header["started_at"]
+        staged = conn.execute(
+            sa.select(scan_shard_results).where(scan_shard_results.c.run_key == run_key)
+        ).mappings().all()
+        rows = [
+            {"ticker": r["ticker"], "pattern": r["pattern"], "as_of": as_of,
+             "confidence": r["confidence"], "rs": r["rs"], "price": r["price"], "meta": r["meta"]}
+            for r in staged
+        ]
+        if rows:
+            conn.execute(upsert_patterns_sql(list(rows[0].keys())), rows)
+        total = sum(s["total"] for s in work)
+        failed = sum(s["failed"] for s in work)
+        record_scan_run(conn, as_of, total, failed, f"sharded scan {run_key}")
+        conn.execute(scan_shard_results.delete().where(scan_shard_results.c.run_key == run_key))
+    return {"run_key": run_key, "patterns": len(rows), "total": total, "failed": failed}
+
+
+def run_coordinated(
+    engine: Engine,
+    tickers: List[str],
+    process: Callable[[str], Optional[List[Dict]]],
+    shard_count: int,
+    run_key: Optional[str] = None,
+    owner: Optional[str] = None,
+    lease_seconds: int = LEASE_SECONDS,
+    poll_seconds: float = POLL_SECONDS,
+) -> Dict:
+    """Claim and scan shards until every shard is done, then try to merge the run.
+
+    `process(ticker)` returns pattern rows, or None when the ticker failed.
+    While other workers hold the remaining shards this polls, so a shard
+    whose holder crashed is picked up once its lease expires.
+    """
+    owner = owner or default_owner()
+    ensure_tables(engine)
+    run_key = run_key or next_run_key(engine)
+    init_run(engine, run_key, shard_count)
+
+    scanned: List[int] = []
+    while True:
+        shard = claim_shard(engine, run_key, owner, lease_seconds)
+        if shard is None:
+            if outstanding_shards(engine, run_key) == 0:
+                break
+            time.sleep(poll_seconds)
+            continue
+        members = select_shard(tickers, shard, shard_count)
+        logging.info(
+            f"[{owner}] claimed shard {shard}/{shard_count} of {run_key}: {len(members)} tickers"
+        )
+        rows: List[Dict] = []
+        failed = 0
+        lost = False
+        for n, ticker in enumerate(members, start=1):
+            result = process(ticker)
+            if result is None:
+                failed += 1
+            else:
+                rows.extend(result)
+            if n % HEARTBEAT_EVERY == 0 and not heartbeat(engine, run_key, shard, owner):
+                lost = True
+                break
+        if lost or not complete_shard(engine, run_key, shard, owner, rows, len(members), failed):
+            logging.warning(f"[{owner}] lost lease on shard {shard} of {run_key}; discarding")
+            continue
+        scanned.append(shard)
+
+    merged = merge_run(engine, run_key)
+    if merged:
+        logging.info(f"[{owner}] merged {run_key}: {merged}")
+    elif not scanned:
+        logging.warning(f"[{owner}] {run_key} was already finished; nothing claimed or merged")
+    return {"run_key": run_key, "owner": owner, "shards": scanned, "merged": merged}
+
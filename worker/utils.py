@@ -1,39 +1,94 @@
 from __future__ import annotations
 
-import csv
-from pathlib import Path
-from typing import List, Dict
+import logging
+from datetime import datetime
+from typing import List, Dict, Optional
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import TextClause
 
 
-def upsert_patterns(engine: Engine, rows: List[Dict]) -> None:
-    if not rows:
-        return
-    cols = list(rows[0].keys())
+def upsert_patterns_sql(cols: List[str]) -> TextClause:
     keys = ",".join(cols)
     placeholders = ",".join([f":{c}" for c in cols])
     conflict = "(ticker, pattern, as_of)"
     set_expr = ", ".join([f"{c}=EXCLUDED.{c}" for c in cols if c not in ("ticker", "pattern", "as_of")])
-    sql = text(
+    return text(
         f"INSERT INTO patterns ({keys}) VALUES ({placeholders}) ON CONFLICT {conflict} DO UPDATE SET {set_expr}"
     )
+
+
+def upsert_patterns(engine: Engine, rows: List[Dict]) -> None:
+    if not rows:
+        return
+    sql = upsert_patterns_sql(list(rows[0].keys()))
     with engine.begin() as conn:
         conn.execute(sql, rows)
 
 
 def load_universe() -> List[str]:
-    p = Path("data/universe.csv")
-    if p.exists():
-        tickers: List[str] = []
-        with p.open() as f:
-            for row in csv.reader(f):
-                for cell in row:
-                    sym = cell.strip()
-                    if sym:
-                        tickers.append(sym)
+    from universe import load_symbols
+
+    tickers = load_symbols()
+    if tickers:
         return tickers
     # fallback small universe
     return ["AAPL", "MSFT", "NVDA", "AMZN", "TSLA"]
 
 
+def fetch_price_data(ticker: str, period: str = "1y"):
+    """Fetch historical price data from yfinance (None if there is none; errors propagate)."""
+    import yfinance as yf
+
+    df = yf.Ticker(ticker).history(period=period)
+    if df.empty:
+        return None
+    # Reset index to make Date a column, keep uppercase for VCP detector
+    return df.reset_index()
+
+
+_DETECTOR = None
+
+
+def get_detector():
+    """The batch scan detector, built once per process (long-lived workers reuse it)."""
+    global _DETECTOR
+    if _DETECTOR is None:
+        from vcp_ultimate_algorithm import VCPDetector
+
+        _DETECTOR = VCPDetector(
+            min_price=10.0,
+            min_volume=500000,
+            min_contractions=2,
+            check_trend_template=True
+        )
+    return _DETECTOR
+
+
+def vcp_records(ticker: str, df, as_of: Optional[datetime] = None) -> List[Dict]:
+    """Run VCP detection on one ticker's price frame and return pattern records."""
+    if df is None or len(df) < 50:
+        return []
+
+    signal = get_detector().detect_vcp(df, ticker)
+
+    if not signal.detected:
+        return []
+
+    # Convert signal to database record
+    record = {
+        "ticker": ticker,
+        "pattern": "VCP",
+        "as_of": as_of or datetime.now(),
+        "confidence": float(signal.confidence_score),
+        "rs": None,  # TODO: calculate RS if available
+        "price": float(signal.pivot_price) if signal.pivot_price else None,
+        "meta": {
+            "contractions": len(signal.contractions),
+            "base_depth": float(signal.base_depth_percent) if signal.base_depth_percent else None,
+            "notes": signal.notes or []
+        }
+    }
+
+    logging.info(f"✓ {ticker}: VCP detected (confidence={signal.confidence_score:.1f}%)")
+    return [record]